@@ -0,0 +1,286 @@
+from core import BitBoard, Board, Stone
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class BatchReversi:
+    '''
+    BatchReversi class plays N games at once. The games are kept as arrays of
+    64-bit bitboards, one element per game, laid out like BitBoard: the cell
+    (x, y) is the bit (y * 8 + x). Each operation works on all the games by
+    a few NumPy calls, so there is no loop over the games in Python.
+
+    A move is given as a bit index per game. The rules follow Reversi: a
+    move is rejected like put_stone_color() if it flips nothing, the side to
+    move changes after a move, a player who can put nowhere passes, and the
+    game is over when neither player can put stone.
+    '''
+
+    def __init__(self, size):
+        '''
+        BatchReversi(size)
+            Start 'size' games from the initial position.
+        '''
+        if np is None:
+            raise BaseException('BatchReversi requires numpy')
+        self.__size = size
+        self.init_state()
+
+    def __len__(self):
+        return self.__size
+
+    def init_state(self):
+        # Bits of white stones and black stones of each game, indexed by
+        # Stone.White and Stone.Black.
+        self.__bits = np.zeros((2, self.__size), dtype=np.uint64)
+        self.__bits[Stone.White] = (1 << 27) | (1 << 36)
+        self.__bits[Stone.Black] = (1 << 28) | (1 << 35)
+        self.__colors = np.full(self.__size, Stone.Black, dtype=np.int8)
+        self.__passed = np.zeros(self.__size, dtype=bool)
+        self.__over = np.zeros(self.__size, dtype=bool)
+
+    def set_entire(self, boards, colors=None):
+        '''
+        set_entire(boards, colors=None)
+            Set the games from an array of shape (N, 8, 8) of Stone values,
+            indexed as [game, y, x]. 'colors' is the array of the colors to
+            move, Stone.Black by default. Games where neither player can put
+            stone are over.
+        '''
+        boards = np.asarray(boards).reshape(self.__size, Board.Size ** 2)
+        for color in (Stone.White, Stone.Black):
+            self.__bits[color] = BatchReversi.__pack(boards == color)
+        if colors is None:
+            colors = Stone.Black
+        self.__colors = np.broadcast_to(
+                np.asarray(colors, dtype=np.int8), (self.__size,)).copy()
+        self.__passed[:] = False
+        self.__over[:] = False
+        self.__proceed(np.ones(self.__size, dtype=bool))
+
+    def get_entire(self):
+        '''
+        get_entire()
+            Return the games as an int8 array of shape (N, 8, 8) of Stone
+            values, indexed as [game, y, x].
+        '''
+        boards = np.full(
+                (self.__size, Board.Size ** 2), Stone.Unset, dtype=np.int8)
+        for color in (Stone.White, Stone.Black):
+            boards[BatchReversi.__unpack(self.__bits[color])] = color
+        return boards.reshape(self.__size, Board.Size, Board.Size)
+
+    def get_bits(self, color):
+        return self.__bits[color].copy()
+
+    def get_colors(self):
+        '''
+        get_colors()
+            Return the array of the colors to move.
+        '''
+        return self.__colors.copy()
+
+    def get_passed(self):
+        '''
+        get_passed()
+            Return the bool array of the games where the player of the last
+            move is to move again because the rival had to pass.
+        '''
+        return self.__passed.copy()
+
+    def get_over(self):
+        return self.__over.copy()
+
+    def get_player_bits(self):
+        return self.__bits[self.__colors, np.arange(self.__size)]
+
+    def get_rival_bits(self):
+        return self.__bits[1 - self.__colors, np.arange(self.__size)]
+
+    def get_stones_counts(self):
+        '''
+        get_stones_counts()
+            Return a list of the arrays of the numbers of stones, indexed by
+            Stone.White and Stone.Black like Board.get_stones_counts().
+        '''
+        return [
+            BatchReversi.popcount(self.__bits[Stone.White]),
+            BatchReversi.popcount(self.__bits[Stone.Black]),
+        ]
+
+    def get_winners(self):
+        '''
+        get_winners()
+            Return the array of the winners, Stone.Unset for draw games.
+            It is meaningful only for the games over.
+        '''
+        (white, black) = self.get_stones_counts()
+        return np.where(
+                white > black, Stone.White,
+                np.where(black > white, Stone.Black, Stone.Unset)
+        ).astype(np.int8)
+
+    def get_puttable_masks(self):
+        '''
+        get_puttable_masks()
+            Return the array of the bitmasks of the cells where the player to
+            move can put stone. It is 0 for the games over.
+        '''
+        moves = BatchReversi.get_moves_masks(
+                self.get_player_bits(), self.get_rival_bits())
+        moves[self.__over] = 0
+        return moves
+
+    def get_puttable_matrix(self):
+        '''
+        get_puttable_matrix()
+            Return a bool array of shape (N, 64), where [i, index] tells
+            whether the player of the game i can put stone on the bit
+            'index'.
+        '''
+        return BatchReversi.__unpack(self.get_puttable_masks())
+
+    def put_stones(self, indexes):
+        '''
+        put_stones(indexes)
+            Put stones of the players to move on the bit indexes, one per
+            game, and reverse the sandwiched stones. An index of -1, or of a
+            cell where the player cannot put, leaves the game unchanged.
+
+            Then the turn goes to the rival, or comes back if the rival has
+            to pass. Games where neither player can put are over.
+
+            Return a bool array of the games where stone was put.
+        '''
+        indexes = np.asarray(indexes, dtype=np.int64)
+        games = np.arange(self.__size)
+        player = self.get_player_bits()
+        rival = self.get_rival_bits()
+        bits = np.where(
+                indexes >= 0,
+                np.left_shift(
+                    np.uint64(1), np.maximum(indexes, 0).astype(np.uint64)),
+                np.uint64(0))
+        flips = BatchReversi.get_flips_masks(player, rival, bits)
+        put = (flips != 0) & ~self.__over
+
+        player = np.where(put, player | bits | flips, player)
+        rival = np.where(put, rival ^ flips, rival)
+        self.__bits[self.__colors, games] = player
+        self.__bits[1 - self.__colors, games] = rival
+        self.__colors = np.where(put, 1 - self.__colors, self.__colors) \
+            .astype(np.int8)
+        self.__passed[put] = False
+        self.__proceed(put)
+        return put
+
+    def __proceed(self, games):
+        # Let the player to move pass in 'games' if necessary, and finish the
+        # games where neither player can put.
+        player = self.get_player_bits()
+        rival = self.get_rival_bits()
+        stuck = games & ~self.__over & \
+            (BatchReversi.get_moves_masks(player, rival) == 0)
+        rival_stuck = \
+            BatchReversi.get_moves_masks(rival, player) == 0
+        self.__over |= stuck & rival_stuck
+        passing = stuck & ~rival_stuck
+        self.__passed |= passing
+        self.__colors = np.where(passing, 1 - self.__colors, self.__colors) \
+            .astype(np.int8)
+
+    def choose_random_moves(self, rng):
+        '''
+        choose_random_moves(rng)
+            Return the array of bit indexes of moves chosen uniformly at
+            random with 'rng', a numpy.random.Generator. It is -1 for the
+            games over.
+        '''
+        matrix = self.get_puttable_matrix()
+        counts = matrix.sum(axis=1)
+        choices = (rng.random(self.__size) * counts).astype(np.int64)
+        indexes = np.argmax(
+                np.cumsum(matrix, axis=1) > choices[:, None], axis=1)
+        return np.where(counts > 0, indexes, -1)
+
+    def play_random(self, rng):
+        '''
+        play_random(rng)
+            Play random moves until all the games are over, and return the
+            number of plies played.
+        '''
+        plies = 0
+        while not self.__over.all():
+            self.put_stones(self.choose_random_moves(rng))
+            plies += 1
+        return plies
+
+    @staticmethod
+    def __shift(bits, shift):
+        if shift > 0:
+            return bits << np.uint64(shift)
+        return bits >> np.uint64(-shift)
+
+    @staticmethod
+    def get_moves_masks(player, rival):
+        '''
+        get_moves_masks(player, rival)
+            Same as BitBoard.get_moves_mask(), but for arrays of bitmasks.
+        '''
+        empty = ~(player | rival)
+        moves = np.zeros_like(player)
+        for shift, mask in BitBoard._Shifts:
+            r = rival & np.uint64(mask)
+            t = r & BatchReversi.__shift(player, shift)
+            for _ in range(Board.Size - 3):
+                t |= r & BatchReversi.__shift(t, shift)
+            moves |= BatchReversi.__shift(t, shift)
+        return moves & empty
+
+    @staticmethod
+    def get_flips_masks(player, rival, bits):
+        '''
+        get_flips_masks(player, rival, bits)
+            Same as BitBoard.get_flips_mask(), but for arrays of bitmasks.
+            'bits' has one bit, or none, per game.
+        '''
+        empty = ~(player | rival)
+        flips = np.zeros_like(player)
+        for shift, mask in BitBoard._Shifts:
+            r = rival & np.uint64(mask)
+            # The rival stones in a row from the new stone.
+            t = r & BatchReversi.__shift(bits, shift)
+            for _ in range(Board.Size - 3):
+                t |= r & BatchReversi.__shift(t, shift)
+            closed = (BatchReversi.__shift(t, shift) & player) != 0
+            flips |= np.where(closed, t, np.uint64(0))
+        return np.where((bits & empty) != 0, flips, np.uint64(0))
+
+    @staticmethod
+    def popcount(bits):
+        '''
+        popcount(bits)
+            Return the array of the numbers of the bits set in each element.
+        '''
+        bits = bits - ((bits >> np.uint64(1)) & np.uint64(0x5555555555555555))
+        bits = (bits & np.uint64(0x3333333333333333)) + \
+            ((bits >> np.uint64(2)) & np.uint64(0x3333333333333333))
+        bits = (bits + (bits >> np.uint64(4))) & np.uint64(0x0f0f0f0f0f0f0f0f)
+        return ((bits * np.uint64(0x0101010101010101)) >> np.uint64(56)) \
+            .astype(np.int64)
+
+    @staticmethod
+    def __pack(matrix):
+        # Pack a bool array of shape (N, 64) into bitmasks.
+        return np.packbits(matrix, axis=1, bitorder='little') \
+            .view('<u8').reshape(-1).astype(np.uint64)
+
+    @staticmethod
+    def __unpack(bits):
+        # Unpack bitmasks into a bool array of shape (N, 64).
+        return np.unpackbits(
+                bits.astype('<u8').view(np.uint8).reshape(-1, 8),
+                axis=1, bitorder='little').astype(bool)
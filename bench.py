@@ -0,0 +1,282 @@
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from core import Board, BitBoard, Coord, CPU, Stone
+from controller import HeadlessController
+from simulator import Simulator
+
+
+class Corpus:
+    '''
+    Corpus class makes a fixed set of midgame positions by random moves from
+    a fixed seed, so that every run measures the same positions.
+    '''
+
+    def __init__(self, size=100, seed=0, min_plies=16, max_plies=40):
+        rand = random.Random(seed)
+        self.__positions = []
+        while len(self.__positions) < size:
+            reversi = HeadlessController().get_reversi()
+            color = Stone.Black
+            for _ in range(rand.randint(min_plies, max_plies)):
+                coords = reversi.get_puttable_coords(color)
+                if len(coords) == 0:
+                    color = Stone.get_rival_stone_color(color)
+                    coords = reversi.get_puttable_coords(color)
+                    if len(coords) == 0:
+                        break
+                reversi.put_stone_color(rand.choice(coords), color)
+                color = Stone.get_rival_stone_color(color)
+            if len(reversi.get_puttable_coords(color)) > 0:
+                self.__positions.append(
+                        (reversi.get_board().get_entire(), color))
+
+    def __len__(self):
+        return len(self.__positions)
+
+    def get_positions(self):
+        '''
+        get_positions()
+            Return the list of (entire board, color to move).
+        '''
+        return list(self.__positions)
+
+    def make_games(self, board_class=BitBoard):
+        '''
+        make_games(board_class=BitBoard)
+            Return the list of (reversi, color) set up to the positions.
+        '''
+        games = []
+        for (entire, color) in self.__positions:
+            reversi = HeadlessController(board_class).get_reversi()
+            reversi.get_board().set_entire(entire)
+            games.append((reversi, color))
+        return games
+
+
+class Benchmark:
+    '''
+    Benchmark class runs the benchmarks of the engine and reports the time
+    per operation:
+
+        results = Benchmark(Corpus()).run()
+
+    Each benchmark is a function which takes the corpus and returns a pair
+    of (function to measure, number of operations done by a call of it).
+    '''
+
+    Percentiles = (90, 99)
+
+    def __init__(self, corpus, repeat=20, games=10):
+        '''
+        Benchmark(corpus, repeat=20, games=10)
+            Measure each benchmark 'repeat' times. 'games' is the number of
+            games played in the game benchmark.
+        '''
+        self.__corpus = corpus
+        self.__repeat = repeat
+        self.__games = games
+        self.__benchmarks = {
+            'get_puttable_coords': self.bench_get_puttable_coords,
+            'can_put_here': self.bench_can_put_here,
+            'put_stone_color': self.bench_put_stone_color,
+            'cpu_get_put_coord': self.bench_cpu_get_put_coord,
+            'board_set_stone': lambda: self.bench_set_stone(Board),
+            'board_get_stone': lambda: self.bench_get_stone(Board),
+            'bitboard_set_stone': lambda: self.bench_set_stone(BitBoard),
+            'bitboard_get_stone': lambda: self.bench_get_stone(BitBoard),
+            'full_game': self.bench_full_game,
+        }
+
+    def get_names(self):
+        return list(self.__benchmarks)
+
+    def bench_get_puttable_coords(self):
+        games = self.__corpus.make_games()
+
+        def run():
+            for (reversi, color) in games:
+                reversi.get_puttable_coords(color)
+        return (run, len(games))
+
+    def bench_can_put_here(self):
+        games = self.__corpus.make_games()
+        coords = [Coord(x, y) for y in range(Board.Size)
+                  for x in range(Board.Size)]
+
+        def run():
+            for (reversi, color) in games:
+                for coord in coords:
+                    reversi.can_put_here(coord, color)
+        return (run, len(games) * len(coords))
+
+    def bench_put_stone_color(self):
+        games = [
+            (reversi, color, reversi.get_puttable_coords(color)[0])
+            for (reversi, color) in self.__corpus.make_games()
+        ]
+
+        def run():
+            for (reversi, color, coord) in games:
+                reversi.put_stone_color(coord, color)
+                reversi.undo_move()
+        return (run, len(games))
+
+    def bench_cpu_get_put_coord(self):
+        games = self.__corpus.make_games()
+
+        def run():
+            for (reversi, color) in games:
+                CPU.get_put_coord(reversi, color)
+        return (run, len(games))
+
+    def bench_set_stone(self, board_class):
+        boards = []
+        for (entire, _) in self.__corpus.get_positions():
+            board = board_class()
+            board.set_entire(entire)
+            boards.append((board, entire))
+        coords = [Coord(x, y) for y in range(Board.Size)
+                  for x in range(Board.Size)]
+
+        def run():
+            for (board, entire) in boards:
+                for coord in coords:
+                    board.set_stone(coord, entire[coord.y][coord.x])
+        return (run, len(boards) * len(coords))
+
+    def bench_get_stone(self, board_class):
+        boards = []
+        for (entire, _) in self.__corpus.get_positions():
+            board = board_class()
+            board.set_entire(entire)
+            boards.append(board)
+        coords = [Coord(x, y) for y in range(Board.Size)
+                  for x in range(Board.Size)]
+
+        def run():
+            for board in boards:
+                for coord in coords:
+                    board.get_stone(coord)
+        return (run, len(boards) * len(coords))
+
+    def bench_full_game(self):
+        strategies = {Stone.Black: 'cpu', Stone.White: 'cpu'}
+
+        def run():
+            for seed in range(self.__games):
+                Simulator.play_game(strategies, seed)
+        return (run, self.__games)
+
+    def run(self, names=None, out=None):
+        '''
+        run(names=None, out=None)
+            Run the benchmarks of 'names', or all of them, and return the
+            results as a dict. The progress is written to 'out' if given.
+        '''
+        results = {}
+        for name in names if names else self.get_names():
+            (function, ops) = self.__benchmarks[name]()
+            function()  # Warm up
+            samples = []
+            for _ in range(self.__repeat):
+                start = time.perf_counter()
+                function()
+                samples.append((time.perf_counter() - start) / ops)
+            results[name] = Benchmark.summarize(samples)
+            if out is not None:
+                print(Benchmark.format_result(name, results[name]), file=out)
+        return {
+            'python': platform.python_version(),
+            'corpus': len(self.__corpus),
+            'repeat': self.__repeat,
+            'results': results,
+        }
+
+    @staticmethod
+    def summarize(samples):
+        '''
+        summarize(samples)
+            Return a dict of the statistics of the seconds per operation.
+        '''
+        samples = sorted(samples)
+        median = statistics.median(samples)
+        summary = {
+            'median': median,
+            'min': samples[0],
+            'max': samples[-1],
+            'ops_per_sec': 1 / median if median > 0 else 0,
+        }
+        for p in Benchmark.Percentiles:
+            index = min(len(samples) - 1, len(samples) * p // 100)
+            summary['p%d' % p] = samples[index]
+        return summary
+
+    @staticmethod
+    def format_result(name, result):
+        return '%-22s median %10.2f us  p90 %10.2f us  p99 %10.2f us  ' \
+            '%12.0f ops/s' % (
+                name, result['median'] * 1e6, result['p90'] * 1e6,
+                result['p99'] * 1e6, result['ops_per_sec'])
+
+    @staticmethod
+    def compare(base, new, threshold=0.1):
+        '''
+        compare(base, new, threshold=0.1)
+            Compare the results of two runs, and return a list of (name,
+            ratio of the medians new / base, whether it regressed). A
+            benchmark regresses when it is slower by more than 'threshold'.
+        '''
+        rows = []
+        for name, result in new['results'].items():
+            if name not in base['results']:
+                continue
+            ratio = result['median'] / base['results'][name]['median']
+            rows.append((name, ratio, ratio > 1 + threshold))
+        return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+            description='Benchmark the engine, or compare two results.')
+    parser.add_argument(
+            'names', nargs='*', help='benchmarks to run, all by default')
+    parser.add_argument('--output', help='file to save the results as JSON')
+    parser.add_argument('--positions', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument(
+            '--compare', nargs=2, metavar=('BASE', 'NEW'),
+            help='compare two saved results instead of running')
+    parser.add_argument(
+            '--threshold', type=float, default=0.1,
+            help='slowdown ratio to report as a regression')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            base = json.load(f)
+        with open(args.compare[1]) as f:
+            new = json.load(f)
+        regressed = False
+        for (name, ratio, is_regression) in Benchmark.compare(
+                base, new, args.threshold):
+            print('%-22s %6.2fx %s' % (
+                name, ratio, 'REGRESSION' if is_regression else ''))
+            regressed |= is_regression
+        return 1 if regressed else 0
+
+    benchmark = Benchmark(Corpus(args.positions), args.repeat, args.games)
+    results = benchmark.run(args.names, sys.stdout)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
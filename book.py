@@ -0,0 +1,267 @@
+import argparse
+import mmap
+import os
+import struct
+from core import BitBoard, Board, Stone, Symmetry, Zobrist
+
+
+class BookError(BaseException):
+    def __init__(self, message):
+        self.__message = message
+
+    def __str__(self):
+        return self.__message
+
+
+class OpeningBook:
+    '''
+    OpeningBook class looks up moves in an opening book file written by
+    BookBuilder. The file is mapped into memory by mmap and searched by
+    binary search, so it is not loaded into the process, and the processes
+    opening the same file share its pages.
+
+    The file is a header followed by the entries sorted by (key, move):
+
+        header ... magic (4 bytes), version (2), entry size (2), count (4)
+        entry  ... key (8), move (1), sum of scores (4), count of games (4)
+
+    The key is the Zobrist key of the canonical form of the position under
+    the symmetries of the board (see core.Symmetry), and the move is a bit
+    index in the canonical form.
+    The scores are the final disc differentials for the player to move.
+    '''
+
+    Magic = b'RVBK'
+    Version = 2
+    Header = struct.Struct('<4sHHI')
+    Entry = struct.Struct('<QBiI')
+
+    def __init__(self, path):
+        '''
+        OpeningBook(path)
+            Open the book file 'path'. Use it with 'with' statement or call
+            close() to unmap the file.
+        '''
+        self.__map = None
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < OpeningBook.Header.size:
+                raise BookError('Too short for an opening book: %s' % path)
+            self.__map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, entry_size, count) = \
+            OpeningBook.Header.unpack_from(self.__map)
+        if magic != OpeningBook.Magic or \
+                version != OpeningBook.Version or \
+                entry_size != OpeningBook.Entry.size or \
+                len(self.__map) != \
+                OpeningBook.Header.size + entry_size * count:
+            self.close()
+            raise BookError('Not an opening book: %s' % path)
+        self.__count = count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self.__count
+
+    def close(self):
+        if self.__map is not None:
+            self.__map.close()
+            self.__map = None
+
+    @staticmethod
+    def normalize(player, rival, color):
+        '''
+        normalize(player, rival, color)
+            Return a tuple of (key, symmetries): the key of the canonical
+            form of the position, and the list of the symmetries which
+            transform the position into it.
+        '''
+        (white, black) = (player, rival) if color == Stone.White else \
+            (rival, player)
+        (white, black, symmetries) = Symmetry.canonicalize(white, black)
+        return (Zobrist.hash_bits(white, black, color), symmetries)
+
+    def __get_key(self, i):
+        return struct.unpack_from(
+                '<Q', self.__map,
+                OpeningBook.Header.size + OpeningBook.Entry.size * i)[0]
+
+    def __lower_bound(self, key):
+        (low, high) = (0, self.__count)
+        while low < high:
+            middle = (low + high) // 2
+            if self.__get_key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def probe(self, player, rival, color):
+        '''
+        probe(player, rival, color)
+            Return the list of (bit index of the move, count of games, average
+            score) of the position where 'player' of 'color' is to move, or
+            an empty list if the book does not have it.
+        '''
+        (key, symmetries) = OpeningBook.normalize(player, rival, color)
+        inverse = Symmetry.get_inverse(symmetries[0])
+        moves = []
+        i = self.__lower_bound(key)
+        while i < self.__count:
+            (entry_key, move, score, count) = OpeningBook.Entry.unpack_from(
+                    self.__map,
+                    OpeningBook.Header.size + OpeningBook.Entry.size * i)
+            if entry_key != key:
+                break
+            moves.append((Symmetry.transform_index(move, inverse), count,
+                          score / count))
+            i += 1
+        return moves
+
+    def get_best_move(self, player, rival, color, min_count=1):
+        '''
+        get_best_move(player, rival, color, min_count=1)
+            Return the bit index of the move of the best average score among
+            the ones played in 'min_count' games or more, or None.
+        '''
+        moves = [m for m in self.probe(player, rival, color)
+                 if m[1] >= min_count]
+        if len(moves) == 0:
+            return None
+        return max(moves, key=lambda m: (m[2], m[1]))[0]
+
+
+class BookBuilder:
+    '''
+    BookBuilder class collects the moves of games and writes an opening book
+    file for OpeningBook.
+    '''
+
+    def __init__(self, max_plies=20):
+        '''
+        BookBuilder(max_plies=20)
+            Only the first 'max_plies' moves of each game are recorded.
+        '''
+        self.__max_plies = max_plies
+        # {key: {move: [sum of scores, count]}}
+        self.__positions = {}
+
+    def add_game(self, moves):
+        '''
+        add_game(moves)
+            Add a game played from the initial position. 'moves' is the list
+            of the bit indexes of the moves, without passes, up to the end of
+            the game.
+        '''
+        black, white = 0x0000000810000000, 0x0000001008000000
+        player, rival, color = black, white, Stone.Black
+        played = []
+        for index in moves:
+            bit = 1 << index
+            if BitBoard.get_moves_mask(player, rival) == 0:
+                # Pass
+                player, rival = rival, player
+                color = Stone.get_rival_stone_color(color)
+            flips = BitBoard.get_flips_mask(player, rival, bit)
+            if flips == 0:
+                raise BookError('Illegal move %d' % index)
+            if len(played) < self.__max_plies:
+                played.append((player, rival, color, index))
+            player, rival = rival ^ flips, player | bit | flips
+            color = Stone.get_rival_stone_color(color)
+
+        (white, black) = (player, rival) if color == Stone.White else \
+            (rival, player)
+        diff = BitBoard.popcount(black) - BitBoard.popcount(white)
+        for (player, rival, color, index) in played:
+            (key, symmetries) = OpeningBook.normalize(player, rival, color)
+            move = min(Symmetry.transform_index(index, t) for t in symmetries)
+            entry = self.__positions.setdefault(key, {}) \
+                .setdefault(move, [0, 0])
+            entry[0] += diff if color == Stone.Black else -diff
+            entry[1] += 1
+
+    def __len__(self):
+        return sum(len(moves) for moves in self.__positions.values())
+
+    def write(self, path, min_count=1):
+        '''
+        write(path, min_count=1)
+            Write the book to 'path'. The moves played in fewer than
+            'min_count' games are left out.
+        '''
+        entries = sorted(
+            (key, move, score, count)
+            for key, moves in self.__positions.items()
+            for move, (score, count) in moves.items()
+            if count >= min_count
+        )
+        with open(path, 'wb') as f:
+            f.write(OpeningBook.Header.pack(
+                    OpeningBook.Magic, OpeningBook.Version,
+                    OpeningBook.Entry.size, len(entries)))
+            for entry in entries:
+                f.write(OpeningBook.Entry.pack(*entry))
+        return len(entries)
+
+
+class BookCPU:
+    '''
+    BookCPU class plays the moves of an opening book while the position is
+    in the book, and asks another CPU otherwise. The book is probed before
+    any search:
+
+        reversi.set_cpu(BookCPU(OpeningBook('opening.book'), SearchCPU()))
+    '''
+
+    def __init__(self, book, cpu, min_count=1):
+        self.__book = book
+        self.__cpu = cpu
+        self.__min_count = min_count
+
+    def get_put_coord(self, reversi, color):
+        '''
+        get_put_coord(reversi, color)
+            Return a coord to put stone. This function assumes that `color`
+            player can put stone at least one place.
+        '''
+        board = reversi.get_board()
+        player = board.get_bits(color)
+        rival = board.get_bits(Stone.get_rival_stone_color(color))
+        index = self.__book.get_best_move(
+                player, rival, color, self.__min_count)
+        if index is not None and \
+                BitBoard.get_moves_mask(player, rival) >> index & 1:
+            return BitBoard.index_to_coord(index)
+        return self.__cpu.get_put_coord(reversi, color)
+
+
+def main(argv=None):
+    from simulator import Simulator
+
+    parser = argparse.ArgumentParser(
+            description='Build an opening book from self-play games.')
+    parser.add_argument('path', help='file to write the book to')
+    parser.add_argument('--black', default='cpu', help='strategy of black')
+    parser.add_argument('--white', default='cpu', help='strategy of white')
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--plies', type=int, default=20)
+    parser.add_argument('--min-count', type=int, default=2)
+    args = parser.parse_args(argv)
+
+    builder = BookBuilder(args.plies)
+    simulator = Simulator(args.black, args.white, args.seed, args.workers)
+    for result in simulator.run(args.games):
+        builder.add_game([y * Board.Size + x for (x, y) in result['moves']])
+    count = builder.write(args.path, args.min_count)
+    print('%d entries written to %s' % (count, args.path))
+
+
+if __name__ == '__main__':
+    main()
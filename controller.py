@@ -1,6 +1,6 @@
 from abc import ABCMeta, abstractmethod
-from core import Reversi, Stone
-from view import View
+from collections import deque
+from core import BitBoard, Reversi, Stone
 
 
 class ControllerBase(metaclass=ABCMeta):
@@ -43,11 +43,7 @@ class ControllerBase(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    def request_update_stones(self, coords, color):
-        pass
-
-    @abstractmethod
-    def request_reverse_stones(self, coords):
+    def request_apply_diff(self, diff):
         pass
 
     @abstractmethod
@@ -74,6 +70,8 @@ class Controller(ControllerBase):
         self.__view.create_window(board, play_mode)
 
     def __init__(self):
+        # Imported here so that tkinter is loaded only when the GUI is used.
+        from view import View
         self.__reversi = Reversi(self)
         self.__view = View(self)
 
@@ -120,11 +118,14 @@ class Controller(ControllerBase):
     def request_notify_put_success(self, coord):
         self.__reversi.proceed_to_next()
 
-    def request_update_stones(self, coords, color):
-        self.__view.update_stones(coords, color)
-
-    def request_reverse_stones(self, coords):
-        self.__view.reverse_stones(coords)
+    def request_apply_diff(self, diff):
+        self.__view.apply_diff(diff)
+        if diff.get_passed() is not None:
+            self.__view.notify_need_pass(diff.get_passed())
+        elif diff.get_result() == Stone.Unset:
+            self.__view.notify_draw_game()
+        elif diff.get_result() is not None:
+            self.__view.notify_player_wins(diff.get_result())
 
     def request_notify_need_pass(self, color):
         self.__view.notify_need_pass(color)
@@ -137,3 +138,119 @@ class Controller(ControllerBase):
 
     def request_notify_draw_game(self):
         self.__view.notify_draw_game()
+
+
+class HeadlessController(ControllerBase):
+    '''
+    HeadlessController class drives Reversi without GUI. The notifications
+    from core are kept in an event queue, and passed to the callbacks added
+    by add_callback(). An event is a tuple of the name and the arguments,
+    e.g. ('apply_diff', diff) for each move, ('player_change', color), or
+    ('need_pass', color), ('player_wins', color) and ('draw_game',) when
+    Reversi.pass_if_necessary() is called out of moves.
+    '''
+
+    def __init__(self, board_class=BitBoard, max_events=1024):
+        '''
+        HeadlessController(board_class=BitBoard, max_events=1024)
+            Control a new Reversi on 'board_class'. The queue keeps the last
+            'max_events' events, and None means no limit.
+        '''
+        self.__events = deque(maxlen=max_events)
+        self.__callbacks = []
+        self.__result = None
+        self.__reversi = Reversi(self, board_class)
+
+    def get_reversi(self):
+        return self.__reversi
+
+    def add_callback(self, callback):
+        '''
+        add_callback(callback)
+            Call callback(name, *args) on each event.
+        '''
+        self.__callbacks.append(callback)
+
+    def get_events(self):
+        '''
+        get_events()
+            Return the list of the events in the queue, and empty it.
+        '''
+        events = list(self.__events)
+        self.__events.clear()
+        return events
+
+    def get_result(self):
+        '''
+        get_result()
+            Return None while the game goes on. When it is over, return the
+            winner, or Stone.Unset for a draw game.
+        '''
+        return self.__result
+
+    def __notify(self, name, *args):
+        event = (name,) + args
+        self.__events.append(event)
+        for callback in self.__callbacks:
+            callback(*event)
+
+    # ----- Functions to be called by clients -----
+    def request_initialize_board(self):
+        self.__reversi.init_state()
+        self.__result = None
+        self.__notify('initialize_board')
+
+    def request_try_put_stone(self, coord):
+        if self.__reversi.put_stone(coord):
+            self.__reversi.proceed_to_next()
+            return True
+        self.request_notify_put_fails(coord)
+        return False
+
+    def request_puttable_cells_for_current_player(self):
+        color = self.__reversi.get_player_color()
+        return self.__reversi.get_puttable_coords(color)
+
+    def request_switch_mode(self):
+        play_mode = self.__reversi.get_play_mode()
+        if play_mode == Reversi.PlayMode.VsCPU:
+            self.__reversi.set_play_mode(Reversi.PlayMode.VsPlayer)
+        else:
+            self.__reversi.set_play_mode(Reversi.PlayMode.VsCPU)
+            self.request_initialize_board()
+
+    def request_get_play_mode(self):
+        return self.__reversi.get_play_mode()
+
+    def request_get_cpu_color(self):
+        return self.__reversi.get_cpu_color()
+
+    def request_get_play_color(self):
+        return self.__reversi.get_player_color()
+
+    # ----- Functions to be called in core.py -----
+    def request_notify_put_fails(self, coord):
+        self.__notify('put_fails', coord)
+
+    def request_notify_put_success(self, coord):
+        self.__notify('put_success', coord)
+
+    def request_apply_diff(self, diff):
+        # The pass and the end of the game of a move come in the diff.
+        if diff.is_game_over():
+            self.__result = diff.get_result()
+        self.__notify('apply_diff', diff)
+
+    def request_notify_need_pass(self, color):
+        self.__notify('need_pass', color)
+
+    def request_notify_player_wins(self, color):
+        self.__result = color
+        self.__notify('player_wins', color)
+
+    def request_notify_player_change(self, next_player_color):
+        self.__notify('player_change', next_player_color)
+
+    def request_notify_draw_game(self):
+        self.__result = Stone.Unset
+        self.__notify('draw_game')
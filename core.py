@@ -10,10 +10,45 @@ class UnreachableError(BaseException):
 class Coord:
     '''
     Coord class is 2 dimention vector for expressing coordinates.
+
+    Coord objects are immutable and hashable. The coords from (-1, -1) to
+    (8, 8), that is the cells on the board and the ones just outside of it,
+    are interned: Coord(x, y) and the arithmetic on them return the
+    instance in the table instead of allocating a new one.
     '''
 
-    def __init__(self, x, y):
-        self.__x, self.__y = x, y
+    __slots__ = ('__x', '__y', '__hash')
+
+    _TableMin, _TableMax = -1, 8
+    _TableWidth = _TableMax - _TableMin + 1
+    _Table = []
+
+    def __new__(cls, x, y):
+        if Coord._TableMin <= x <= Coord._TableMax and \
+                Coord._TableMin <= y <= Coord._TableMax:
+            return Coord._Table[
+                    (y - Coord._TableMin) * Coord._TableWidth +
+                    (x - Coord._TableMin)]
+        return Coord.__create(x, y)
+
+    @staticmethod
+    def __create(x, y):
+        coord = object.__new__(Coord)
+        object.__setattr__(coord, '_Coord__x', x)
+        object.__setattr__(coord, '_Coord__y', y)
+        object.__setattr__(coord, '_Coord__hash', hash((x, y)))
+        return coord
+
+    @staticmethod
+    def _build_table():
+        r = range(Coord._TableMin, Coord._TableMax + 1)
+        Coord._Table = [Coord.__create(x, y) for y in r for x in r]
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Coord is immutable')
+
+    def __reduce__(self):
+        return (Coord, (self.__x, self.__y))
 
     def __add__(self, other):
         return Coord(self.__x + other.__x, self.__y + other.__y)
@@ -22,16 +57,21 @@ class Coord:
         return Coord(self.__x - other.__x, self.__y - other.__y)
 
     def __eq__(self, other):
+        if not isinstance(other, Coord):
+            return NotImplemented
         return self.__x == other.__x and self.__y == other.__y
 
     def __ne__(self, other):
         return not self == other
 
+    def __hash__(self):
+        return self.__hash
+
     def __str__(self):
         return f'({self.__x}, {self.__y})'
 
-    def set(self, newCoord):
-        self.__x, self.__y = newCoord.__x, newCoord.__y
+    def __repr__(self):
+        return f'Coord{self}'
 
     def get(self):
         return (self.__x, self.__y)
@@ -40,17 +80,12 @@ class Coord:
     def x(self):
         return self.__x
 
-    @x.setter
-    def x(self, value):
-        self.__x = value
-
     @property
     def y(self):
         return self.__y
 
-    @y.setter
-    def y(self, value):
-        self.__y = value
+
+Coord._build_table()
 
 
 class Stone:
@@ -93,6 +128,76 @@ class Stone:
             raise Stone.InvalidStoneError()
 
 
+class Zobrist:
+    '''
+    Zobrist class holds random keys to hash positions. The key of a position
+    is XOR of the keys of all the stones on the board, and SideKey if white
+    is to move. The keys are generated from a fixed seed, so that the same
+    position has the same key in every process.
+    '''
+
+    _Seed = 0x5eed
+    SideKey = 0
+
+    # StoneKeys[color][index] ... key of the stone of `color` on the cell of
+    #                            bit `index`.
+    # FlipKeys[index] ... key to reverse the stone on the cell of bit
+    #                     `index`.
+    StoneKeys = [[], []]
+    FlipKeys = []
+
+    @staticmethod
+    def _build_keys():
+        r = random.Random(Zobrist._Seed)
+        Zobrist.StoneKeys = [
+            [r.getrandbits(64) for _ in range(Board.Size ** 2)]
+            for _ in (Stone.White, Stone.Black)
+        ]
+        Zobrist.FlipKeys = [
+            w ^ b for w, b in zip(*Zobrist.StoneKeys)
+        ]
+        Zobrist.SideKey = r.getrandbits(64)
+
+    @staticmethod
+    def get_key_of_bits(bits, color):
+        '''
+        get_key_of_bits(bits, color)
+            Return XOR of the keys of the stones of 'color' on 'bits'.
+        '''
+        keys = Zobrist.StoneKeys[color]
+        key = 0
+        while bits:
+            low = bits & -bits
+            key ^= keys[low.bit_length() - 1]
+            bits ^= low
+        return key
+
+    @staticmethod
+    def get_flip_key(bits):
+        '''
+        get_flip_key(bits)
+            Return the key to reverse all the stones on 'bits'.
+        '''
+        key = 0
+        while bits:
+            low = bits & -bits
+            key ^= Zobrist.FlipKeys[low.bit_length() - 1]
+            bits ^= low
+        return key
+
+    @staticmethod
+    def hash_bits(white, black, side_to_move=None):
+        '''
+        hash_bits(white, black, side_to_move=None)
+            Return the key of the position given by the bitmasks of stones.
+        '''
+        key = Zobrist.get_key_of_bits(white, Stone.White) ^ \
+            Zobrist.get_key_of_bits(black, Stone.Black)
+        if side_to_move == Stone.White:
+            key ^= Zobrist.SideKey
+        return key
+
+
 class Board:
     '''
     Board class provides primitive operations for 8x8 matrix.
@@ -106,6 +211,43 @@ class Board:
     def init_state(self):
         self.__board = [[Stone.Unset for _ in range(8)] for _ in range(8)]
         self.__stones_count = [0, 0]
+        # Bitmasks of the stones, indexed by Stone.White and Stone.Black,
+        # kept along with the matrix so that get_bits() needs no scan.
+        self.__bits = [0, 0]
+        self._set_stones_key(0)
+        self.set_side_to_move(Stone.Black)
+
+    def _set_stones_key(self, key):
+        self.__stones_key = key
+
+    def _xor_stones_key(self, key):
+        self.__stones_key ^= key
+
+    def set_side_to_move(self, color):
+        self.__side_to_move = color
+
+    def get_side_to_move(self):
+        return self.__side_to_move
+
+    def get_hash(self):
+        '''
+        get_hash()
+            Return the 64-bit Zobrist key of the position, including the side
+            to move. The key is updated incrementally as stones are set.
+        '''
+        if self.__side_to_move == Stone.White:
+            return self.__stones_key ^ Zobrist.SideKey
+        return self.__stones_key
+
+    def get_canonical_hash(self):
+        '''
+        get_canonical_hash()
+            Return the Zobrist key which is the same for the positions
+            symmetric to each other. See Symmetry.get_canonical_hash().
+        '''
+        return Symmetry.get_canonical_hash(
+                self.get_bits(Stone.White), self.get_bits(Stone.Black),
+                self.__side_to_move)[0]
 
     def is_valid_coord(self, coord):
         (x, y) = coord.get()
@@ -121,8 +263,18 @@ class Board:
             return False
         (x, y) = coord.get()
         origin = self.get_stone(coord)
+        stone = Board.normalize_stone(stone)
         self.__board[y][x] = stone
 
+        # Update the hash key and the bitmasks
+        index = y * Board.Size + x
+        if origin != Stone.Unset:
+            self.__stones_key ^= Zobrist.StoneKeys[origin][index]
+            self.__bits[origin] ^= 1 << index
+        if stone != Stone.Unset:
+            self.__stones_key ^= Zobrist.StoneKeys[stone][index]
+            self.__bits[stone] |= 1 << index
+
         # Update counts of stones
         for color in [Stone.White, Stone.Black]:
             if origin == color:
@@ -165,10 +317,11 @@ class Board:
         print("x ... Black stone")
         print("  0 1 2 3 4 5 6 7")
         sep = " +-+-+-+-+-+-+-+-+"
-        for linenr in range(len(self.__board)):
+        board = self.get_entire()
+        for linenr in range(len(board)):
             print(sep)
             line = str(linenr)
-            for stone in self.__board[linenr]:
+            for stone in board[linenr]:
                 c = ' '
                 if stone == Stone.White:
                     c = 'o'
@@ -179,10 +332,30 @@ class Board:
             print(line)
         print(sep)
 
+    @staticmethod
+    def normalize_stone(stone):
+        '''
+        normalize_stone(stone)
+            The board holds only White, Black and Unset. Other states, such
+            as Surrounding in old board dumps, are stored as Unset.
+        '''
+        if stone == Stone.White or stone == Stone.Black:
+            return stone
+        return Stone.Unset
+
     # Set entire board matrix. Mainly for debugging.
     def set_entire(self, board):
         self.__stones_count = [0, 0]
-        self.__board = copy.deepcopy(board)
+        self.__board = [
+            [Board.normalize_stone(cell) for cell in line] for line in board
+        ]
+        self.__bits = [0, 0]
+        for y, line in enumerate(self.__board):
+            for x, cell in enumerate(line):
+                if cell != Stone.Unset:
+                    self.__bits[cell] |= 1 << (y * Board.Size + x)
+        self.__stones_key = Zobrist.hash_bits(
+                self.get_bits(Stone.White), self.get_bits(Stone.Black))
         for line in self.__board:
             for cell in line:
                 for color in [Stone.White, Stone.Black]:
@@ -192,6 +365,433 @@ class Board:
     def get_entire(self):
         return copy.deepcopy(self.__board)
 
+    def get_bits(self, color):
+        '''
+        get_bits(color)
+            Return the bitmask of the stones of 'color'. The cell (x, y) is
+            represented by the bit (y * 8 + x).
+        '''
+        return self.__bits[color]
+
+    def get_empty_mask(self):
+        return BitBoard.FullMask ^ \
+            (self.__bits[Stone.White] | self.__bits[Stone.Black])
+
+    def put_stone_bits(self, color, bit, flips):
+        '''
+        put_stone_bits(color, bit, flips)
+            Put stone of 'color' on the cell 'bit', and turn the stones in
+            'flips' to 'color'.
+        '''
+        for c in BitBoard.bits_to_coords(bit | flips):
+            self.set_stone(c, color)
+
+    def remove_stone_bits(self, color, bit, flips):
+        '''
+        remove_stone_bits(color, bit, flips)
+            Undo put_stone_bits(color, bit, flips).
+        '''
+        rival_color = Stone.get_rival_stone_color(color)
+        for c in BitBoard.bits_to_coords(flips):
+            self.set_stone(c, rival_color)
+        self.set_stone(BitBoard.bits_to_coords(bit)[0], Stone.Unset)
+
+
+class BitBoard(Board):
+    '''
+    BitBoard class provides the same operations as Board, but keeps the
+    position in 64-bit integers, one bit per cell. The cell (x, y) is
+    represented by the bit (y * 8 + x).
+    '''
+
+    FullMask = (1 << (Board.Size ** 2)) - 1
+
+    # Cells except the ones on the column x = 7 and x = 0.
+    _NotRightEdgeMask = 0x7f7f7f7f7f7f7f7f
+    _NotLeftEdgeMask = 0xfefefefefefefefe
+
+    # Masks to keep rival stones away from the edges which a shift would
+    # wrap around.
+    _HorizontalMask = 0x7e7e7e7e7e7e7e7e
+    _VerticalMask = 0x00ffffffffffff00
+    _DiagonalMask = 0x007e7e7e7e7e7e00
+
+    # Pairs of (shift, mask) for the eight directions. A positive shift means
+    # a left shift.
+    _Shifts = (
+        (1, _HorizontalMask),
+        (-1, _HorizontalMask),
+        (8, _VerticalMask),
+        (-8, _VerticalMask),
+        (7, _DiagonalMask),
+        (-7, _DiagonalMask),
+        (9, _DiagonalMask),
+        (-9, _DiagonalMask),
+    )
+
+    def init_state(self):
+        # Bits of white stones and black stones, indexed by Stone.White and
+        # Stone.Black.
+        self.__bits = [0, 0]
+        self.__empty = BitBoard.FullMask
+        self._set_stones_key(0)
+        self.set_side_to_move(Stone.Black)
+
+    @staticmethod
+    def coord_to_bit(coord):
+        (x, y) = coord.get()
+        return 1 << (y * Board.Size + x)
+
+    @staticmethod
+    def index_to_coord(index):
+        return Coord(index % Board.Size, index // Board.Size)
+
+    @staticmethod
+    def bits_to_coords(bits):
+        '''
+        bits_to_coords(bits)
+            Return coords of the cells in 'bits', ordered from (0, 0) to
+            (7, 7) row by row.
+        '''
+        coords = []
+        while bits:
+            low = bits & -bits
+            coords.append(BitBoard.index_to_coord(low.bit_length() - 1))
+            bits ^= low
+        return coords
+
+    @staticmethod
+    def popcount(bits):
+        return bits.bit_count()
+
+    @staticmethod
+    def get_adjacent_mask(bits):
+        '''
+        get_adjacent_mask(bits)
+            Return the bitmask of the cells adjacent to any cell in 'bits'.
+        '''
+        right = bits & BitBoard._NotRightEdgeMask
+        left = bits & BitBoard._NotLeftEdgeMask
+        adjacent = (bits << 8) | (bits >> 8) | \
+            (right << 1) | (right << 9) | (right >> 7) | \
+            (left >> 1) | (left >> 9) | (left << 7)
+        return adjacent & BitBoard.FullMask
+
+    @staticmethod
+    def get_moves_mask(player, rival, candidates=FullMask):
+        '''
+        get_moves_mask(player, rival)
+            Return the bitmask of the cells where 'player' can put a stone,
+            given the bitmasks of the stones of both players. All the eight
+            directions are propagated by shifts at once.
+
+            The result is limited to 'candidates', which must not contain
+            occupied cells.
+        '''
+        empty = candidates & (BitBoard.FullMask ^ (player | rival))
+        moves = 0
+        for shift, mask in BitBoard._Shifts:
+            r = rival & mask
+            if shift > 0:
+                t = r & (player << shift)
+                for _ in range(Board.Size - 3):
+                    t |= r & (t << shift)
+                moves |= t << shift
+            else:
+                shift = -shift
+                t = r & (player >> shift)
+                for _ in range(Board.Size - 3):
+                    t |= r & (t >> shift)
+                moves |= t >> shift
+        return moves & empty
+
+    @staticmethod
+    def get_flips_mask(player, rival, bit):
+        '''
+        get_flips_mask(player, rival, bit)
+            Return the bitmask of the rival stones reversed when 'player' puts
+            a stone on the empty cell 'bit'. The result is 0 if the cell is
+            not puttable.
+        '''
+        flips = 0
+        for shift, mask in BitBoard._Shifts:
+            r = rival & mask
+            line = 0
+            if shift > 0:
+                x = bit << shift
+                while x & r:
+                    line |= x
+                    x <<= shift
+            else:
+                x = bit >> -shift
+                while x & r:
+                    line |= x
+                    x >>= -shift
+            if x & player:
+                flips |= line
+        return flips
+
+    def put_stone_bits(self, color, bit, flips):
+        rival_color = Stone.get_rival_stone_color(color)
+        self.__bits[color] |= bit | flips
+        self.__bits[rival_color] ^= flips
+        self.__empty ^= bit
+        self._xor_stones_key(
+                Zobrist.StoneKeys[color][bit.bit_length() - 1] ^
+                Zobrist.get_flip_key(flips))
+
+    def remove_stone_bits(self, color, bit, flips):
+        rival_color = Stone.get_rival_stone_color(color)
+        self.__bits[color] ^= bit | flips
+        self.__bits[rival_color] |= flips
+        self.__empty |= bit
+        self._xor_stones_key(
+                Zobrist.StoneKeys[color][bit.bit_length() - 1] ^
+                Zobrist.get_flip_key(flips))
+
+    def set_stone(self, coord, stone):
+        '''
+        set_stone(coord, stone)
+            Set cell in the position 'coord' to 'stone'. Return True if
+            success.
+        '''
+        bit = BitBoard._CoordBits.get(coord)
+        if bit is None:
+            return False
+        index = bit.bit_length() - 1
+        bits = self.__bits
+        if bits[Stone.White] & bit:
+            bits[Stone.White] ^= bit
+            key = Zobrist.StoneKeys[Stone.White][index]
+        elif bits[Stone.Black] & bit:
+            bits[Stone.Black] ^= bit
+            key = Zobrist.StoneKeys[Stone.Black][index]
+        else:
+            self.__empty ^= bit
+            key = 0
+        if stone == Stone.White or stone == Stone.Black:
+            bits[stone] |= bit
+            key ^= Zobrist.StoneKeys[stone][index]
+        else:
+            self.__empty |= bit
+        if key:
+            self._xor_stones_key(key)
+        return True
+
+    def get_stone(self, coord):
+        bit = BitBoard._CoordBits.get(coord)
+        if bit is None:
+            return Stone.OutOfRange
+        if self.__empty & bit:
+            return Stone.Unset
+        if self.__bits[Stone.White] & bit:
+            return Stone.White
+        return Stone.Black
+
+    def __get_stone_by_bit(self, bit):
+        if self.__empty & bit:
+            return Stone.Unset
+        if self.__bits[Stone.White] & bit:
+            return Stone.White
+        return Stone.Black
+
+    def get_bits(self, color):
+        '''
+        get_bits(color)
+            Return the bitmask of the stones of 'color'.
+        '''
+        return self.__bits[color]
+
+    def get_empty_mask(self):
+        return self.__empty
+
+    def get_white_stones_count(self):
+        return BitBoard.popcount(self.__bits[Stone.White])
+
+    def get_black_stones_count(self):
+        return BitBoard.popcount(self.__bits[Stone.Black])
+
+    def get_stones_counts(self):
+        return [
+            self.get_white_stones_count(),
+            self.get_black_stones_count(),
+        ]
+
+    def __str__(self):
+        lines = []
+        for y in range(Board.Size):
+            line = ''
+            for x in range(Board.Size):
+                bit = 1 << (y * Board.Size + x)
+                line += Stone.to_char(self.__get_stone_by_bit(bit))
+            lines.append(line)
+        return "\n".join(lines)
+
+    def set_entire(self, board):
+        # Only the stones are replaced; the side to move is kept as in Board.
+        self.__bits = [0, 0]
+        self.__empty = BitBoard.FullMask
+        for y, line in enumerate(board):
+            for x, cell in enumerate(line):
+                bit = 1 << (y * Board.Size + x)
+                if cell == Stone.White or cell == Stone.Black:
+                    self.__bits[cell] |= bit
+                    self.__empty ^= bit
+        self._set_stones_key(Zobrist.hash_bits(*self.__bits))
+
+    def get_entire(self):
+        return [
+            [self.__get_stone_by_bit(1 << (y * Board.Size + x))
+                for x in range(Board.Size)]
+            for y in range(Board.Size)
+        ]
+
+
+# Bits of the cells, keyed by the interned coords on the board.
+BitBoard._CoordBits = {
+    Coord(x, y): 1 << (y * Board.Size + x)
+    for y in range(Board.Size) for x in range(Board.Size)
+}
+
+
+class Symmetry:
+    '''
+    Symmetry class transforms positions by the eight symmetries of the
+    board, the rotations and reflections. A symmetry is given as a number t
+    in range(Symmetry.Count), which moves the cell (x, y) to:
+
+        0: (x, y)          4: (7 - x, y)
+        1: (7 - y, x)      5: (x, 7 - y)
+        2: (7 - x, 7 - y)  6: (y, x)
+        3: (y, 7 - x)      7: (7 - y, 7 - x)
+
+    Bitmasks are transformed by a few shifts and masks instead of moving
+    the bits one by one.
+    '''
+
+    Count = 8
+
+    @staticmethod
+    def flip_vertical(bits):
+        # (x, y) -> (x, 7 - y): reverse the order of the rows, i.e. bytes.
+        return int.from_bytes(bits.to_bytes(8, 'little'), 'big')
+
+    @staticmethod
+    def mirror_horizontal(bits):
+        # (x, y) -> (7 - x, y): reverse the bits in each byte.
+        bits = ((bits >> 1) & 0x5555555555555555) | \
+            ((bits & 0x5555555555555555) << 1)
+        bits = ((bits >> 2) & 0x3333333333333333) | \
+            ((bits & 0x3333333333333333) << 2)
+        return ((bits >> 4) & 0x0f0f0f0f0f0f0f0f) | \
+            ((bits & 0x0f0f0f0f0f0f0f0f) << 4)
+
+    @staticmethod
+    def transpose(bits):
+        # (x, y) -> (y, x): swap the bits across the diagonal.
+        t = 0x0f0f0f0f00000000 & (bits ^ (bits << 28))
+        bits ^= t ^ (t >> 28)
+        t = 0x3333000033330000 & (bits ^ (bits << 14))
+        bits ^= t ^ (t >> 14)
+        t = 0x5500550055005500 & (bits ^ (bits << 7))
+        return bits ^ t ^ (t >> 7)
+
+    @staticmethod
+    def transform(bits, t):
+        '''
+        transform(bits, t)
+            Return the bitmask 'bits' transformed by the symmetry 't'.
+        '''
+        if t >= 6 or t == 1 or t == 3:
+            bits = Symmetry.transpose(bits)
+        if t in (1, 2, 4, 7):
+            bits = Symmetry.mirror_horizontal(bits)
+        if t in (2, 3, 5, 7):
+            bits = Symmetry.flip_vertical(bits)
+        return bits
+
+    @staticmethod
+    def get_all(bits):
+        '''
+        get_all(bits)
+            Return the tuple of 'bits' transformed by all the symmetries,
+            indexed by t.
+        '''
+        h = Symmetry.mirror_horizontal
+        v = Symmetry.flip_vertical
+        d = Symmetry.transpose(bits)
+        hb, hd = h(bits), h(d)
+        return (bits, hd, v(hb), v(d), hb, v(bits), d, v(hd))
+
+    @staticmethod
+    def transform_index(index, t):
+        '''
+        transform_index(index, t)
+            Return the bit index where the bit 'index' moves by the symmetry
+            't'.
+        '''
+        return Symmetry.Indexes[t][index]
+
+    @staticmethod
+    def get_inverse(t):
+        '''
+        get_inverse(t)
+            Return the symmetry to undo the symmetry 't'.
+        '''
+        # Only the rotations by 90 and 270 degrees are not self-inverse.
+        return {1: 3, 3: 1}.get(t, t)
+
+    @staticmethod
+    def canonicalize(first, second):
+        '''
+        canonicalize(first, second)
+            Return a tuple of (first', second', symmetries), where (first',
+            second') is the smallest of the pairs of the bitmasks transformed
+            by the same symmetry, and 'symmetries' is the list of the
+            symmetries which give it.
+        '''
+        best, symmetries = None, []
+        for t, pair in enumerate(
+                zip(Symmetry.get_all(first), Symmetry.get_all(second))):
+            if best is None or pair < best:
+                best, symmetries = pair, [t]
+            elif pair == best:
+                symmetries.append(t)
+        return (best[0], best[1], symmetries)
+
+    @staticmethod
+    def get_canonical_hash(white, black, side_to_move=None):
+        '''
+        get_canonical_hash(white, black, side_to_move=None)
+            Return a tuple of (key, t): the Zobrist key of the canonical form
+            of the position, which is the same for all the symmetric
+            positions, and the symmetry 't' which transforms the position to
+            the canonical form. The move on the canonical form is mapped back
+            by transform_index(index, get_inverse(t)).
+        '''
+        (white, black, symmetries) = Symmetry.canonicalize(white, black)
+        return (Zobrist.hash_bits(white, black, side_to_move), symmetries[0])
+
+    @staticmethod
+    def transform_board(board, t):
+        '''
+        transform_board(board, t)
+            Return a new board of the same class as 'board', whose stones and
+            side to move are those of 'board' transformed by the symmetry 't'.
+        '''
+        transformed = type(board)()
+        entire = [[Stone.Unset] * Board.Size for _ in range(Board.Size)]
+        for color in (Stone.White, Stone.Black):
+            bits = Symmetry.transform(board.get_bits(color), t)
+            while bits:
+                low = bits & -bits
+                index = low.bit_length() - 1
+                entire[index // Board.Size][index % Board.Size] = color
+                bits ^= low
+        transformed.set_entire(entire)
+        transformed.set_side_to_move(board.get_side_to_move())
+        return transformed
+
 
 class CPU:
     class Score:
@@ -259,13 +859,14 @@ class CPU:
             rival_color = Stone.get_rival_stone_color(color)
             board = reversi.get_board()
             for d in directions:
-                c = coord + d
-                while board.get_stone(c) == rival_color:
-                    c += d
-                while board.get_stone(c) == color:
-                    if CPU.is_corner(c):
+                ray = Reversi.Rays[coord][d]
+                i = 0
+                while i < len(ray) and board.get_stone(ray[i]) == rival_color:
+                    i += 1
+                while i < len(ray) and board.get_stone(ray[i]) == color:
+                    if CPU.is_corner(ray[i]):
                         return CPU.Score.CornerSide
-                    c += d
+                    i += 1
 
         # Check for * positions
         #  +--- ... ---+
@@ -288,6 +889,103 @@ class CPU:
         return False
 
 
+class BoardDiff:
+    '''
+    BoardDiff class is the change made by a move, given to the controller
+    at once so that a view or a client can apply it in one pass:
+
+        coord   ... the coord of the new stone
+        color   ... the color of the new stone
+        flipped ... the tuple of the coords of the reversed stones
+        counts  ... the numbers of stones after the move, indexed by
+                    Stone.White and Stone.Black
+        next    ... the color to move next, or None if the game is over
+        passed  ... the color which has to pass, or None
+        result  ... None while the game goes on; the winner, or
+                    Stone.Unset for a draw game, when it is over
+
+    BoardDiff objects are immutable.
+    '''
+
+    __slots__ = ('__coord', '__color', '__flipped', '__counts', '__next',
+                 '__passed', '__result')
+
+    def __init__(self, coord, color, flipped, counts, next_color,
+                 passed=None, result=None):
+        for (name, value) in (
+                ('coord', coord), ('color', color),
+                ('flipped', tuple(flipped)), ('counts', tuple(counts)),
+                ('next', next_color), ('passed', passed),
+                ('result', result)):
+            object.__setattr__(self, '_BoardDiff__' + name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('BoardDiff is immutable')
+
+    def __eq__(self, other):
+        if not isinstance(other, BoardDiff):
+            return NotImplemented
+        return self.__get_tuple() == other.__get_tuple()
+
+    def __hash__(self):
+        return hash(self.__get_tuple())
+
+    def __repr__(self):
+        return 'BoardDiff%r' % (self.__get_tuple(),)
+
+    def __get_tuple(self):
+        return (self.__coord, self.__color, self.__flipped, self.__counts,
+                self.__next, self.__passed, self.__result)
+
+    def get_coord(self):
+        return self.__coord
+
+    def get_color(self):
+        return self.__color
+
+    def get_flipped(self):
+        return self.__flipped
+
+    def get_changed_coords(self):
+        '''
+        get_changed_coords()
+            Return the tuple of the coords of all the stones of the color,
+            the new one first.
+        '''
+        return (self.__coord,) + self.__flipped
+
+    def get_counts(self):
+        return self.__counts
+
+    def get_next_color(self):
+        return self.__next
+
+    def get_passed(self):
+        return self.__passed
+
+    def get_result(self):
+        return self.__result
+
+    def is_game_over(self):
+        return self.__result is not None
+
+    def to_dict(self):
+        '''
+        to_dict()
+            Return the diff as a dict of JSON values, with the coords as
+            [x, y].
+        '''
+        return {
+            'coord': list(self.__coord.get()),
+            'color': self.__color,
+            'flipped': [list(c.get()) for c in self.__flipped],
+            'counts': list(self.__counts),
+            'next': self.__next,
+            'passed': self.__passed,
+            'result': self.__result,
+        }
+
+
 class Reversi:
     '''
     Reversi class provides reversi game related operations
@@ -307,21 +1005,28 @@ class Reversi:
         VsPlayer = 0
         VsCPU = 1
 
-    def __init__(self, controller):
-        self.__board = Board()
+    def __init__(self, controller, board_class=BitBoard):
+        '''
+        Reversi(controller, board_class=BitBoard)
+            `board_class` selects the board implementation, Board or
+            BitBoard.
+        '''
+        self.__board = board_class()
         self.__play_mode = Reversi.PlayMode.VsPlayer
+        self.__cpu = CPU
         self.__controller = controller
         self.init_state()
 
     def init_state(self):
         self.__player_color = Stone.Black
+        self.__last_diff = None
         self.__cpu_color = Stone.get_rival_stone_color(self.__player_color)
         self.__board.init_state()
 
         # Initialize board like this:
         #   o ... White stone
         #   x ... Black stone
-        #   * ... Cells surrounding stones
+        #   * ... Cells surrounding stones, called the frontier
         #      0 1 2 3 4 5 6 7  --> x
         #     +-+-+-+-+-+-+-+-+
         #    0| | | | | | | | |
@@ -348,22 +1053,33 @@ class Reversi:
         self.__board.set_stone(Coord(3, 4), Stone.Black)
         self.__board.set_stone(Coord(4, 3), Stone.Black)
 
-        surrounding_cells = [
-            Coord(2, 2),
-            Coord(2, 3),
-            Coord(2, 4),
-            Coord(2, 5),
-            Coord(3, 2),
-            Coord(3, 5),
-            Coord(4, 2),
-            Coord(4, 5),
-            Coord(5, 2),
-            Coord(5, 3),
-            Coord(5, 4),
-            Coord(5, 5),
-        ]
-        for c in surrounding_cells:
-            self.__board.set_stone(c, Stone.Surrounding)
+        self.__frontier_empty = None
+        self.get_frontier_mask()
+
+        # Stack of the moves applied to the board, to be undone by
+        # undo_move(). Each entry is a tuple of (coord, color, flips,
+        # frontier before the move).
+        self.__move_history = []
+
+    def get_frontier_mask(self):
+        '''
+        get_frontier_mask():
+            Return the bitmask of the frontier, the empty cells adjacent to
+            some stone. Only these cells can be puttable.
+
+            The frontier is updated incrementally when a stone is put. If
+            the board has been changed from outside, e.g. by set_entire(), it
+            is rebuilt from the board.
+        '''
+        empty = self.__board.get_empty_mask()
+        if empty != self.__frontier_empty:
+            occupied = BitBoard.FullMask ^ empty
+            self.__frontier = BitBoard.get_adjacent_mask(occupied) & empty
+            self.__frontier_empty = empty
+        return self.__frontier
+
+    def get_frontier_coords(self):
+        return BitBoard.bits_to_coords(self.get_frontier_mask())
 
     def get_sandwiched_stones_coords(self, coord, direction, color):
         '''
@@ -372,11 +1088,13 @@ class Reversi:
             of 'direction' from position 'coord'
             The position 'coord' must points a valid position.
         '''
+        return self.__get_sandwiched_stones_on_ray(
+                Reversi.Rays[coord][direction], color)
+
+    def __get_sandwiched_stones_on_ray(self, ray, color):
         rival_color = Stone.get_rival_stone_color(color)
-        p = coord
         coords = []
-        while True:
-            p += direction
+        for p in ray:
             s = self.__board.get_stone(p)
             if s == color:
                 return coords
@@ -384,11 +1102,12 @@ class Reversi:
                 coords.append(p)
             else:
                 return []
+        return []
 
     def get_all_sandwiched_stones_coords(self, coord, color):
         coords = []
-        for d in Reversi.EightDirections:
-            coords.extend(self.get_sandwiched_stones_coords(coord, d, color))
+        for ray in Reversi.Rays[coord].values():
+            coords.extend(self.__get_sandwiched_stones_on_ray(ray, color))
         return coords
 
     def can_put_here(self, coord, color):
@@ -396,12 +1115,32 @@ class Reversi:
         can_put_here(coord, color):
             Return TRUE if stone of 'color' can put on 'coord'
         '''
-        if self.__board.get_stone(coord) != Stone.Surrounding:
+        if not self.__board.is_valid_coord(coord):
             return False
-        for d in Reversi.EightDirections:
-            if len(self.get_sandwiched_stones_coords(coord, d, color)) > 0:
-                return True
-        return False
+        bit = BitBoard.coord_to_bit(coord)
+        if not (self.get_frontier_mask() & bit):
+            return False
+        rival_color = Stone.get_rival_stone_color(color)
+        flips = BitBoard.get_flips_mask(
+                self.__board.get_bits(color),
+                self.__board.get_bits(rival_color),
+                bit)
+        return flips != 0
+
+    def get_puttable_mask(self, color):
+        '''
+        get_puttable_mask(color):
+            Return the bitmask of all the cells where stone of 'color' can
+            put.
+        '''
+        rival_color = Stone.get_rival_stone_color(color)
+        frontier = self.get_frontier_mask()
+        if frontier == 0:
+            return 0
+        return BitBoard.get_moves_mask(
+                self.__board.get_bits(color),
+                self.__board.get_bits(rival_color),
+                frontier)
 
     def put_stone_color(self, coord, color):
         '''
@@ -411,30 +1150,106 @@ class Reversi:
             color is 'color' too.
 
             Also checks the number of white/black stones on the board, and
-            checks if either player wins.
+            checks if either player wins. The controller is given the change
+            as a BoardDiff, which is the only notification of the move: it
+            tells whether the rival has to pass and whether the game is over.
 
             Return True if put stone succeeded. Otherwise returns False.
         '''
-        if not self.can_put_here(coord, color):
+        flips = self.__apply_move(coord, color)
+        if flips == 0:
             # Cannot put here
             return False
 
-        # Put new stone
-        self.__board.set_stone(coord, color)
-        for d in Reversi.EightDirections:
-            if self.__board.get_stone(coord + d) == Stone.Unset:
-                self.__board.set_stone(coord + d, Stone.Surrounding)
+        # Tell View about changes on board
+        self.__last_diff = self.__make_diff(coord, color, flips)
+        self.__controller.request_apply_diff(self.__last_diff)
+        return True
 
-        # Reverse sandwiched stones
-        sandwiched_stones = self.get_all_sandwiched_stones_coords(coord, color)
-        for p in sandwiched_stones:
-            self.__board.set_stone(p, color)
+    def get_last_diff(self):
+        '''
+        get_last_diff():
+            Return the BoardDiff of the last move by put_stone_color(), or
+            None if there is none since the board was initialized or the
+            move was undone.
+        '''
+        return self.__last_diff
 
-        # Tell View about changes on board
-        self.__controller.request_update_stones([coord], color)
-        self.__controller.request_reverse_stones(sandwiched_stones)
+    def __make_diff(self, coord, color, flips):
+        rival_color = Stone.get_rival_stone_color(color)
+        (next_color, passed, result) = (rival_color, None, None)
+        if self.check_need_pass(rival_color):
+            if self.check_need_pass(color):
+                next_color = None
+                (_, result) = self.judge_which_player_wins(
+                        white=self.__board.get_white_stones_count(),
+                        black=self.__board.get_black_stones_count())
+            else:
+                (next_color, passed) = (color, rival_color)
+                self.__board.set_side_to_move(color)
+        return BoardDiff(
+                coord, color, BitBoard.bits_to_coords(flips),
+                self.__board.get_stones_counts(), next_color, passed, result)
+
+    def do_move(self, coord, color):
+        '''
+        do_move(coord, color):
+            Same as put_stone_color(), but the controller is not notified.
+            This is for looking ahead: the move can be reverted with
+            undo_move().
+
+            Return True if put stone succeeded. Otherwise returns False.
+        '''
+        return self.__apply_move(coord, color) != 0
+
+    def undo_move(self):
+        '''
+        undo_move():
+            Revert the last move applied by do_move() or put_stone_color().
+            Return False if there is no move to revert.
+
+            Note that the moves applied before the board is changed from
+            outside, e.g. by set_entire(), cannot be reverted correctly.
+        '''
+        if len(self.__move_history) == 0:
+            return False
+        self.__last_diff = None
+        (coord, color, flips, frontier) = self.__move_history.pop()
+        self.__board.remove_stone_bits(
+                color, BitBoard.coord_to_bit(coord), flips)
+        self.__board.set_side_to_move(color)
+        self.__frontier = frontier
+        self.__frontier_empty = self.__board.get_empty_mask()
         return True
 
+    def __apply_move(self, coord, color):
+        # Put stone and reverse sandwiched stones. Return the bitmask of the
+        # reversed stones, or 0 if the stone cannot be put.
+        if not self.__board.is_valid_coord(coord):
+            return 0
+        bit = BitBoard.coord_to_bit(coord)
+        frontier = self.get_frontier_mask()
+        if not (frontier & bit):
+            return 0
+        rival_color = Stone.get_rival_stone_color(color)
+        flips = BitBoard.get_flips_mask(
+                self.__board.get_bits(color),
+                self.__board.get_bits(rival_color),
+                bit)
+        if flips == 0:
+            return 0
+
+        self.__board.put_stone_bits(color, bit, flips)
+        self.__board.set_side_to_move(rival_color)
+        self.__move_history.append((coord, color, flips, frontier))
+
+        # The new stone leaves the frontier, and its empty neighbours join
+        # it.
+        empty = self.__board.get_empty_mask()
+        self.__frontier = (frontier | Reversi.NeighbourMasks[coord]) & empty
+        self.__frontier_empty = empty
+        return flips
+
     def put_stone(self, coord):
         '''
         put_stone(coord):
@@ -446,21 +1261,23 @@ class Reversi:
     def proceed_to_next(self):
         '''
         proceed_to_next():
-            Check if eigher player wins, and if so, finish the game.
-            Otherwise, go on to the next player's turn.
+            Go on to the next player's turn after the last move by
+            put_stone_color(). Nothing is done if the game is over.
 
-            If the next player can put nowhere, notify players that the next
-            player need pass, and continue the current player's turn.
+            The BoardDiff of the move tells whether the next player has to
+            pass, in which case the current player's turn continues. The
+            controller learns the pass and the end of the game from the
+            diff.
 
             Also, if the rival player is CPU, do the CPU's action, and return
             back to the current player's turn.
         '''
-
-        if self.check_either_player_wins():
+        diff = self.__last_diff
+        if diff is None or diff.is_game_over():
             return
 
         next_player = Stone.get_rival_stone_color(self.__player_color)
-        if self.pass_if_necessary(next_player):
+        if diff.get_passed() == next_player:
             return
 
         if self.get_play_mode() == Reversi.PlayMode.VsCPU:
@@ -468,15 +1285,19 @@ class Reversi:
                 # Start CPU's turn
                 self.__controller.request_notify_player_change(next_player)
                 self.put_stone_color(
-                        CPU.get_put_coord(self, next_player), next_player)
+                        self.__cpu.get_put_coord(self, next_player),
+                        next_player)
 
-                if self.check_either_player_wins():
+                # The board is initialized if the controller restarted the
+                # game on its end.
+                diff = self.__last_diff
+                if diff is None or diff.is_game_over():
                     return
 
                 # Back to the player's turn
                 self.__controller.request_notify_player_change(
                         self.__player_color)
-                if not self.pass_if_necessary(self.__player_color):
+                if diff.get_passed() != self.__player_color:
                     break
         else:
             self.__player_color = next_player
@@ -511,15 +1332,12 @@ class Reversi:
                 self.__controller.request_notify_player_wins(winner)
             return True
 
+        self.__board.set_side_to_move(Stone.get_rival_stone_color(color))
         self.__controller.request_notify_need_pass(color)
         return True
 
     def check_need_pass(self, color):
-        for x in range(Board.Size):
-            for y in range(Board.Size):
-                if self.can_put_here(Coord(x, y), color):
-                    return False
-        return True
+        return self.get_puttable_mask(color) == 0
 
     def check_either_player_wins(self):
         '''
@@ -562,13 +1380,7 @@ class Reversi:
     def get_puttable_coords(self, color=None):
         if color is None:
             color = self.get_player_color()
-        puttable_coords = []
-        for y in range(Board.Size):
-            for x in range(Board.Size):
-                c = Coord(x, y)
-                if self.can_put_here(c, color):
-                    puttable_coords.append(c)
-        return puttable_coords
+        return BitBoard.bits_to_coords(self.get_puttable_mask(color))
 
     def set_play_mode(self, mode):
         self.__play_mode = mode
@@ -576,6 +1388,18 @@ class Reversi:
     def get_play_mode(self):
         return self.__play_mode
 
+    def set_cpu(self, cpu):
+        '''
+        set_cpu(cpu):
+            Set the CPU player used in VsCPU mode. 'cpu' is anything which
+            has get_put_coord(reversi, color) like CPU, e.g. an instance of
+            search.SearchCPU.
+        '''
+        self.__cpu = cpu
+
+    def get_cpu(self):
+        return self.__cpu
+
     def get_player_color(self):
         return self.__player_color
 
@@ -584,3 +1408,44 @@ class Reversi:
 
     def get_cpu_color(self):
         return self.__cpu_color
+
+    @staticmethod
+    def build_rays():
+        '''
+        build_rays():
+            Return a table whose value `table[coord][direction]` is the tuple
+            of the cells from `coord` (exclusive) toward `direction`, clipped
+            to the board.
+        '''
+        rays = {}
+        for y in range(Board.Size):
+            for x in range(Board.Size):
+                coord = Coord(x, y)
+                rays[coord] = {}
+                for d in Reversi.EightDirections:
+                    ray = []
+                    c = coord + d
+                    while 0 <= c.x < Board.Size and 0 <= c.y < Board.Size:
+                        ray.append(c)
+                        c += d
+                    rays[coord][d] = tuple(ray)
+        return rays
+
+
+Zobrist._build_keys()
+
+# Indexes[t][index] ... bit index where the bit `index` moves by the symmetry
+#                       t.
+Symmetry.Indexes = [
+    [Symmetry.transform(1 << i, t).bit_length() - 1
+        for i in range(Board.Size ** 2)]
+    for t in range(Symmetry.Count)
+]
+
+# Rays[coord][direction] ... cells along the ray from `coord`.
+# NeighbourMasks[coord] ... bitmask of the cells adjacent to `coord`.
+Reversi.Rays = Reversi.build_rays()
+Reversi.NeighbourMasks = {
+    coord: BitBoard.get_adjacent_mask(BitBoard.coord_to_bit(coord))
+    for coord in Reversi.Rays
+}
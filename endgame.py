@@ -0,0 +1,189 @@
+from core import BitBoard
+
+
+class EndgameSolver:
+    '''
+    EndgameSolver class reads positions near the end of games out to the
+    end, and computes the exact final disc differential, or only whether the
+    player wins, loses or draws.
+
+    Like SearchCPU, the solver works on pairs of bitmasks (player, rival)
+    where 'player' is to move.
+    '''
+
+    class Mode:
+        Exact = 0
+        WinLossDraw = 1
+
+    Infinity = 100
+
+    # With this number of empty cells or fewer, moves are tried in the
+    # order of the cells, since sorting them costs more than it saves.
+    _FastestFirstEmpties = 6
+
+    # With this number of empty cells or fewer, the position is solved by
+    # trying the empty cells directly, without the move generator.
+    _FewEmpties = 3
+
+    # Call check_budget every this number of nodes.
+    _CheckInterval = 64
+
+    def __init__(self, check_budget=None):
+        '''
+        EndgameSolver(check_budget=None)
+            'check_budget' is called as check_budget(nodes) every some
+            nodes, where 'nodes' is the number of nodes searched since the
+            last call. It may raise an exception to abort the search.
+        '''
+        self.__check_budget = check_budget
+        self.__nodes = 0
+
+    def get_nodes(self):
+        return self.__nodes
+
+    def solve(self, player, rival, mode=Mode.Exact):
+        '''
+        solve(player, rival, mode=Mode.Exact)
+            Return the final disc differential for 'player' under perfect
+            play. In WinLossDraw mode, only the sign of the result is exact.
+        '''
+        return self.get_best_move(player, rival, mode)[1]
+
+    def get_best_move(self, player, rival, mode=Mode.Exact,
+                      root_moves=BitBoard.FullMask):
+        '''
+        get_best_move(player, rival, mode=Mode.Exact,
+                      root_moves=BitBoard.FullMask)
+            Return a tuple of (the bit index of the best move, score). Only
+            the moves in the bitmask 'root_moves' are considered. The index
+            is None if 'player' cannot put stone anywhere.
+        '''
+        self.__nodes = 0
+        if mode == EndgameSolver.Mode.WinLossDraw:
+            alpha, beta = -1, 1
+        else:
+            alpha, beta = -EndgameSolver.Infinity, EndgameSolver.Infinity
+
+        moves = BitBoard.get_moves_mask(player, rival)
+        if moves == 0:
+            return (None, self.__solve(player, rival, alpha, beta, False))
+        moves &= root_moves
+
+        best_move = None
+        for bit in self.__order_moves(player, rival, moves):
+            flips = BitBoard.get_flips_mask(player, rival, bit)
+            score = -self.__solve(
+                    rival ^ flips, player | bit | flips, -beta, -alpha, False)
+            if best_move is None or score > alpha:
+                best_move = bit.bit_length() - 1
+                alpha = max(alpha, score)
+                if alpha >= beta:
+                    break
+        return (best_move, alpha)
+
+    def __solve(self, player, rival, alpha, beta, passed):
+        self.__nodes += 1
+        if self.__check_budget is not None and \
+                self.__nodes % EndgameSolver._CheckInterval == 0:
+            self.__check_budget(EndgameSolver._CheckInterval)
+
+        empty = BitBoard.FullMask ^ (player | rival)
+        if empty & (empty - 1) == 0:
+            # At most one empty cell is left.
+            return EndgameSolver.__solve_last(player, rival, empty)
+        if BitBoard.popcount(empty) <= EndgameSolver._FewEmpties:
+            cells = []
+            while empty:
+                low = empty & -empty
+                cells.append(low)
+                empty ^= low
+            return EndgameSolver.__solve_few(
+                    player, rival, cells, alpha, beta, passed)
+
+        moves = BitBoard.get_moves_mask(player, rival)
+        if moves == 0:
+            if passed:
+                # Neither player can put stone: the game is over.
+                return BitBoard.popcount(player) - BitBoard.popcount(rival)
+            return -self.__solve(rival, player, -beta, -alpha, True)
+
+        best_score = -EndgameSolver.Infinity
+        for bit in self.__order_moves(player, rival, moves):
+            flips = BitBoard.get_flips_mask(player, rival, bit)
+            score = -self.__solve(
+                    rival ^ flips, player | bit | flips, -beta, -alpha, False)
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best_score
+
+    @staticmethod
+    def __solve_few(player, rival, cells, alpha, beta, passed):
+        # Solve the position with the few empty cells of the list 'cells'
+        # by trying to put stone on each of them.
+        best_score = -EndgameSolver.Infinity
+        for i, bit in enumerate(cells):
+            flips = BitBoard.get_flips_mask(player, rival, bit)
+            if flips == 0:
+                continue
+            rest = cells[:i] + cells[i + 1:]
+            (next_player, next_rival) = (rival ^ flips, player | bit | flips)
+            if len(rest) == 1:
+                score = -EndgameSolver.__solve_last(
+                        next_player, next_rival, rest[0])
+            else:
+                score = -EndgameSolver.__solve_few(
+                        next_player, next_rival, rest, -beta, -alpha, False)
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        if best_score > -EndgameSolver.Infinity:
+            return best_score
+        if passed:
+            # Neither player can put stone: the game is over.
+            return BitBoard.popcount(player) - BitBoard.popcount(rival)
+        return -EndgameSolver.__solve_few(
+                rival, player, cells, -beta, -alpha, True)
+
+    @staticmethod
+    def __solve_last(player, rival, bit):
+        # Solve the position with the last empty cell 'bit' directly.
+        popcount = BitBoard.popcount
+        if bit == 0:
+            return popcount(player) - popcount(rival)
+        flips = BitBoard.get_flips_mask(player, rival, bit)
+        if flips:
+            n = popcount(flips)
+            return popcount(player) - popcount(rival) + 2 * n + 1
+        flips = BitBoard.get_flips_mask(rival, player, bit)
+        if flips:
+            n = popcount(flips)
+            return popcount(player) - popcount(rival) - 2 * n - 1
+        return popcount(player) - popcount(rival)
+
+    def __order_moves(self, player, rival, moves):
+        # Return the bits of 'moves'. When enough cells are empty, they are
+        # sorted fastest-first: the moves leaving the rival fewer choices
+        # come first.
+        bits = []
+        while moves:
+            low = moves & -moves
+            bits.append(low)
+            moves ^= low
+        empties = BitBoard.popcount(BitBoard.FullMask ^ (player | rival))
+        if len(bits) > 1 and empties > EndgameSolver._FastestFirstEmpties:
+            bits.sort(key=lambda bit: EndgameSolver.__get_rival_mobility(
+                    player, rival, bit))
+        return bits
+
+    @staticmethod
+    def __get_rival_mobility(player, rival, bit):
+        flips = BitBoard.get_flips_mask(player, rival, bit)
+        return BitBoard.popcount(BitBoard.get_moves_mask(
+                rival ^ flips, player | bit | flips))
@@ -0,0 +1,214 @@
+import math
+import random
+import time
+from core import BitBoard, Stone
+
+
+class Node:
+    '''
+    Node class is a node of the game tree of MCTSCPU. It holds the position
+    as bitmasks, where 'player' is to move, and the statistics of the
+    playouts through the node. 'wins' counts for the player who made the
+    move to reach the node.
+    '''
+
+    __slots__ = (
+        'player', 'rival', 'move', 'parent', 'children', 'untried',
+        'visits', 'wins',
+    )
+
+    # The move bit to pass.
+    Pass = 0
+
+    def __init__(self, player, rival, move=None, parent=None):
+        self.player, self.rival = player, rival
+        self.move, self.parent = move, parent
+        self.children = []
+        self.visits, self.wins = 0, 0.0
+
+        moves = BitBoard.get_moves_mask(player, rival)
+        self.untried = []
+        while moves:
+            low = moves & -moves
+            self.untried.append(low)
+            moves ^= low
+        if len(self.untried) == 0 and \
+                BitBoard.get_moves_mask(rival, player) != 0:
+            self.untried.append(Node.Pass)
+
+    def expand(self, bit):
+        '''
+        expand(bit)
+            Create the child after the move 'bit' and return it.
+        '''
+        self.untried.remove(bit)
+        if bit == Node.Pass:
+            child = Node(self.rival, self.player, None, self)
+        else:
+            flips = BitBoard.get_flips_mask(self.player, self.rival, bit)
+            child = Node(
+                    self.rival ^ flips, self.player | bit | flips,
+                    bit.bit_length() - 1, self)
+        self.children.append(child)
+        return child
+
+    def select_child(self, exploration):
+        # Select the child of the maximum UCB1 value.
+        log_visits = math.log(self.visits)
+        return max(
+                self.children,
+                key=lambda c: c.wins / c.visits +
+                exploration * math.sqrt(log_visits / c.visits))
+
+
+class MCTSCPU:
+    '''
+    MCTSCPU class chooses moves by Monte Carlo tree search with UCT. It can
+    be used in place of CPU:
+
+        reversi.set_cpu(MCTSCPU(time_limit=0.5))
+
+    Playouts play random moves on bitmasks to the end of the game, so they
+    neither touch the board of the game nor create Coord objects. The
+    subtree of the position actually reached is reused on the next move.
+    '''
+
+    Exploration = math.sqrt(2)
+
+    def __init__(self, time_limit=1.0, iterations=None, seed=None):
+        '''
+        MCTSCPU(time_limit=1.0, iterations=None, seed=None)
+            Run playouts until 'time_limit' seconds pass or 'iterations'
+            playouts are done. None means no limit, but at least one of them
+            must be given.
+        '''
+        if time_limit is None and iterations is None:
+            raise BaseException('Either time_limit or iterations is required')
+        self.__time_limit = time_limit
+        self.__iterations = iterations
+        self.__random = random.Random(seed)
+        self.__root = None
+        self.__stats = {}
+
+    def get_last_stats(self):
+        '''
+        get_last_stats()
+            Return a dict of statistics of the last get_put_coord() call:
+            the number of playouts, elapsed seconds, playouts per second and
+            the number of playouts reused from the previous search.
+        '''
+        return dict(self.__stats)
+
+    def get_put_coord(self, reversi, color):
+        '''
+        get_put_coord(reversi, color)
+            Return a coord to put stone. This function assumes that `color`
+            player can put stone at least one place.
+        '''
+        board = reversi.get_board()
+        rival_color = Stone.get_rival_stone_color(color)
+        index = self.search(board.get_bits(color), board.get_bits(rival_color))
+        return BitBoard.index_to_coord(index)
+
+    def search(self, player, rival):
+        '''
+        search(player, rival)
+            Search the position where 'player' is to move, and return the bit
+            index of the best move.
+        '''
+        start = time.perf_counter()
+        root = self.__find_reusable_root(player, rival)
+        if root is None:
+            root = Node(player, rival)
+        root.parent = None
+        reused = root.visits
+
+        deadline = None
+        if self.__time_limit is not None:
+            deadline = start + self.__time_limit
+        playouts = 0
+        while self.__iterations is None or playouts < self.__iterations:
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            self.__run_iteration(root)
+            playouts += 1
+
+        elapsed = time.perf_counter() - start
+        self.__stats = {
+            'playouts': playouts,
+            'time': elapsed,
+            'playouts_per_sec': playouts / elapsed if elapsed > 0 else 0,
+            'reused': reused,
+        }
+
+        if len(root.children) == 0:
+            # No playout has been done.
+            root.expand(root.untried[0])
+        best = max(root.children, key=lambda c: c.visits)
+        self.__root = best
+        return best.move
+
+    def __find_reusable_root(self, player, rival):
+        # The position to search now is usually a child of the move chosen
+        # last time, that is the move of the rival.
+        if self.__root is None:
+            return None
+        for node in [self.__root] + self.__root.children:
+            if node.player == player and node.rival == rival:
+                return node
+        return None
+
+    def __run_iteration(self, root):
+        # Selection
+        node = root
+        while len(node.untried) == 0 and len(node.children) > 0:
+            node = node.select_child(MCTSCPU.Exploration)
+
+        # Expansion
+        if len(node.untried) > 0:
+            node = node.expand(self.__random.choice(node.untried))
+
+        # Simulation
+        diff = self.playout(node.player, node.rival)
+
+        # Backpropagation
+        while node is not None:
+            node.visits += 1
+            # 'diff' is for the player to move at the node, and 'wins' is for
+            # the other.
+            if diff < 0:
+                node.wins += 1
+            elif diff == 0:
+                node.wins += 0.5
+            diff = -diff
+            node = node.parent
+
+    def playout(self, player, rival):
+        '''
+        playout(player, rival)
+            Play random moves from the position to the end of the game, and
+            return the final disc differential for 'player'.
+        '''
+        randrange = self.__random.randrange
+        get_moves_mask = BitBoard.get_moves_mask
+        get_flips_mask = BitBoard.get_flips_mask
+        sign = 1
+        passed = False
+        while True:
+            moves = get_moves_mask(player, rival)
+            if moves == 0:
+                if passed:
+                    break
+                passed = True
+            else:
+                passed = False
+                # Pick one of the moves at random.
+                for _ in range(randrange(BitBoard.popcount(moves))):
+                    moves &= moves - 1
+                bit = moves & -moves
+                flips = get_flips_mask(player, rival, bit)
+                player |= bit | flips
+                rival ^= flips
+            player, rival = rival, player
+            sign = -sign
+        return sign * (BitBoard.popcount(player) - BitBoard.popcount(rival))
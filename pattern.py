@@ -0,0 +1,284 @@
+from core import Stone, CPU
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class PatternEvaluator:
+    '''
+    PatternEvaluator class evaluates positions by patterns: lines of cells
+    such as rows, columns, diagonals, edges with X-squares and corner
+    regions. Each instance of a pattern reads its cells as a base-3 number
+    (empty 0, own stone 1, rival stone 2), and the score is the sum of the
+    weights of those numbers. The instances of a pattern type obtained by
+    rotating the board share one table of weights.
+
+    The weights are NumPy arrays, so numpy is required to use this class.
+    It can be given to SearchCPU as the evaluator:
+
+        SearchCPU(evaluator=PatternEvaluator('weights.npz'))
+
+    Then SearchCPU calls set_position(), apply_move() and undo_move() so that
+    the indexes are updated only for the cells changed by each move.
+    '''
+
+    # Cells (x, y) of the base instance of each pattern type. The other
+    # instances are obtained by rotating the base one.
+    Types = {
+        'row1': [(x, 1) for x in range(8)],
+        'row2': [(x, 2) for x in range(8)],
+        'row3': [(x, 3) for x in range(8)],
+        'diag8': [(i, i) for i in range(8)],
+        'diag7': [(i, i + 1) for i in range(7)],
+        'diag6': [(i, i + 2) for i in range(6)],
+        'diag5': [(i, i + 3) for i in range(5)],
+        'diag4': [(i, i + 4) for i in range(4)],
+        'edge_x': [(x, 0) for x in range(8)] + [(1, 1), (6, 1)],
+        'corner3x3': [(x, y) for y in range(3) for x in range(3)],
+    }
+
+    _OwnDigit = 1
+    _RivalDigit = 2
+
+    def __init__(self, weights=None):
+        '''
+        PatternEvaluator(weights=None)
+            'weights' is the path of a file saved by save_weights(), or a
+            dict from the names of PatternEvaluator.Types to arrays of 3**n
+            weights, where n is the number of the cells of the pattern.
+            By default, the weights are built from the square classes of
+            CPU.Score.
+        '''
+        if np is None:
+            raise BaseException('PatternEvaluator requires numpy')
+        if weights is None:
+            weights = PatternEvaluator.get_default_weights()
+        elif isinstance(weights, str):
+            weights = PatternEvaluator.load_weights(weights)
+        self.set_weights(weights)
+        self.set_position(0, 0, Stone.Black)
+
+    @staticmethod
+    def build_instances():
+        '''
+        build_instances()
+            Return a list of (type name, list of bit indexes) of all the
+            pattern instances.
+        '''
+        instances = []
+        for name, cells in PatternEvaluator.Types.items():
+            seen = []
+            for _ in range(4):
+                indexes = [y * 8 + x for (x, y) in cells]
+                if set(indexes) not in seen:
+                    seen.append(set(indexes))
+                    instances.append((name, indexes))
+                # Rotate by 90 degrees.
+                cells = [(7 - y, x) for (x, y) in cells]
+        return instances
+
+    @staticmethod
+    def get_default_weights():
+        '''
+        get_default_weights()
+            Return weights which sum up to the square classes of CPU.Score:
+            a corner scores Corner, and so on. The score of each cell is
+            divided among the instances covering the cell.
+        '''
+        instances = PatternEvaluator.build_instances()
+        covers = [0] * 64
+        for (_, indexes) in instances:
+            for index in indexes:
+                covers[index] += 1
+
+        weights = {}
+        for (name, indexes) in instances:
+            if name in weights:
+                continue
+            table = np.zeros(3 ** len(indexes))
+            power = 1
+            for index in indexes:
+                value = PatternEvaluator.__get_square_score(index) / \
+                    covers[index]
+                digits = np.arange(len(table)) // power % 3
+                table += np.where(
+                        digits == PatternEvaluator._OwnDigit, value,
+                        np.where(
+                            digits == PatternEvaluator._RivalDigit,
+                            -value, 0))
+                power *= 3
+            weights[name] = table
+        return weights
+
+    @staticmethod
+    def __get_square_score(index):
+        bit = 1 << index
+        if bit & 0x8100000000000081:
+            return CPU.Score.Corner
+        elif bit & 0x42c300000000c342:
+            return CPU.Score.AroundCorner
+        return CPU.Score.Normal
+
+    @staticmethod
+    def load_weights(path):
+        '''
+        load_weights(path)
+            Load the weights saved by save_weights() and return them as a
+            dict.
+        '''
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+
+    def save_weights(self, path):
+        '''
+        save_weights(path)
+            Save the weights to 'path' in the .npz format of NumPy.
+        '''
+        np.savez(path, **self.get_weights())
+
+    def get_weights(self):
+        '''
+        get_weights()
+            Return a dict from the names of the pattern types to copies of
+            their weights.
+        '''
+        return {
+            name: self.__weights[offset:offset + 3 ** len(cells)].copy()
+            for name, (offset, cells) in self.__type_offsets.items()
+        }
+
+    def set_weights(self, weights):
+        '''
+        set_weights(weights)
+            Set the weights from a dict of the names of the pattern types to
+            arrays. Every type of PatternEvaluator.Types is required.
+        '''
+        self.__type_offsets = {}
+        tables = []
+        offset = 0
+        for name, cells in PatternEvaluator.Types.items():
+            if name not in weights:
+                raise BaseException('No weights for pattern %s' % name)
+            table = np.asarray(weights[name], dtype=np.float64)
+            if table.shape != (3 ** len(cells),):
+                raise BaseException(
+                        'Weights for pattern %s must have shape (%d,)'
+                        % (name, 3 ** len(cells)))
+            self.__type_offsets[name] = (offset, cells)
+            tables.append(table)
+            offset += len(table)
+        self.__weights = np.concatenate(tables)
+
+        instances = PatternEvaluator.build_instances()
+        self.__offsets = np.array(
+                [self.__type_offsets[name][0] for (name, _) in instances],
+                dtype=np.int64)
+        self.__square_patterns = [[] for _ in range(64)]
+        self.__square_powers = [[] for _ in range(64)]
+        for i, (_, indexes) in enumerate(instances):
+            for k, index in enumerate(indexes):
+                self.__square_patterns[index].append(i)
+                self.__square_powers[index].append(3 ** k)
+        self.__square_patterns = [
+            np.array(p, dtype=np.int64) for p in self.__square_patterns
+        ]
+        self.__square_powers = [
+            np.array(p, dtype=np.int64) for p in self.__square_powers
+        ]
+
+    def get_indexes(self, player, rival):
+        '''
+        get_indexes(player, rival)
+            Return the array of the pattern indexes of the position, read
+            from the side of 'player'.
+        '''
+        indexes = np.zeros(len(self.__offsets), dtype=np.int64)
+        for bits, digit in ((player, PatternEvaluator._OwnDigit),
+                            (rival, PatternEvaluator._RivalDigit)):
+            while bits:
+                low = bits & -bits
+                square = low.bit_length() - 1
+                indexes[self.__square_patterns[square]] += \
+                    digit * self.__square_powers[square]
+                bits ^= low
+        return indexes
+
+    def set_position(self, player, rival, color):
+        '''
+        set_position(player, rival, color)
+            Set the position where 'player' of 'color' is to move, and compute
+            the indexes from scratch. It also clears the stack of moves.
+        '''
+        rival_color = Stone.get_rival_stone_color(color)
+        self.__bits = [0, 0]
+        self.__bits[color], self.__bits[rival_color] = player, rival
+        self.__indexes = [None, None]
+        self.__indexes[color] = self.get_indexes(player, rival)
+        self.__indexes[rival_color] = self.get_indexes(rival, player)
+        self.__stack = []
+
+    def apply_move(self, color, bit, flips):
+        '''
+        apply_move(color, bit, flips)
+            Put the stone of 'color' on 'bit' and flip the stones of the
+            bitmask 'flips', updating the indexes of the patterns covering
+            those cells only.
+        '''
+        rival_color = Stone.get_rival_stone_color(color)
+        self.__stack.append((list(self.__bits), list(self.__indexes)))
+        own = self.__indexes[color].copy()
+        other = self.__indexes[rival_color].copy()
+
+        square = bit.bit_length() - 1
+        patterns = self.__square_patterns[square]
+        powers = self.__square_powers[square]
+        own[patterns] += PatternEvaluator._OwnDigit * powers
+        other[patterns] += PatternEvaluator._RivalDigit * powers
+
+        # A flipped cell turns from a rival stone (2) to an own stone (1)
+        # for 'color', and the other way round for the rival.
+        bits = flips
+        while bits:
+            low = bits & -bits
+            square = low.bit_length() - 1
+            patterns = self.__square_patterns[square]
+            powers = self.__square_powers[square]
+            own[patterns] -= powers
+            other[patterns] += powers
+            bits ^= low
+
+        self.__bits[color] |= bit | flips
+        self.__bits[rival_color] ^= flips
+        self.__indexes[color], self.__indexes[rival_color] = own, other
+
+    def undo_move(self):
+        '''
+        undo_move()
+            Restore the position before the last apply_move().
+        '''
+        (self.__bits, self.__indexes) = self.__stack.pop()
+
+    def evaluate_indexes(self, indexes):
+        '''
+        evaluate_indexes(indexes)
+            Return the sum of the weights of the pattern indexes.
+        '''
+        return float(self.__weights[self.__offsets + indexes].sum())
+
+    def __call__(self, player, rival):
+        '''
+        evaluator(player, rival)
+            Return the score of the position for 'player'. The indexes kept
+            by apply_move() are used if the position is the current one, or
+            they are computed from scratch.
+        '''
+        for color in (Stone.White, Stone.Black):
+            if self.__bits[color] == player and \
+                    self.__bits[Stone.get_rival_stone_color(color)] == rival:
+                indexes = self.__indexes[color]
+                break
+        else:
+            indexes = self.get_indexes(player, rival)
+        return int(round(self.evaluate_indexes(indexes)))
@@ -0,0 +1,177 @@
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from core import BitBoard, Stone
+from controller import HeadlessController
+
+
+class Perft:
+    '''
+    Perft class counts the leaf positions of the game tree to a fixed depth.
+    The counts check the move generator against known values, and the speed
+    of counting measures it.
+
+    A pass is a ply as in Reversi.pass_if_necessary(): when the player to
+    move can put nowhere but the rival can, the turn goes to the rival. A
+    finished game is a leaf even if it is above the depth.
+    '''
+
+    @staticmethod
+    def count(player, rival, depth):
+        '''
+        count(player, rival, depth)
+            Return the number of the leaves 'depth' plies from the position
+            where 'player' is to move.
+        '''
+        if depth == 0:
+            return 1
+        moves = BitBoard.get_moves_mask(player, rival)
+        if moves == 0:
+            if BitBoard.get_moves_mask(rival, player) == 0:
+                return 1
+            return Perft.count(rival, player, depth - 1)
+        if depth == 1:
+            return BitBoard.popcount(moves)
+
+        nodes = 0
+        while moves:
+            bit = moves & -moves
+            flips = BitBoard.get_flips_mask(player, rival, bit)
+            nodes += Perft.count(
+                    rival ^ flips, player | bit | flips, depth - 1)
+            moves ^= bit
+        return nodes
+
+    @staticmethod
+    def count_reversi(reversi, color, depth):
+        '''
+        count_reversi(reversi, color, depth)
+            Same as count(), but plays the moves on 'reversi' by
+            get_puttable_coords(), do_move() and undo_move(). This is slow,
+            and is for checking that the fast count() agrees with Reversi.
+        '''
+        if depth == 0:
+            return 1
+        rival_color = Stone.get_rival_stone_color(color)
+        coords = reversi.get_puttable_coords(color)
+        if len(coords) == 0:
+            if len(reversi.get_puttable_coords(rival_color)) == 0:
+                return 1
+            return Perft.count_reversi(reversi, rival_color, depth - 1)
+
+        nodes = 0
+        for coord in coords:
+            if not reversi.do_move(coord, color):
+                raise BaseException('Puttable coord %s is rejected' % coord)
+            nodes += Perft.count_reversi(reversi, rival_color, depth - 1)
+            reversi.undo_move()
+        return nodes
+
+    @staticmethod
+    def get_children(player, rival):
+        '''
+        get_children(player, rival)
+            Return the list of (bit index of the move, player, rival) of the
+            positions after each move. The index is None for a pass, and the
+            list is empty if the game is over.
+        '''
+        children = []
+        moves = BitBoard.get_moves_mask(player, rival)
+        if moves == 0:
+            if BitBoard.get_moves_mask(rival, player) != 0:
+                children.append((None, rival, player))
+        while moves:
+            bit = moves & -moves
+            flips = BitBoard.get_flips_mask(player, rival, bit)
+            children.append((
+                bit.bit_length() - 1, rival ^ flips, player | bit | flips))
+            moves ^= bit
+        return children
+
+    @staticmethod
+    def divide(player, rival, depth, workers=1):
+        '''
+        divide(player, rival, depth, workers=1)
+            Return the list of (bit index of the root move, count) sorted by
+            the index. The index is None for a pass. With 'workers' more
+            than 1, the subtrees two plies below the root are counted in
+            that many processes, so that there are enough tasks to share.
+        '''
+        if depth == 0:
+            return []
+        children = Perft.get_children(player, rival)
+        if workers <= 1 or depth <= 2:
+            return [(index, Perft.count(p, r, depth - 1))
+                    for (index, p, r) in children]
+
+        # Tasks of (number of the root move, position two plies below).
+        tasks = []
+        for i, (_, p, r) in enumerate(children):
+            grandchildren = Perft.get_children(p, r)
+            if len(grandchildren) == 0:
+                tasks.append((i, (p, r, 0)))
+            for (_, gp, gr) in grandchildren:
+                tasks.append((i, (gp, gr, depth - 2)))
+        counts = [0] * len(children)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for (i, _), n in zip(tasks, executor.map(
+                    Perft.count_with_args, [task for (_, task) in tasks])):
+                counts[i] += n
+        return [(index, n) for ((index, _, _), n) in zip(children, counts)]
+
+    @staticmethod
+    def count_with_args(args):
+        return Perft.count(*args)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+            description='Count the leaves of the game tree to a depth.')
+    parser.add_argument('depth', type=int)
+    parser.add_argument(
+            '--board',
+            help='file of 8 lines of the board, "x" for black, "o" for white '
+            'and "." for empty; the initial position by default')
+    parser.add_argument(
+            '--color', choices=('black', 'white'), default='black',
+            help='color to move')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument(
+            '--check', action='store_true',
+            help='also count through Reversi and compare the counts')
+    args = parser.parse_args(argv)
+
+    reversi = HeadlessController().get_reversi()
+    if args.board:
+        with open(args.board) as f:
+            reversi.get_board().set_entire([
+                [Stone.char_to_stone(c) for c in line.strip()]
+                for line in f if line.strip()
+            ])
+    color = Stone.Black if args.color == 'black' else Stone.White
+    board = reversi.get_board()
+    player = board.get_bits(color)
+    rival = board.get_bits(Stone.get_rival_stone_color(color))
+
+    start = time.perf_counter()
+    divided = Perft.divide(player, rival, args.depth, args.workers)
+    elapsed = time.perf_counter() - start
+    for (index, n) in divided:
+        move = 'pass' if index is None else str(BitBoard.index_to_coord(index))
+        print('%-8s %d' % (move, n))
+    nodes = sum(n for (_, n) in divided) if divided else 1
+    print('nodes %d  time %.3f s  %.0f nodes/s' % (
+        nodes, elapsed, nodes / elapsed if elapsed > 0 else 0))
+
+    if args.check:
+        expected = Perft.count_reversi(reversi, color, args.depth)
+        if expected != nodes:
+            print('MISMATCH: Reversi counts %d' % expected)
+            return 1
+        print('Reversi agrees')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
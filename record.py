@@ -0,0 +1,221 @@
+import struct
+from core import BitBoard, Board, Reversi, Stone
+from controller import HeadlessController
+
+
+class RecordError(BaseException):
+    def __init__(self, message):
+        self.__message = message
+
+    def __str__(self):
+        return self.__message
+
+
+class GameRecord:
+    '''
+    GameRecord class holds the moves of a game played from the initial
+    position. A move is the bit index of the cell, or GameRecord.Pass.
+    '''
+
+    Pass = Board.Size ** 2
+
+    def __init__(self, moves, disc_diff=None):
+        '''
+        GameRecord(moves, disc_diff=None)
+            Make a record of 'moves'. Unless the disc differential after the
+            moves is given, the moves are played to check that they are
+            legal, passes included, and RecordError is raised for an illegal
+            move.
+        '''
+        self.__moves = bytes(moves)
+        if disc_diff is not None:
+            self.__diff = disc_diff
+            return
+        black, white = 0x0000000810000000, 0x0000001008000000
+        player, rival, color = black, white, Stone.Black
+        for move in self.__moves:
+            if move == GameRecord.Pass:
+                if BitBoard.get_moves_mask(player, rival) != 0:
+                    raise RecordError('Pass while a move is possible')
+            else:
+                bit = 1 << move
+                flips = BitBoard.get_flips_mask(player, rival, bit)
+                if flips == 0:
+                    raise RecordError('Illegal move %d' % move)
+                player, rival = player | bit | flips, rival ^ flips
+            player, rival = rival, player
+            color = Stone.get_rival_stone_color(color)
+        (white, black) = (player, rival) if color == Stone.White else \
+            (rival, player)
+        self.__diff = BitBoard.popcount(black) - BitBoard.popcount(white)
+
+    @staticmethod
+    def from_colored_moves(coords, colors):
+        '''
+        from_colored_moves(coords, colors)
+            Make a record from the coords of the moves and the colors of
+            their players, e.g. the 'moves' and 'colors' of the result of
+            Simulator.play_game(). Passes are inserted where the same color
+            moves twice in a row.
+        '''
+        moves = []
+        color = Stone.Black
+        for coord, moved in zip(coords, colors):
+            if moved != color:
+                moves.append(GameRecord.Pass)
+            (x, y) = coord.get() if hasattr(coord, 'get') else coord
+            moves.append(y * Board.Size + x)
+            color = Stone.get_rival_stone_color(moved)
+        return GameRecord(moves)
+
+    def __eq__(self, other):
+        if not isinstance(other, GameRecord):
+            return NotImplemented
+        return self.__moves == other.__moves
+
+    def __len__(self):
+        return len(self.__moves)
+
+    def get_moves(self):
+        return list(self.__moves)
+
+    def get_bytes(self):
+        return self.__moves
+
+    def get_disc_diff(self):
+        '''
+        get_disc_diff()
+            Return the number of black stones minus white stones after the
+            last move.
+        '''
+        return self.__diff
+
+    def replay(self, controller=None):
+        '''
+        replay(controller=None)
+            Play the moves on a new Reversi, and yield a tuple of (reversi,
+            coord, color) after each move, where coord is None for a pass.
+            The same Reversi is yielded each time, and moves on lazily.
+            Without 'controller', a HeadlessController is used.
+
+            The controller learns each move and pass once, from the BoardDiff
+            of the move. Records read with their disc differential are not
+            checked beforehand, so RecordError is raised when a move turns
+            out to be illegal.
+        '''
+        if controller is None:
+            reversi = HeadlessController().get_reversi()
+        else:
+            reversi = Reversi(controller)
+        color = Stone.Black
+        for move in self.__moves:
+            if move == GameRecord.Pass:
+                # The diff of the last move already reported the pass.
+                diff = reversi.get_last_diff()
+                if diff is None or diff.get_passed() != color:
+                    raise RecordError('Pass while a move is possible')
+                coord = None
+            else:
+                coord = BitBoard.index_to_coord(move)
+                if not reversi.put_stone_color(coord, color):
+                    raise RecordError('Illegal move %d' % move)
+            yield (reversi, coord, color)
+            color = Stone.get_rival_stone_color(color)
+
+
+class RecordWriter:
+    '''
+    RecordWriter class appends game records to a file. The file is a header
+    followed by the records, each of which is a header and one byte per
+    move:
+
+        file header   ... magic (4 bytes), version (2)
+        record header ... number of moves (1), disc differential of black (1)
+        moves         ... bit index of the cell, or 64 for a pass
+
+    Records are written as they come, so the file is never loaded.
+    '''
+
+    Magic = b'RVGR'
+    Version = 1
+    FileHeader = struct.Struct('<4sH')
+    RecordHeader = struct.Struct('<Bb')
+
+    def __init__(self, path):
+        '''
+        RecordWriter(path)
+            Open 'path' to append records. The file is created if it does
+            not exist.
+        '''
+        self.__file = open(path, 'ab')
+        if self.__file.tell() == 0:
+            self.__file.write(RecordWriter.FileHeader.pack(
+                    RecordWriter.Magic, RecordWriter.Version))
+        else:
+            try:
+                RecordReader.check_header(path)
+            except RecordError:
+                self.__file.close()
+                raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.__file.close()
+
+    def write(self, record):
+        '''
+        write(record)
+            Append a GameRecord, or a list of moves to make one of.
+        '''
+        if not isinstance(record, GameRecord):
+            record = GameRecord(record)
+        self.__file.write(RecordWriter.RecordHeader.pack(
+                len(record), record.get_disc_diff()))
+        self.__file.write(record.get_bytes())
+
+
+class RecordReader:
+    '''
+    RecordReader class reads the records written by RecordWriter one by one:
+
+        for record in RecordReader('games.rec'):
+            for (reversi, coord, color) in record.replay():
+                ...
+    '''
+
+    def __init__(self, path):
+        self.__path = path
+
+    @staticmethod
+    def check_header(path):
+        with open(path, 'rb') as f:
+            RecordReader.__read_header(f, path)
+
+    @staticmethod
+    def __read_header(f, path):
+        header = f.read(RecordWriter.FileHeader.size)
+        if len(header) != RecordWriter.FileHeader.size or \
+                RecordWriter.FileHeader.unpack(header) != \
+                (RecordWriter.Magic, RecordWriter.Version):
+            raise RecordError('Not a game record file: %s' % path)
+
+    def __iter__(self):
+        with open(self.__path, 'rb') as f:
+            RecordReader.__read_header(f, self.__path)
+            size = RecordWriter.RecordHeader.size
+            while True:
+                header = f.read(size)
+                if len(header) == 0:
+                    return
+                if len(header) != size:
+                    raise RecordError('Truncated record: %s' % self.__path)
+                (count, diff) = RecordWriter.RecordHeader.unpack(header)
+                moves = f.read(count)
+                if len(moves) != count:
+                    raise RecordError('Truncated record: %s' % self.__path)
+                yield GameRecord(moves, diff)
@@ -0,0 +1,553 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from core import BitBoard, Stone, CPU, Zobrist
+from transposition import TranspositionTable
+from endgame import EndgameSolver
+
+
+class SearchTimeout(BaseException):
+    def __str__(self):
+        return 'search budget exhausted'
+
+
+class MoveOrderer:
+    '''
+    MoveOrderer class decides the order to search moves in. Moves are tried
+    in this order:
+
+        1. the best move stored in the transposition table
+        2. the killer moves, which caused cutoffs at the same ply
+        3. the others, by the history score, which grows each time the move
+           causes a cutoff, and then by the square classes of CPU.Score
+    '''
+
+    KillersPerPly = 2
+
+    # Square classes of CPU.Score for each bit index. CornerSide depends on
+    # the stones around, so those cells are Normal here.
+    SquareScores = [
+        CPU.Score.Corner if (1 << i) & 0x8100000000000081 else
+        CPU.Score.AroundCorner if (1 << i) & 0x42c300000000c342 else
+        CPU.Score.Normal
+        for i in range(BitBoard.FullMask.bit_length())
+    ]
+
+    def __init__(self, max_ply=64):
+        self.__max_ply = max_ply
+        self.clear()
+
+    def clear(self):
+        self.__killers = [
+            [TranspositionTable.NoMove] * MoveOrderer.KillersPerPly
+            for _ in range(self.__max_ply)
+        ]
+        self.__history = [
+            [0] * len(MoveOrderer.SquareScores)
+            for _ in (Stone.White, Stone.Black)
+        ]
+
+    def age(self):
+        '''
+        age()
+            Halve the history scores and forget the killer moves. Call this
+            between searches so that old statistics fade out.
+        '''
+        for history in self.__history:
+            for i in range(len(history)):
+                history[i] >>= 1
+        for killers in self.__killers:
+            for i in range(len(killers)):
+                killers[i] = TranspositionTable.NoMove
+
+    def order(self, moves, ply, color, first=TranspositionTable.NoMove):
+        '''
+        order(moves, ply, color, first=TranspositionTable.NoMove)
+            Return the bit indexes of 'moves', the moves of 'color' at 'ply'
+            from the root, sorted best first. 'first' is the move to try
+            first, usually the best move of the transposition table.
+        '''
+        indexes = []
+        while moves:
+            low = moves & -moves
+            indexes.append(low.bit_length() - 1)
+            moves ^= low
+        if len(indexes) < 2:
+            return indexes
+
+        killers = self.__killers[ply] if ply < self.__max_ply else []
+        history = self.__history[color]
+        scores = MoveOrderer.SquareScores
+
+        def priority(index):
+            if index == first:
+                tier = MoveOrderer.KillersPerPly + 1
+            elif index in killers:
+                tier = MoveOrderer.KillersPerPly - killers.index(index)
+            else:
+                tier = 0
+            return (tier, history[index], scores[index])
+
+        indexes.sort(key=priority, reverse=True)
+        return indexes
+
+    def record_cutoff(self, index, ply, color, depth):
+        '''
+        record_cutoff(index, ply, color, depth)
+            Record that the move 'index' caused a beta cutoff in the search of
+            'depth' plies at 'ply'.
+        '''
+        if ply < self.__max_ply:
+            killers = self.__killers[ply]
+            if killers[0] != index:
+                killers.pop()
+                killers.insert(0, index)
+        self.__history[color][index] += depth * depth
+
+
+class SearchCPU:
+    '''
+    SearchCPU class chooses moves by negamax search with alpha-beta pruning
+    and iterative deepening. It can be used in place of CPU:
+
+        reversi.set_cpu(SearchCPU(time_limit=0.5))
+
+    The search works on pairs of bitmasks (player, rival), so it neither
+    touches the board of the game nor notifies the controller.
+    '''
+
+    # Scores of finished games are WinScore + {disc differential}, so that
+    # any win is better than any evaluation of an unfinished game.
+    WinScore = 100000
+    Infinity = 1000000
+
+    MobilityWeight = 10
+    CornerMask = 0x8100000000000081
+    AroundCornerMask = 0x42c300000000c342
+
+    # Check the time budget every this number of nodes, which take about two
+    # milliseconds.
+    _CheckInterval = 64
+
+    def __init__(self, max_depth=60, time_limit=1.0, node_limit=None,
+                 table_size_mb=16, evaluator=None, endgame_empties=10,
+                 endgame_mode=EndgameSolver.Mode.Exact):
+        '''
+        SearchCPU(max_depth=60, time_limit=1.0, node_limit=None,
+                  table_size_mb=16, evaluator=None, endgame_empties=10,
+                  endgame_mode=EndgameSolver.Mode.Exact)
+            'time_limit' is the wall-clock budget per move in seconds, and
+            'node_limit' is the budget of searched nodes per move. None
+            means no limit. When the budget runs out, the best move of the
+            last completed iteration is returned, or the best of the root
+            moves searched so far if no iteration has completed.
+
+            'evaluator' is a function evaluator(player, rival) returning the
+            score of the position for 'player'. SearchCPU.evaluate is used
+            by default. If the evaluator also has set_position(), apply_move()
+            and undo_move() like PatternEvaluator, they are called as the
+            search moves through the tree.
+
+            When 'endgame_empties' or fewer cells are empty, the position is
+            solved by EndgameSolver in 'endgame_mode' instead. If the solver
+            does not finish within the budget, the normal search is used.
+            None disables the solver.
+        '''
+        self.__max_depth = max_depth
+        self.__endgame_empties = endgame_empties
+        self.__endgame_mode = endgame_mode
+        self.__time_limit = time_limit
+        self.__node_limit = node_limit
+        self.__table = TranspositionTable(table_size_mb)
+        self.__evaluate = evaluator if evaluator else SearchCPU.evaluate
+        self.__is_incremental = hasattr(self.__evaluate, 'apply_move')
+        self.__orderer = MoveOrderer()
+        self.__stats = {}
+
+    def get_table(self):
+        return self.__table
+
+    def get_last_stats(self):
+        '''
+        get_last_stats()
+            Return a dict of statistics of the last get_put_coord() call:
+            completed depth, score, searched nodes, elapsed seconds and
+            whether the endgame solver was used.
+        '''
+        return dict(self.__stats)
+
+    @staticmethod
+    def evaluate(player, rival):
+        '''
+        evaluate(player, rival)
+            Static evaluation for 'player', based on the square classes of
+            CPU.Score and the mobility.
+        '''
+        popcount = BitBoard.popcount
+        corner = SearchCPU.CornerMask
+        around = SearchCPU.AroundCornerMask
+        mobility = \
+            popcount(BitBoard.get_moves_mask(player, rival)) - \
+            popcount(BitBoard.get_moves_mask(rival, player))
+        return \
+            CPU.Score.Corner * \
+            (popcount(player & corner) - popcount(rival & corner)) + \
+            CPU.Score.AroundCorner * \
+            (popcount(player & around) - popcount(rival & around)) + \
+            SearchCPU.MobilityWeight * mobility
+
+    @staticmethod
+    def get_final_score(player, rival):
+        return SearchCPU.get_score_of_diff(
+                BitBoard.popcount(player) - BitBoard.popcount(rival))
+
+    @staticmethod
+    def get_score_of_diff(diff):
+        # Score of a finished game with the disc differential 'diff'.
+        if diff > 0:
+            return SearchCPU.WinScore + diff
+        elif diff < 0:
+            return -SearchCPU.WinScore + diff
+        return 0
+
+    def get_put_coord(self, reversi, color):
+        '''
+        get_put_coord(reversi, color)
+            Return a coord to put stone. This function assumes that `color`
+            player can put stone at least one place.
+        '''
+        board = reversi.get_board()
+        rival_color = Stone.get_rival_stone_color(color)
+        index = self.search(
+                board.get_bits(color), board.get_bits(rival_color), color)
+        return BitBoard.index_to_coord(index)
+
+    def search(self, player, rival, color, root_moves=BitBoard.FullMask):
+        '''
+        search(player, rival, color, root_moves=BitBoard.FullMask)
+            Search the position where 'player' of 'color' is to move, and
+            return the bit index of the best move. Only the moves in the
+            bitmask 'root_moves' are considered at the root.
+
+            The result of each completed iteration is recorded in
+            get_last_stats()['iterations'] as (depth, score, move).
+        '''
+        self.__root_moves = root_moves
+        self.__iterations = []
+        start = time.perf_counter()
+        self.__nodes = 0
+        self.__table.reset_stats()
+        self.__orderer.age()
+
+        empties = BitBoard.popcount(BitBoard.FullMask ^ (player | rival))
+        if self.__endgame_empties is not None and \
+                empties <= self.__endgame_empties:
+            best_move = self.__solve_endgame(player, rival, start)
+            if best_move is not None:
+                return best_move
+
+        key = Zobrist.hash_bits(
+                *SearchCPU.to_white_black(player, rival, color), color)
+        self.__start_budget(start)
+        best_move, best_score, completed = None, 0, 0
+        for depth in range(1, min(self.__max_depth, empties) + 1):
+            try:
+                (best_score, best_move) = self.__search_root(
+                        player, rival, color, key, depth, best_move)
+            except SearchTimeout:
+                if best_move is None:
+                    # Even the first iteration ran out of the budget, so
+                    # the best of the root moves searched so far is used.
+                    best_move = self.__root_best
+                break
+            completed = depth
+            self.__iterations.append((depth, best_score, best_move))
+            if abs(best_score) >= SearchCPU.WinScore:
+                # The game has been solved.
+                break
+
+        self.__stats = {
+            'depth': completed,
+            'score': best_score,
+            'nodes': self.__nodes,
+            'time': time.perf_counter() - start,
+            'table': self.__table.get_stats(),
+            'endgame': False,
+            'iterations': self.__iterations,
+        }
+        return best_move
+
+    def __solve_endgame(self, player, rival, start):
+        # Return the best move found by EndgameSolver, or None if the
+        # solver runs out of the budget.
+        self.__start_budget(start)
+        solver = EndgameSolver(self.__check_endgame_budget)
+        try:
+            (best_move, diff) = solver.get_best_move(
+                    player, rival, self.__endgame_mode, self.__root_moves)
+        except SearchTimeout:
+            return None
+        self.__nodes += solver.get_nodes() % EndgameSolver._CheckInterval
+
+        depth = BitBoard.popcount(BitBoard.FullMask ^ (player | rival))
+        score = SearchCPU.get_score_of_diff(diff)
+        self.__stats = {
+            'depth': depth,
+            'score': score,
+            'nodes': self.__nodes,
+            'time': time.perf_counter() - start,
+            'table': self.__table.get_stats(),
+            'endgame': True,
+            'iterations': [(depth, score, best_move)],
+        }
+        return best_move
+
+    def __start_budget(self, start):
+        if self.__time_limit is not None:
+            self.__deadline = start + self.__time_limit
+        else:
+            self.__deadline = None
+
+    def __check_endgame_budget(self, nodes):
+        self.__nodes += nodes
+        self.__check_budget()
+
+    @staticmethod
+    def to_white_black(player, rival, color):
+        if color == Stone.White:
+            return (player, rival)
+        return (rival, player)
+
+    def __search_root(self, player, rival, color, key, depth, previous_best):
+        if previous_best is None:
+            previous_best = TranspositionTable.NoMove
+        if self.__is_incremental:
+            # The previous iteration may have been aborted in the middle.
+            self.__evaluate.set_position(player, rival, color)
+        legal_moves = BitBoard.get_moves_mask(player, rival)
+        moves = self.__orderer.order(
+                legal_moves & self.__root_moves, 0, color, previous_best)
+        alpha, beta = -SearchCPU.Infinity, SearchCPU.Infinity
+        best_move = moves[0]
+        self.__root_best = best_move
+        for index in moves:
+            score = -self.__negamax_move(
+                    player, rival, color, key, index, depth, 1, -beta, -alpha)
+            if score > alpha:
+                alpha, best_move = score, index
+                self.__root_best = best_move
+        # With some legal moves left out, the score is only a lower bound of
+        # the position, which other searches may reach inside the tree.
+        if legal_moves & ~self.__root_moves:
+            bound = TranspositionTable.Bound.Lower
+        else:
+            bound = TranspositionTable.Bound.Exact
+        self.__table.store(key, depth, bound, alpha, best_move)
+        return (alpha, best_move)
+
+    def __negamax_move(self, player, rival, color, key, index, depth, ply,
+                       alpha, beta):
+        # Put the stone on 'index' and search the position after that from
+        # the rival's side.
+        bit = 1 << index
+        flips = BitBoard.get_flips_mask(player, rival, bit)
+        key ^= Zobrist.StoneKeys[color][index] ^ \
+            Zobrist.get_flip_key(flips) ^ Zobrist.SideKey
+        if not self.__is_incremental:
+            return self.__negamax(
+                    rival ^ flips, player | bit | flips,
+                    Stone.get_rival_stone_color(color), key, depth - 1, ply,
+                    alpha, beta)
+        self.__evaluate.apply_move(color, bit, flips)
+        score = self.__negamax(
+                rival ^ flips, player | bit | flips,
+                Stone.get_rival_stone_color(color), key, depth - 1, ply,
+                alpha, beta)
+        self.__evaluate.undo_move()
+        return score
+
+    def __negamax(self, player, rival, color, key, depth, ply, alpha, beta):
+        self.__nodes += 1
+        if self.__nodes % SearchCPU._CheckInterval == 0:
+            self.__check_budget()
+
+        original_alpha = alpha
+        table_move = TranspositionTable.NoMove
+        entry = self.__table.probe(key)
+        if entry is not None:
+            (entry_depth, bound, score, table_move) = entry
+            if entry_depth >= depth:
+                if bound == TranspositionTable.Bound.Exact:
+                    return score
+                elif bound == TranspositionTable.Bound.Lower:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score
+
+        moves = BitBoard.get_moves_mask(player, rival)
+        if moves == 0:
+            if BitBoard.get_moves_mask(rival, player) == 0:
+                return SearchCPU.get_final_score(player, rival)
+            # Pass
+            return -self.__negamax(
+                    rival, player, Stone.get_rival_stone_color(color),
+                    key ^ Zobrist.SideKey, depth, ply, -beta, -alpha)
+        if depth <= 0:
+            return self.__evaluate(player, rival)
+
+        best_score, best_move = -SearchCPU.Infinity, TranspositionTable.NoMove
+        for index in self.__orderer.order(moves, ply, color, table_move):
+            score = -self.__negamax_move(
+                    player, rival, color, key, index, depth, ply + 1,
+                    -beta, -alpha)
+            if score > best_score:
+                best_score, best_move = score, index
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        self.__orderer.record_cutoff(index, ply, color, depth)
+                        break
+
+        if best_score <= original_alpha:
+            bound = TranspositionTable.Bound.Upper
+        elif best_score >= beta:
+            bound = TranspositionTable.Bound.Lower
+        else:
+            bound = TranspositionTable.Bound.Exact
+        self.__table.store(key, depth, bound, best_score, best_move)
+        return best_score
+
+    def __check_budget(self):
+        if self.__deadline is not None and \
+                time.perf_counter() >= self.__deadline:
+            raise SearchTimeout()
+        if self.__node_limit is not None and \
+                self.__nodes >= self.__node_limit:
+            raise SearchTimeout()
+
+
+# SearchCPU of each worker process of ParallelSearchCPU. It lives as long as
+# the process, so the transposition table is kept across moves.
+_worker_cpu = None
+
+
+def _init_worker(options):
+    global _worker_cpu
+    _worker_cpu = SearchCPU(**options)
+
+
+def _search_in_worker(player, rival, color, root_moves):
+    _worker_cpu.search(player, rival, color, root_moves)
+    return _worker_cpu.get_last_stats()
+
+
+class ParallelSearchCPU:
+    '''
+    ParallelSearchCPU class splits the moves at the root among worker
+    processes, and each of them searches its share with SearchCPU. It can be
+    used in place of CPU like SearchCPU.
+
+    The workers receive only the bitmasks of the position, and they stay
+    alive across moves until close() is called. Use it with 'with' statement
+    or call close() to stop them.
+    '''
+
+    def __init__(self, workers=None, **options):
+        '''
+        ParallelSearchCPU(workers=None, **options)
+            'workers' is the number of worker processes, os.cpu_count() by
+            default. 'options' are passed to SearchCPU in each worker.
+        '''
+        self.__workers = workers if workers else os.cpu_count()
+        self.__options = options
+        self.__executor = None
+        self.__stats = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self.__executor is not None:
+            self.__executor.shutdown()
+            self.__executor = None
+
+    def get_last_stats(self):
+        '''
+        get_last_stats()
+            Return a dict of statistics of the last get_put_coord() call:
+            depth and score of the chosen result, searched nodes in total,
+            elapsed seconds and the number of workers used.
+        '''
+        return dict(self.__stats)
+
+    def __get_executor(self):
+        if self.__executor is None:
+            self.__executor = ProcessPoolExecutor(
+                    max_workers=self.__workers,
+                    initializer=_init_worker,
+                    initargs=(self.__options,))
+        return self.__executor
+
+    def get_put_coord(self, reversi, color):
+        '''
+        get_put_coord(reversi, color)
+            Return a coord to put stone. This function assumes that `color`
+            player can put stone at least one place.
+        '''
+        board = reversi.get_board()
+        rival_color = Stone.get_rival_stone_color(color)
+        index = self.search(
+                board.get_bits(color), board.get_bits(rival_color), color)
+        return BitBoard.index_to_coord(index)
+
+    def search(self, player, rival, color):
+        '''
+        search(player, rival, color)
+            Search the position where 'player' of 'color' is to move, and
+            return the bit index of the best move.
+        '''
+        start = time.perf_counter()
+        moves = MoveOrderer().order(
+                BitBoard.get_moves_mask(player, rival), 0, color)
+        if len(moves) == 1:
+            self.__stats = {
+                'depth': 0, 'score': 0, 'nodes': 0,
+                'time': time.perf_counter() - start, 'workers': 0,
+            }
+            return moves[0]
+
+        # Deal the moves, best first, to the workers.
+        shares = [0] * min(self.__workers, len(moves))
+        for i, index in enumerate(moves):
+            shares[i % len(shares)] |= 1 << index
+        executor = self.__get_executor()
+        futures = [
+            executor.submit(_search_in_worker, player, rival, color, share)
+            for share in shares
+        ]
+        results = [future.result() for future in futures]
+
+        # Scores are compared at the deepest iteration all workers have
+        # completed.
+        depth = min(r['iterations'][-1][0] for r in results)
+        best = None
+        for r in results:
+            iterations = [it for it in r['iterations'] if it[0] <= depth]
+            (_, score, move) = \
+                iterations[-1] if iterations else r['iterations'][0]
+            if best is None or score > best[0]:
+                best = (score, move)
+
+        self.__stats = {
+            'depth': depth,
+            'score': best[0],
+            'nodes': sum(r['nodes'] for r in results),
+            'time': time.perf_counter() - start,
+            'workers': len(shares),
+        }
+        return best[1]
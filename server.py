@@ -0,0 +1,352 @@
+import argparse
+import asyncio
+import itertools
+import json
+from concurrent.futures import ProcessPoolExecutor
+from core import BoardDiff, Coord, Stone
+from controller import HeadlessController
+from simulator import Simulator
+
+
+class ServerError(BaseException):
+    def __init__(self, message):
+        self.__message = message
+
+    def __str__(self):
+        return self.__message
+
+
+# CPUs of the worker process, keyed by the strategy strings. Only the last
+# few are kept, since each may hold a transposition table.
+_worker_cpus = {}
+_WorkerCPUCount = 4
+
+
+def _choose_move(strategy, entire, color):
+    # Run in a worker: return (x, y) of the move of the CPU of 'strategy'.
+    if strategy not in _worker_cpus:
+        if len(_worker_cpus) >= _WorkerCPUCount:
+            del _worker_cpus[next(iter(_worker_cpus))]
+        _worker_cpus[strategy] = Simulator.create_cpu(strategy, None)
+    reversi = HeadlessController().get_reversi()
+    reversi.get_board().set_entire(entire)
+    return _worker_cpus[strategy].get_put_coord(reversi, color).get()
+
+
+def _to_json(value):
+    # Convert the arguments of the events to JSON values.
+    if isinstance(value, Coord):
+        return list(value.get())
+    if isinstance(value, BoardDiff):
+        return value.to_dict()
+    if isinstance(value, (list, tuple)):
+        return [_to_json(v) for v in value]
+    return value
+
+
+class Session:
+    '''
+    Session class is a game hosted by ReversiServer. It has its own Reversi
+    and HeadlessController, and plays the CPU moves in the executor of the
+    server.
+    '''
+
+    def __init__(self, session_id, cpu=None, cpu_color=Stone.White):
+        '''
+        Session(session_id, cpu=None, cpu_color=Stone.White)
+            'cpu' is the strategy of the CPU as in Simulator, or None for two
+            players.
+        '''
+        self.__id = session_id
+        self.__cpu = cpu
+        self.__cpu_color = cpu_color
+        self.__controller = HeadlessController(max_events=None)
+        self.__reversi = self.__controller.get_reversi()
+        self.__color = Stone.Black
+        self.__lock = asyncio.Lock()
+
+    def get_id(self):
+        return self.__id
+
+    def get_state(self):
+        board = self.__reversi.get_board()
+        result = self.__controller.get_result()
+        return {
+            'session': self.__id,
+            'board': str(board).split('\n'),
+            'counts': board.get_stones_counts(),
+            'color': None if result is not None else self.__color,
+            'puttable': [] if result is not None else _to_json(
+                self.__reversi.get_puttable_coords(self.__color)),
+            'result': result,
+        }
+
+    def pop_events(self):
+        return [
+            {'event': event[0], 'args': _to_json(event[1:])}
+            for event in self.__controller.get_events()
+        ]
+
+    async def move(self, coord, executor):
+        '''
+        move(coord, executor)
+            Put stone of the player to move on 'coord', and then let the CPU
+            play until it is the player's turn again.
+        '''
+        async with self.__lock:
+            if self.__controller.get_result() is not None:
+                raise ServerError('The game is over')
+            if self.__cpu is not None and self.__color == self.__cpu_color:
+                raise ServerError('It is the turn of the CPU')
+            if not self.__reversi.put_stone_color(coord, self.__color):
+                self.__controller.request_notify_put_fails(coord)
+                return
+            self.__proceed()
+            await self.__play_cpu(executor)
+
+    async def start(self, executor):
+        # Let the CPU play first if it has black.
+        async with self.__lock:
+            await self.__play_cpu(executor)
+
+    async def __play_cpu(self, executor):
+        loop = asyncio.get_running_loop()
+        while self.__cpu is not None and self.__color == self.__cpu_color \
+                and self.__controller.get_result() is None:
+            try:
+                (x, y) = await loop.run_in_executor(
+                        executor, _choose_move, self.__cpu,
+                        self.__reversi.get_board().get_entire(), self.__color)
+            except (asyncio.CancelledError, KeyboardInterrupt, SystemExit):
+                raise
+            except BaseException as e:
+                # The engine raises BaseException for its errors.
+                raise ServerError('The CPU failed: %s' % e)
+            if not self.__reversi.put_stone_color(Coord(x, y), self.__color):
+                raise ServerError('The CPU chose an illegal move')
+            self.__proceed()
+
+    def __proceed(self):
+        # Pass the turn to the color of the diff of the move, which is the
+        # mover if the rival has to pass.
+        diff = self.__reversi.get_last_diff()
+        if not diff.is_game_over():
+            self.__color = diff.get_next_color()
+            self.__controller.request_notify_player_change(self.__color)
+
+
+class ReversiServer:
+    '''
+    ReversiServer class hosts Reversi sessions over TCP or a unix socket with
+    asyncio. Each line from a client is a JSON request, and each request gets
+    one line of JSON response with the same 'id':
+
+        {"id": 1, "cmd": "new", "cpu": "search:time_limit=0.5"}
+        {"id": 2, "cmd": "move", "session": 1, "x": 3, "y": 2}
+        {"id": 3, "cmd": "state", "session": 1}
+        {"id": 4, "cmd": "close", "session": 1}
+
+    A response has 'ok', the 'state' of the session and the 'events' of its
+    controller since the last response, or 'error' if the request failed.
+    Requests are handled concurrently, so a CPU thinking in one session does
+    not delay the others. The sessions are closed with the connection.
+
+    The 'cpu' of a session is a strategy of Simulator, but only the options
+    in ReversiServer.StrategyOptions are accepted, up to their limits, so
+    that no client can make a move take unbounded time or memory.
+    '''
+
+    # Options which clients may give to each strategy, and their maximum
+    # values. The time limits of the strategies cannot be removed.
+    StrategyOptions = {
+        'cpu': {},
+        'random': {},
+        'search': {
+            'max_depth': 60,
+            'time_limit': 5.0,
+            'node_limit': 1000000,
+            'table_size_mb': 64,
+            'endgame_empties': 14,
+        },
+        'mcts': {
+            'time_limit': 5.0,
+            'iterations': 100000,
+        },
+    }
+
+    def __init__(self, executor=None, workers=None):
+        '''
+        ReversiServer(executor=None, workers=None)
+            CPU moves run in 'executor', or in a ProcessPoolExecutor of
+            'workers' processes.
+        '''
+        self.__executor = executor if executor else \
+            ProcessPoolExecutor(max_workers=workers)
+        self.__ids = itertools.count(1)
+        self.__sessions = {}
+        self.__commands = {
+            'new': self.__new,
+            'move': self.__move,
+            'state': self.__state,
+            'close': self.__close,
+        }
+
+    def get_session_count(self):
+        return len(self.__sessions)
+
+    @staticmethod
+    def check_strategy(strategy):
+        '''
+        check_strategy(strategy)
+            Raise ServerError unless 'strategy' has only the options of
+            ReversiServer.StrategyOptions, each a positive number within its
+            limit.
+        '''
+        if not isinstance(strategy, str):
+            raise ServerError('cpu must be a string')
+        try:
+            (name, options) = Simulator.parse_strategy(strategy)
+        except BaseException as e:
+            raise ServerError(str(e))
+        limits = ReversiServer.StrategyOptions[name]
+        for key, value in options.items():
+            if key not in limits:
+                raise ServerError('Option %s is not allowed for %s' % (
+                    key, name))
+            limit = limits[key]
+            types = int if isinstance(limit, int) else (int, float)
+            if isinstance(value, bool) or not isinstance(value, types) or \
+                    not 0 < value <= limit:
+                raise ServerError('Option %s must be a number in (0, %s]' % (
+                    key, limit))
+
+    def close(self):
+        self.__executor.shutdown()
+
+    async def start_tcp(self, host='127.0.0.1', port=0):
+        return await asyncio.start_server(self.handle_client, host, port)
+
+    async def start_unix(self, path):
+        return await asyncio.start_unix_server(self.handle_client, path)
+
+    async def handle_client(self, reader, writer):
+        owned = set()
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        async def respond(line):
+            response = await self.handle_request(line, owned)
+            async with write_lock:
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.create_task(respond(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            for session_id in owned:
+                self.__sessions.pop(session_id, None)
+            writer.close()
+
+    async def handle_request(self, line, owned=None):
+        '''
+        handle_request(line, owned=None)
+            Handle a request line, and return the response as a dict.
+            'owned' is the set of the ids of the sessions of the client.
+        '''
+        if owned is None:
+            owned = set()
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ServerError('A request must be an object')
+            request_id = request.get('id')
+            command = self.__commands.get(request.get('cmd'))
+            if command is None:
+                raise ServerError('Unknown command: %s' % request.get('cmd'))
+            response = await command(request, owned)
+        except (ServerError, ValueError, KeyError, TypeError) as e:
+            return {'id': request_id, 'ok': False, 'error': str(e)}
+        response.update({'id': request_id, 'ok': True})
+        return response
+
+    def __get_session(self, request, owned):
+        session_id = request['session']
+        if session_id not in owned:
+            raise ServerError('No such session: %s' % session_id)
+        return self.__sessions[session_id]
+
+    @staticmethod
+    def __respond(session):
+        return {'state': session.get_state(), 'events': session.pop_events()}
+
+    async def __new(self, request, owned):
+        cpu = request.get('cpu')
+        if cpu is not None:
+            ReversiServer.check_strategy(cpu)
+        cpu_color = Stone.Black if request.get('cpu_color') == 'black' \
+            else Stone.White
+        session = Session(next(self.__ids), cpu, cpu_color)
+        # The session is registered only when the CPU could play first.
+        await session.start(self.__executor)
+        self.__sessions[session.get_id()] = session
+        owned.add(session.get_id())
+        return ReversiServer.__respond(session)
+
+    async def __move(self, request, owned):
+        session = self.__get_session(request, owned)
+        (x, y) = (request['x'], request['y'])
+        if not (isinstance(x, int) and isinstance(y, int)):
+            raise ServerError('x and y must be integers')
+        await session.move(Coord(x, y), self.__executor)
+        return ReversiServer.__respond(session)
+
+    async def __state(self, request, owned):
+        return ReversiServer.__respond(self.__get_session(request, owned))
+
+    async def __close(self, request, owned):
+        session = self.__get_session(request, owned)
+        owned.discard(session.get_id())
+        del self.__sessions[session.get_id()]
+        return {}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+            description='Serve Reversi games by JSON lines.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help='path of a unix socket to listen on')
+    parser.add_argument(
+            '--workers', type=int, default=None,
+            help='number of processes for CPU moves')
+    args = parser.parse_args(argv)
+
+    async def serve():
+        server = ReversiServer(workers=args.workers)
+        if args.unix:
+            listener = await server.start_unix(args.unix)
+        else:
+            listener = await server.start_tcp(args.host, args.port)
+        try:
+            async with listener:
+                await listener.serve_forever()
+        finally:
+            server.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
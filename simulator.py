@@ -0,0 +1,237 @@
+import argparse
+import ast
+import json
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from core import Stone, CPU
+from controller import HeadlessController
+from search import SearchCPU
+from mcts import MCTSCPU
+
+
+class RandomCPU:
+    '''
+    RandomCPU class puts stone on one of the puttable cells at random.
+    '''
+
+    def __init__(self, seed=None):
+        self.__random = random.Random(seed)
+
+    def get_put_coord(self, reversi, color):
+        return self.__random.choice(reversi.get_puttable_coords(color))
+
+
+class Simulator:
+    '''
+    Simulator class plays CPU-vs-CPU games without GUI, and yields the
+    results as they finish.
+
+        simulator = Simulator('search:max_depth=3', 'cpu', seed=0, workers=4)
+        for result in simulator.run(1000):
+            ...
+
+    A strategy is given as a string 'name' or 'name:key=value,...', where
+    the name is one of Simulator.Strategies and the pairs are passed to its
+    constructor as keyword arguments.
+
+    Each game is seeded by 'seed' plus its number, so the games are the same
+    whatever the number of workers is, as long as the strategies do not use
+    time limits.
+    '''
+
+    Strategies = {
+        'cpu': lambda seed, **options: CPU,
+        'random': lambda seed, **options: RandomCPU(seed, **options),
+        'search': lambda seed, **options: SearchCPU(**options),
+        'mcts': lambda seed, **options: MCTSCPU(seed=seed, **options),
+    }
+
+    # Number of games sent to a worker at once.
+    _ChunkSize = 16
+
+    def __init__(self, black='cpu', white='cpu', seed=0, workers=1):
+        '''
+        Simulator(black='cpu', white='cpu', seed=0, workers=1)
+            'black' and 'white' are the strategies of the players. 'workers'
+            is the number of worker processes, and 1 plays the games in this
+            process.
+        '''
+        # Parse the strategies here to fail early.
+        Simulator.parse_strategy(black)
+        Simulator.parse_strategy(white)
+        self.__strategies = {Stone.Black: black, Stone.White: white}
+        self.__seed = seed
+        self.__workers = workers
+
+    @staticmethod
+    def parse_strategy(strategy):
+        '''
+        parse_strategy(strategy)
+            Return a tuple of (name, options) parsed from a string like
+            'search:max_depth=3,time_limit=None'.
+        '''
+        (name, _, args) = strategy.partition(':')
+        if name not in Simulator.Strategies:
+            raise BaseException('Unknown strategy: %s' % name)
+        options = {}
+        for arg in filter(None, args.split(',')):
+            (key, _, value) = arg.partition('=')
+            try:
+                options[key] = ast.literal_eval(value)
+            except (ValueError, SyntaxError):
+                options[key] = value
+        return (name, options)
+
+    @staticmethod
+    def create_cpu(strategy, seed):
+        (name, options) = Simulator.parse_strategy(strategy)
+        return Simulator.Strategies[name](seed, **options)
+
+    def run(self, games):
+        '''
+        run(games)
+            Play 'games' games, and yield the result of each game in order.
+            See play_game() for the result.
+        '''
+        seeds = range(self.__seed, self.__seed + games)
+        args = [(self.__strategies, s) for s in seeds]
+        if self.__workers == 1:
+            for arg in args:
+                yield Simulator.play_game(*arg)
+            return
+        with ProcessPoolExecutor(max_workers=self.__workers) as executor:
+            yield from executor.map(
+                    Simulator.play_game_with_args, args,
+                    chunksize=Simulator._ChunkSize)
+
+    @staticmethod
+    def play_game_with_args(args):
+        return Simulator.play_game(*args)
+
+    @staticmethod
+    def play_game(strategies, seed):
+        '''
+        play_game(strategies, seed)
+            Play a game with the strategies, a dict from Stone.Black and
+            Stone.White to strategy strings, and return the result as a dict:
+
+                'seed'   ... the seed of the game
+                'winner' ... Stone.Black, Stone.White, or Stone.Unset if draw
+                'counts' ... the numbers of stones indexed by Stone.White and
+                             Stone.Black
+                'moves'  ... the list of (x, y) of the moves; passes are not
+                             included
+                'colors' ... the colors of the players of the moves
+                'times'  ... the seconds spent to choose each move
+                'passes' ... the number of passes
+        '''
+        # CPU chooses among the moves of the same score by 'random' module.
+        random.seed(seed)
+        cpus = {
+            color: Simulator.create_cpu(strategy, seed)
+            for color, strategy in strategies.items()
+        }
+        # The result and the passes are read from the diffs of the moves, so
+        # no events need to be kept.
+        controller = HeadlessController(max_events=0)
+        reversi = controller.get_reversi()
+        moves, colors, times = [], [], []
+        passes = 0
+        color = Stone.Black
+        while True:
+            start = time.perf_counter()
+            coord = cpus[color].get_put_coord(reversi, color)
+            times.append(time.perf_counter() - start)
+            if not reversi.put_stone_color(coord, color):
+                raise BaseException('Illegal move %s' % coord)
+            moves.append(coord.get())
+            colors.append(color)
+            diff = reversi.get_last_diff()
+            if diff.is_game_over():
+                break
+            if diff.get_passed() is not None:
+                passes += 1
+            color = diff.get_next_color()
+
+        return {
+            'seed': seed,
+            'winner': controller.get_result(),
+            'counts': reversi.get_board().get_stones_counts(),
+            'moves': moves,
+            'colors': colors,
+            'times': times,
+            'passes': passes,
+        }
+
+    @staticmethod
+    def summarize(results):
+        '''
+        summarize(results)
+            Return a dict of the statistics of the results: the numbers of
+            games, wins of each color and draws, the average disc
+            differential of black, and the average seconds per move of each
+            color.
+        '''
+        summary = {'games': 0, 'black': 0, 'white': 0, 'draw': 0}
+        diff = 0
+        move_times = {Stone.Black: [], Stone.White: []}
+        for result in results:
+            summary['games'] += 1
+            summary[Simulator.winner_to_name(result['winner'])] += 1
+            counts = result['counts']
+            diff += counts[Stone.Black] - counts[Stone.White]
+            for color, t in zip(result['colors'], result['times']):
+                move_times[color].append(t)
+        games = max(summary['games'], 1)
+        summary['black_disc_diff'] = diff / games
+        for color, name in ((Stone.Black, 'black'), (Stone.White, 'white')):
+            t = move_times[color]
+            summary[name + '_time_per_move'] = sum(t) / len(t) if t else 0
+        return summary
+
+    @staticmethod
+    def winner_to_name(winner):
+        if winner == Stone.Black:
+            return 'black'
+        elif winner == Stone.White:
+            return 'white'
+        return 'draw'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+            description='Play CPU-vs-CPU games without GUI.')
+    parser.add_argument('--black', default='cpu', help='strategy of black')
+    parser.add_argument('--white', default='cpu', help='strategy of white')
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument(
+            '--record', help='file to append the game records to')
+    parser.add_argument(
+            '--quiet', action='store_true',
+            help='print only the summary, not each game')
+    args = parser.parse_args(argv)
+    from record import GameRecord, RecordWriter
+
+    simulator = Simulator(args.black, args.white, args.seed, args.workers)
+    writer = RecordWriter(args.record) if args.record else None
+    results = []
+    for result in simulator.run(args.games):
+        results.append(result)
+        if writer is not None:
+            writer.write(GameRecord.from_colored_moves(
+                    result['moves'], result['colors']))
+        if not args.quiet:
+            line = dict(result, winner=Simulator.winner_to_name(
+                    result['winner']))
+            print(json.dumps(line), flush=True)
+    if writer is not None:
+        writer.close()
+    print(json.dumps(Simulator.summarize(results)), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+import random
+import unittest as t
+import core
+from batch import BatchReversi, np
+from test_core import NullController, board_string_to_matrix
+
+
+@t.skipIf(np is None, 'numpy is not installed')
+class TestBatchReversi(t.TestCase):
+    def test_init_state(self):
+        games = BatchReversi(3)
+        reversi = core.Reversi(NullController())
+        for board in games.get_entire():
+            self.assertEqual(
+                    board.tolist(), reversi.get_board().get_entire())
+        self.assertEqual(games.get_stones_counts()[core.Stone.White].tolist(),
+                         [2, 2, 2])
+        self.assertEqual(games.get_colors().tolist(), [core.Stone.Black] * 3)
+
+    def test_same_as_reversi(self):
+        # Random games agree with Reversi move by move.
+        size = 8
+        games = BatchReversi(size)
+        reversis = [core.Reversi(NullController()) for _ in range(size)]
+        colors = [core.Stone.Black] * size
+        rand = random.Random(0)
+        while not games.get_over().all():
+            matrix = games.get_puttable_matrix()
+            indexes = []
+            for i, reversi in enumerate(reversis):
+                coords = reversi.get_puttable_coords(colors[i])
+                self.assertEqual(
+                        [core.BitBoard.index_to_coord(index)
+                            for index in np.flatnonzero(matrix[i])],
+                        coords)
+                if len(coords) == 0:
+                    indexes.append(-1)
+                    continue
+                coord = rand.choice(coords)
+                self.assertTrue(reversi.put_stone_color(coord, colors[i]))
+                indexes.append(coord.y * core.Board.Size + coord.x)
+
+                rival = core.Stone.get_rival_stone_color(colors[i])
+                if not reversi.check_need_pass(rival):
+                    colors[i] = rival
+                elif reversi.check_need_pass(colors[i]):
+                    colors[i] = None
+
+            put = games.put_stones(indexes)
+            self.assertEqual(put.tolist(), [i >= 0 for i in indexes])
+            for i, reversi in enumerate(reversis):
+                self.assertEqual(
+                        games.get_entire()[i].tolist(),
+                        reversi.get_board().get_entire())
+                if colors[i] is None:
+                    self.assertTrue(games.get_over()[i])
+                else:
+                    self.assertFalse(games.get_over()[i])
+                    self.assertEqual(games.get_colors()[i], colors[i])
+
+        counts = games.get_stones_counts()
+        for i, reversi in enumerate(reversis):
+            (w, b) = reversi.get_board().get_stones_counts()
+            self.assertEqual((counts[0][i], counts[1][i]), (w, b))
+            (is_draw, winner) = reversi.judge_which_player_wins(w, b)
+            self.assertEqual(games.get_winners()[i], winner)
+
+    def test_illegal_move(self):
+        games = BatchReversi(2)
+        put = games.put_stones([0, 19])
+        self.assertEqual(put.tolist(), [False, True])
+        self.assertEqual(
+                games.get_colors().tolist(),
+                [core.Stone.Black, core.Stone.White])
+
+    def test_pass_and_game_over(self):
+        board = board_string_to_matrix('''
+            xo......
+            ........
+            ........
+            ........
+            ........
+            ........
+            ........
+            .......o
+        ''')
+        games = BatchReversi(1)
+        games.set_entire([board], core.Stone.Black)
+        self.assertEqual(games.get_puttable_masks().tolist(), [1 << 2])
+        games.put_stones([2])
+        # White cannot put anywhere, nor can Black.
+        self.assertTrue(games.get_over()[0])
+        self.assertEqual(games.get_winners()[0], core.Stone.Black)
+
+        board[7][6] = core.Stone.White
+        board[7][7] = core.Stone.Black
+        games.set_entire([board], core.Stone.Black)
+        games.put_stones([2])
+        # White has no move, so Black moves again.
+        self.assertFalse(games.get_over()[0])
+        self.assertTrue(games.get_passed()[0])
+        self.assertEqual(games.get_colors()[0], core.Stone.Black)
+
+    def test_play_random(self):
+        games = BatchReversi(64)
+        games.play_random(np.random.default_rng(0))
+        self.assertTrue(games.get_over().all())
+        (white, black) = games.get_stones_counts()
+        self.assertTrue(((white + black) <= 64).all())
+
+
+if __name__ == '__main__':
+    t.main()
@@ -0,0 +1,42 @@
+import unittest as t
+from bench import Benchmark, Corpus
+
+
+class TestBenchmark(t.TestCase):
+    def test_corpus(self):
+        corpus = Corpus(size=5, seed=1)
+        self.assertEqual(len(corpus), 5)
+        self.assertEqual(
+                corpus.get_positions(), Corpus(size=5, seed=1).get_positions())
+        for (reversi, color) in corpus.make_games():
+            self.assertGreater(len(reversi.get_puttable_coords(color)), 0)
+
+    def test_run(self):
+        benchmark = Benchmark(Corpus(size=3), repeat=3, games=1)
+        results = benchmark.run(['put_stone_color', 'bitboard_get_stone'])
+        self.assertEqual(
+                sorted(results['results']),
+                ['bitboard_get_stone', 'put_stone_color'])
+        for result in results['results'].values():
+            self.assertLessEqual(result['min'], result['median'])
+            self.assertLessEqual(result['median'], result['p99'])
+            self.assertGreater(result['ops_per_sec'], 0)
+
+    def test_summarize(self):
+        summary = Benchmark.summarize([float(i) for i in range(1, 101)])
+        self.assertEqual(summary['median'], 50.5)
+        self.assertEqual(summary['p90'], 91.0)
+        self.assertEqual(summary['p99'], 100.0)
+
+    def test_compare(self):
+        base = {'results': {'a': {'median': 1.0}, 'b': {'median': 1.0}}}
+        new = {'results': {
+            'a': {'median': 1.05}, 'b': {'median': 1.5}, 'c': {'median': 1.0},
+        }}
+        self.assertEqual(
+                Benchmark.compare(base, new, 0.1),
+                [('a', 1.05, False), ('b', 1.5, True)])
+
+
+if __name__ == '__main__':
+    t.main()
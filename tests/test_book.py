@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest as t
+import core
+from book import OpeningBook, BookBuilder, BookCPU, BookError
+from test_core import NullController
+
+
+def to_index(x, y):
+    return y * core.Board.Size + x
+
+
+class TestOpeningBook(t.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'opening.book')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_symmetric_positions(self):
+        # The four first moves are the same position in the book.
+        black, white = 0x0000000810000000, 0x0000001008000000
+        keys = set()
+        for index in core.BitBoard.bits_to_coords(
+                core.BitBoard.get_moves_mask(black, white)):
+            bit = core.BitBoard.coord_to_bit(index)
+            flips = core.BitBoard.get_flips_mask(black, white, bit)
+            (key, _) = OpeningBook.normalize(
+                    white ^ flips, black | bit | flips, core.Stone.White)
+            keys.add(key)
+        self.assertEqual(len(keys), 1)
+
+    def test_build_and_probe(self):
+        builder = BookBuilder(max_plies=2)
+        # f5 leaves black 3 discs ahead, and c4 e3 and c4 c3 leave even.
+        builder.add_game([to_index(5, 4)])
+        builder.add_game([to_index(2, 3), to_index(4, 2)])
+        builder.add_game([to_index(2, 3), to_index(2, 2)])
+        # f5 and c4 are the same move in the book.
+        self.assertEqual(builder.write(self.path), 3)
+
+        black, white = 0x0000000810000000, 0x0000001008000000
+        with OpeningBook(self.path) as book:
+            self.assertEqual(len(book), 3)
+            moves = book.probe(black, white, core.Stone.Black)
+            self.assertEqual(len(moves), 1)
+            (index, count, score) = moves[0]
+            self.assertIn(index, [to_index(5, 4), to_index(2, 3),
+                                  to_index(4, 5), to_index(3, 2)])
+            self.assertEqual((count, score), (3, 1.0))
+
+            # The replies are mapped to the actual position.
+            bit = 1 << to_index(2, 3)
+            flips = core.BitBoard.get_flips_mask(black, white, bit)
+            (player, rival) = (white ^ flips, black | bit | flips)
+            replies = sorted(book.probe(player, rival, core.Stone.White))
+            self.assertEqual(replies, [
+                (to_index(2, 2), 1, 0.0), (to_index(4, 2), 1, 0.0)])
+            self.assertIn(
+                    book.get_best_move(player, rival, core.Stone.White),
+                    [to_index(2, 2), to_index(4, 2)])
+
+            # The same position after f5 is found by the symmetry.
+            bit = 1 << to_index(5, 4)
+            flips = core.BitBoard.get_flips_mask(black, white, bit)
+            self.assertEqual(len(book.probe(
+                    white ^ flips, black | bit | flips, core.Stone.White)), 2)
+
+            self.assertEqual(book.probe(player, rival, core.Stone.Black), [])
+            self.assertIsNone(book.get_best_move(black, white,
+                                                 core.Stone.Black, 4))
+
+    def test_book_cpu(self):
+        builder = BookBuilder()
+        builder.add_game([to_index(5, 4)])
+        builder.write(self.path)
+
+        class FallbackCPU:
+            called = False
+
+            def get_put_coord(self, reversi, color):
+                FallbackCPU.called = True
+                return reversi.get_puttable_coords(color)[0]
+
+        reversi = core.Reversi(NullController())
+        with OpeningBook(self.path) as book:
+            cpu = BookCPU(book, FallbackCPU())
+            coord = cpu.get_put_coord(reversi, core.Stone.Black)
+            self.assertIn(coord, reversi.get_puttable_coords(core.Stone.Black))
+            self.assertFalse(FallbackCPU.called)
+            reversi.put_stone_color(coord, core.Stone.Black)
+            cpu.get_put_coord(reversi, core.Stone.White)
+            self.assertTrue(FallbackCPU.called)
+
+    def test_invalid_file(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a book at all')
+        with self.assertRaises(BookError):
+            OpeningBook(self.path)
+        with open(self.path, 'wb') as f:
+            pass
+        with self.assertRaises(BookError):
+            OpeningBook(self.path)
+
+
+if __name__ == '__main__':
+    t.main()
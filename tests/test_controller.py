@@ -0,0 +1,65 @@
+import subprocess
+import sys
+import unittest as t
+import core
+from controller import HeadlessController
+from test_core import board_string_to_matrix
+
+
+class TestHeadlessController(t.TestCase):
+    def test_no_tkinter(self):
+        # Importing the controller does not load the GUI.
+        code = 'import sys, controller; print("tkinter" in sys.modules)'
+        output = subprocess.run(
+                [sys.executable, '-c', code], capture_output=True, text=True,
+                env={'PYTHONPATH': ':'.join(sys.path)})
+        self.assertEqual(output.stdout.strip(), 'False')
+
+    def test_events(self):
+        controller = HeadlessController()
+        calls = []
+        controller.add_callback(lambda name, *args: calls.append(name))
+        self.assertFalse(controller.request_try_put_stone(core.Coord(0, 0)))
+        self.assertTrue(controller.request_try_put_stone(core.Coord(3, 2)))
+        events = controller.get_events()
+        self.assertEqual([e[0] for e in events], [
+            'put_fails', 'apply_diff', 'player_change',
+        ])
+        diff = events[1][1]
+        self.assertEqual(diff.get_changed_coords(),
+                         (core.Coord(3, 2), core.Coord(3, 3)))
+        self.assertEqual(diff.get_counts(), (1, 4))
+        self.assertEqual(calls, [e[0] for e in events])
+        self.assertEqual(controller.get_events(), [])
+        self.assertEqual(
+                controller.request_get_play_color(), core.Stone.White)
+        self.assertIsNone(controller.get_result())
+
+    def test_game_over(self):
+        controller = HeadlessController(max_events=1)
+        reversi = controller.get_reversi()
+        reversi.get_board().set_entire(board_string_to_matrix('''
+            xo......
+            ........
+            ........
+            ........
+            ........
+            ........
+            ........
+            ........
+        '''))
+        self.assertFalse(controller.request_try_put_stone(core.Coord(7, 7)))
+        self.assertTrue(controller.request_try_put_stone(core.Coord(2, 0)))
+        self.assertEqual(controller.get_result(), core.Stone.Black)
+        # The end of the game comes only in the diff, and the older event
+        # is dropped from the queue.
+        events = controller.get_events()
+        self.assertEqual([e[0] for e in events], ['apply_diff'])
+        self.assertTrue(events[0][1].is_game_over())
+
+        controller.request_initialize_board()
+        self.assertIsNone(controller.get_result())
+
+
+if __name__ == '__main__':
+    t.main()
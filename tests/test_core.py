@@ -22,6 +22,14 @@ def board_string_to_matrix(s):
     return matrix
 
 
+class NullController:
+    '''
+    NullController accepts every request from core and does nothing.
+    '''
+    def __getattr__(self, name):
+        return lambda *args: None
+
+
 class TestUtilityFunctions(t.TestCase):
     def test_board_string_to_matrix(self):
         board_string = trim_for_board('''
@@ -88,6 +96,23 @@ class TestCoord(t.TestCase):
         self.assertTrue(base != core.Coord(1, 1))
         self.assertFalse(base != core.Coord(0, 0))
 
+    def test_interned(self):
+        self.assertIs(core.Coord(3, 4), core.Coord(3, 4))
+        self.assertIs(core.Coord(7, 7) + core.Coord(1, 1), core.Coord(8, 8))
+        self.assertIs(core.Coord(0, 0) - core.Coord(1, 0), core.Coord(-1, 0))
+        self.assertEqual(core.Coord(100, 0), core.Coord(100, 0))
+
+    def test_hash(self):
+        coords = {core.Coord(1, 2), core.Coord(1, 2), core.Coord(100, 2)}
+        self.assertEqual(len(coords), 2)
+        self.assertIn(core.Coord(100, 2), coords)
+
+    def test_immutable(self):
+        c = core.Coord(1, 2)
+        with self.assertRaises(AttributeError):
+            c.x = 3
+        self.assertEqual(c.get(), (1, 2))
+
 
 class TestStone(t.TestCase):
     def test_to_char(self):
@@ -153,7 +178,8 @@ class TestBoard(t.TestCase):
         '''
         c = core.Board()
         c.set_entire(board_string_to_matrix(board_string))
-        self.assertEqual(str(c), trim_for_board(board_string))
+        self.assertEqual(
+                str(c), trim_for_board(board_string).replace('*', '.'))
         self.assertEqual(c.get_white_stones_count(), 7)
         self.assertEqual(c.get_black_stones_count(), 3)
 
@@ -170,7 +196,7 @@ class TestBoard(t.TestCase):
             ........
         '''))
         self.assertEqual(c.get_stone(core.Coord(0, 0)), core.Stone.Unset)
-        self.assertEqual(c.get_stone(core.Coord(2, 2)), core.Stone.Surrounding)
+        self.assertEqual(c.get_stone(core.Coord(2, 2)), core.Stone.Unset)
         self.assertEqual(c.get_stone(core.Coord(3, 3)), core.Stone.White)
         self.assertEqual(c.get_stone(core.Coord(3, 4)), core.Stone.Black)
         self.assertEqual(c.get_stone(core.Coord(-1, 0)), core.Stone.OutOfRange)
@@ -243,11 +269,299 @@ class TestBoard(t.TestCase):
         c.init_state()
         self.assertEqual(str(c), initial_state)
 
+    def test_get_bits(self):
+        # The bitmasks follow set_stone(), put_stone_bits() and set_entire().
+        c = core.Board()
+        c.set_stone(core.Coord(0, 0), core.Stone.White)
+        c.set_stone(core.Coord(1, 0), core.Stone.Black)
+        c.set_stone(core.Coord(0, 0), core.Stone.Black)
+        self.assertEqual(c.get_bits(core.Stone.White), 0)
+        self.assertEqual(c.get_bits(core.Stone.Black), 0b11)
+        c.put_stone_bits(core.Stone.White, 1 << 2, 0b10)
+        self.assertEqual(c.get_bits(core.Stone.White), 0b110)
+        self.assertEqual(c.get_empty_mask(), core.BitBoard.FullMask ^ 0b111)
+        c.remove_stone_bits(core.Stone.White, 1 << 2, 0b10)
+        self.assertEqual(c.get_bits(core.Stone.Black), 0b11)
+        c.set_entire(board_string_to_matrix('''
+            o.......
+            ........
+            ........
+            ........
+            ........
+            ........
+            ........
+            .......x
+        '''))
+        self.assertEqual(c.get_bits(core.Stone.White), 1)
+        self.assertEqual(c.get_bits(core.Stone.Black), 1 << 63)
+
+
+class TestBitBoard(t.TestCase):
+    def test_str(self):
+        c = core.BitBoard()
+        self.assertEqual(str(c), str(core.Board()))
+
+    def test_set_entire(self):
+        board_string = '''
+            ******..
+            *o**x*..
+            ******..
+            ..*ox*..
+            ..*xo**.
+            ..***o**
+            ....*ooo
+            ....****
+        '''
+        c = core.BitBoard()
+        c.set_entire(board_string_to_matrix(board_string))
+        expected = board_string.replace('*', '.')
+        self.assertEqual(str(c), trim_for_board(expected))
+        self.assertEqual(c.get_entire(), board_string_to_matrix(expected))
+        self.assertEqual(c.get_stones_counts(), [7, 3])
+
+    def test_get_stone(self):
+        c = core.BitBoard()
+        c.set_entire(board_string_to_matrix('''
+            ........
+            ........
+            ..****..
+            ..*ox*..
+            ..*xo*..
+            ..****..
+            ........
+            ........
+        '''))
+        self.assertEqual(c.get_stone(core.Coord(0, 0)), core.Stone.Unset)
+        self.assertEqual(c.get_stone(core.Coord(2, 2)), core.Stone.Unset)
+        self.assertEqual(c.get_stone(core.Coord(3, 3)), core.Stone.White)
+        self.assertEqual(c.get_stone(core.Coord(4, 3)), core.Stone.Black)
+        self.assertEqual(c.get_stone(core.Coord(8, 0)), core.Stone.OutOfRange)
+        self.assertEqual(c.get_stone(core.Coord(0, -1)), core.Stone.OutOfRange)
+
+    def test_set_stone(self):
+        c = core.BitBoard()
+        p = core.Coord(7, 7)
+        self.assertTrue(c.set_stone(p, core.Stone.White))
+        self.assertEqual(c.get_stone(p), core.Stone.White)
+        self.assertEqual(c.get_bits(core.Stone.White), 1 << 63)
+        self.assertEqual(c.get_stones_counts(), [1, 0])
+
+        c.set_stone(p, core.Stone.Black)
+        self.assertEqual(c.get_stones_counts(), [0, 1])
+        self.assertEqual(c.get_bits(core.Stone.White), 0)
+
+        c.set_stone(p, core.Stone.Unset)
+        self.assertEqual(c.get_stones_counts(), [0, 0])
+        self.assertEqual(c.get_empty_mask(), core.BitBoard.FullMask)
+        self.assertFalse(c.set_stone(core.Coord(-1, -1), core.Stone.White))
+
+    def test_get_moves_mask(self):
+        c = core.BitBoard()
+        c.set_entire(board_string_to_matrix('''
+            ........
+            ........
+            .*****..
+            .*xxx*..
+            .*xox*..
+            .*xxx*..
+            .*****..
+            ........
+        '''))
+        white = c.get_bits(core.Stone.White)
+        black = c.get_bits(core.Stone.Black)
+        self.assertEqual(
+                core.BitBoard.bits_to_coords(
+                    core.BitBoard.get_moves_mask(white, black)),
+                [
+                    core.Coord(1, 2),
+                    core.Coord(3, 2),
+                    core.Coord(5, 2),
+                    core.Coord(1, 4),
+                    core.Coord(5, 4),
+                    core.Coord(1, 6),
+                    core.Coord(3, 6),
+                    core.Coord(5, 6),
+                ])
+        self.assertEqual(core.BitBoard.get_moves_mask(black, white), 0)
+
+    def test_get_moves_mask_no_wrap(self):
+        c = core.BitBoard()
+        c.set_entire(board_string_to_matrix('''
+            .......o
+            x.......
+            ........
+            ........
+            ........
+            ........
+            ........
+            ........
+        '''))
+        self.assertEqual(
+                core.BitBoard.get_moves_mask(
+                    c.get_bits(core.Stone.White),
+                    c.get_bits(core.Stone.Black)),
+                0)
+
+
+class TestZobrist(t.TestCase):
+    board_string = '''
+        ........
+        ........
+        ........
+        ...ox...
+        ...xo...
+        ....x...
+        ........
+        ........
+    '''
+
+    def check_hash(self, board_class):
+        c1 = board_class()
+        c1.set_entire(board_string_to_matrix(self.board_string))
+
+        c2 = board_class()
+        c2.set_stone(core.Coord(4, 5), core.Stone.White)
+        for (x, y, stone) in [
+                (3, 3, core.Stone.White),
+                (4, 4, core.Stone.White),
+                (4, 3, core.Stone.Black),
+                (3, 4, core.Stone.Black),
+                (4, 5, core.Stone.Black),
+                ]:
+            c2.set_stone(core.Coord(x, y), stone)
+        self.assertEqual(c1.get_hash(), c2.get_hash())
+
+        key = c1.get_hash()
+        c1.set_side_to_move(core.Stone.White)
+        self.assertEqual(c1.get_hash(), key ^ core.Zobrist.SideKey)
+        c1.set_side_to_move(core.Stone.Black)
+        self.assertEqual(c1.get_hash(), key)
+
+        c1.set_stone(core.Coord(0, 0), core.Stone.White)
+        self.assertNotEqual(c1.get_hash(), key)
+        c1.set_stone(core.Coord(0, 0), core.Stone.Unset)
+        self.assertEqual(c1.get_hash(), key)
+
+        c1.init_state()
+        self.assertEqual(c1.get_hash(), 0)
+
+    def test_board(self):
+        self.check_hash(core.Board)
+
+    def test_bit_board(self):
+        self.check_hash(core.BitBoard)
+
+    def test_do_move(self):
+        r = core.Reversi(NullController())
+        board = r.get_board()
+        key = board.get_hash()
+        r.do_move(core.Coord(4, 5), core.Stone.Black)
+        self.assertEqual(board.get_side_to_move(), core.Stone.White)
+        self.assertEqual(
+                board.get_hash(),
+                core.Zobrist.hash_bits(
+                    board.get_bits(core.Stone.White),
+                    board.get_bits(core.Stone.Black),
+                    core.Stone.White))
+        r.undo_move()
+        self.assertEqual(board.get_hash(), key)
+
+    def test_set_entire_keeps_side_to_move(self):
+        # Both boards keep the side to move, and so agree on the hash.
+        entire = board_string_to_matrix('''
+            ........
+            ........
+            ........
+            ...ox...
+            ...xx...
+            ........
+            ........
+            ........
+        ''')
+        hashes = []
+        for board_class in [core.Board, core.BitBoard]:
+            board = board_class()
+            board.set_side_to_move(core.Stone.White)
+            board.set_entire(entire)
+            self.assertEqual(board.get_side_to_move(), core.Stone.White)
+            hashes.append(board.get_hash())
+        self.assertEqual(hashes[0], hashes[1])
+
+
+class TestSymmetry(t.TestCase):
+    Cells = [
+        lambda x, y: (x, y),
+        lambda x, y: (7 - y, x),
+        lambda x, y: (7 - x, 7 - y),
+        lambda x, y: (y, 7 - x),
+        lambda x, y: (7 - x, y),
+        lambda x, y: (x, 7 - y),
+        lambda x, y: (y, x),
+        lambda x, y: (7 - y, 7 - x),
+    ]
+
+    def test_transform(self):
+        for t_, f in enumerate(self.Cells):
+            for i in range(64):
+                (x, y) = f(i % 8, i // 8)
+                self.assertEqual(
+                        core.Symmetry.transform(1 << i, t_), 1 << (y * 8 + x))
+                self.assertEqual(core.Symmetry.transform_index(
+                        core.Symmetry.transform_index(i, t_),
+                        core.Symmetry.get_inverse(t_)), i)
+        bits = 0x0123456789abcdef
+        self.assertEqual(
+                core.Symmetry.get_all(bits),
+                tuple(core.Symmetry.transform(bits, t_) for t_ in range(8)))
+
+    def test_canonical_hash(self):
+        # The four first moves lead to the same canonical position.
+        keys = set()
+        for coord in [core.Coord(2, 3), core.Coord(3, 2),
+                      core.Coord(4, 5), core.Coord(5, 4)]:
+            r = core.Reversi(NullController())
+            r.put_stone_color(coord, core.Stone.Black)
+            board = r.get_board()
+            keys.add(board.get_canonical_hash())
+
+            # The canonical move maps back to the actual one.
+            (key, t_) = core.Symmetry.get_canonical_hash(
+                    board.get_bits(core.Stone.White),
+                    board.get_bits(core.Stone.Black), core.Stone.White)
+            self.assertEqual(key, board.get_canonical_hash())
+            index = coord.y * 8 + coord.x
+            canonical = core.Symmetry.transform_index(index, t_)
+            self.assertEqual(core.Symmetry.transform_index(
+                    canonical, core.Symmetry.get_inverse(t_)), index)
+        self.assertEqual(len(keys), 1)
+
+        r = core.Reversi(NullController())
+        self.assertNotIn(r.get_board().get_canonical_hash(), keys)
+
+    def test_transform_board(self):
+        board = core.BitBoard()
+        board.set_entire(board_string_to_matrix(TestZobrist.board_string))
+        board.set_side_to_move(core.Stone.White)
+        transformed = core.Symmetry.transform_board(board, 6)
+        self.assertEqual(str(transformed), trim_for_board('''
+            ........
+            ........
+            ........
+            ...ox...
+            ...xox..
+            ........
+            ........
+            ........
+        '''))
+        self.assertEqual(transformed.get_side_to_move(), core.Stone.White)
+        self.assertEqual(
+                transformed.get_canonical_hash(), board.get_canonical_hash())
+
 
 # TODO: Add tests for unputtable place
 class TestReversi(t.TestCase):
     def test_can_put_here(self):
-        r = core.Reversi()
+        r = core.Reversi(NullController())
         self.assertTrue(r.can_put_here(core.Coord(4, 2), core.Stone.White))
         self.assertTrue(r.can_put_here(core.Coord(2, 3), core.Stone.Black))
         self.assertFalse(r.can_put_here(core.Coord(4, 2), core.Stone.Black))
@@ -257,7 +571,7 @@ class TestReversi(t.TestCase):
         self.assertFalse(r.can_put_here(core.Coord(8, 8), core.Stone.White))
 
     def test_get_sandwiched_stones_coords(self):
-        r = core.Reversi()
+        r = core.Reversi(NullController())
         r.get_board().set_entire(board_string_to_matrix('''
             **xxxxxx
             *xx*****
@@ -286,7 +600,7 @@ class TestReversi(t.TestCase):
             ])
 
     def test_get_all_sandwiched_stones_coords_1(self):
-        r = core.Reversi()
+        r = core.Reversi(NullController())
         r.get_board().set_entire(board_string_to_matrix('''
             **xxxxxx
             *xx*****
@@ -309,7 +623,7 @@ class TestReversi(t.TestCase):
                 ])
 
     def test_get_all_sandwiched_stones_coords_2(self):
-        r = core.Reversi()
+        r = core.Reversi(NullController())
         r.get_board().set_entire(board_string_to_matrix('''
             ........
             ........
@@ -327,7 +641,7 @@ class TestReversi(t.TestCase):
                 [])
 
     def test_put_stone_color_1(self):
-        r = core.Reversi()
+        r = core.Reversi(NullController())
         r.get_board().set_entire(board_string_to_matrix('''
             ........
             ***.....
@@ -340,12 +654,12 @@ class TestReversi(t.TestCase):
         '''))
         r.put_stone_color(core.Coord(1, 1), core.Stone.White)
         self.assertEqual(str(r.get_board()), trim_for_board('''
-            ***.....
-            *o*.....
-            *o*.....
-            *o*.....
-            *o*.....
-            ***.....
+            ........
+            .o......
+            .o......
+            .o......
+            .o......
+            ........
             ........
             ........
         '''))
@@ -353,7 +667,7 @@ class TestReversi(t.TestCase):
         self.assertEqual(r.get_board().get_black_stones_count(), 0)
 
     def test_put_stone_color_2(self):
-        r = core.Reversi()
+        r = core.Reversi(NullController())
         r.get_board().set_entire(board_string_to_matrix('''
             ........
             ****....
@@ -366,20 +680,20 @@ class TestReversi(t.TestCase):
         '''))
         r.put_stone_color(core.Coord(1, 1), core.Stone.White)
         self.assertEqual(str(r.get_board()), trim_for_board('''
-            ***.....
-            *o**....
-            *oo**...
-            *o*o**..
-            *o**o**.
-            *x***o*.
-            *o*.***.
-            ***.....
+            ........
+            .o......
+            .oo.....
+            .o.o....
+            .o..o...
+            .x...o..
+            .o......
+            ........
         '''))
         self.assertEqual(r.get_board().get_white_stones_count(), 9)
         self.assertEqual(r.get_board().get_black_stones_count(), 1)
 
     def test_put_stone_color_3(self):
-        r = core.Reversi()
+        r = core.Reversi(NullController())
         r.get_board().set_entire(board_string_to_matrix('''
             .*******
             **xxxxxx
@@ -392,20 +706,20 @@ class TestReversi(t.TestCase):
         '''))
         r.put_stone_color(core.Coord(1, 1), core.Stone.White)
         self.assertEqual(str(r.get_board()), trim_for_board('''
-            ********
-            *oxxxxxx
-            *oo*****
-            *o*o**..
-            *o**o**.
-            *****o*.
-            ....***.
+            ........
+            .oxxxxxx
+            .oo.....
+            .o.o....
+            .o..o...
+            .....o..
+            ........
             ........
         '''))
         self.assertEqual(r.get_board().get_white_stones_count(), 8)
         self.assertEqual(r.get_board().get_black_stones_count(), 6)
 
     def test_put_stone_color_4(self):
-        r = core.Reversi()
+        r = core.Reversi(NullController())
         r.get_board().set_entire(board_string_to_matrix('''
             ........
             .*******
@@ -419,42 +733,44 @@ class TestReversi(t.TestCase):
         r.put_stone_color(core.Coord(4, 4), core.Stone.White)
         self.assertEqual(str(r.get_board()), trim_for_board('''
             ........
-            .*******
-            .*ooooo*
-            .*ooooo*
-            .*ooooo*
-            .*ooooo*
-            .*ooooo*
-            .*******
+            ........
+            ..ooooo.
+            ..ooooo.
+            ..ooooo.
+            ..ooooo.
+            ..ooooo.
+            ........
         '''))
         self.assertEqual(r.get_board().get_white_stones_count(), 25)
         self.assertEqual(r.get_board().get_black_stones_count(), 0)
 
     def test_proceed_to_next_1(self):
-        r = core.Reversi()
-        self.assertEqual(r.get_player_color(), core.Stone.White)
-        r.proceed_to_next()
+        r = core.Reversi(NullController())
         self.assertEqual(r.get_player_color(), core.Stone.Black)
+        self.assertTrue(r.put_stone(core.Coord(3, 2)))
+        r.proceed_to_next()
+        self.assertEqual(r.get_player_color(), core.Stone.White)
 
     def test_proceed_to_next_2(self):
-        r = core.Reversi()
-        self.assertEqual(r.get_player_color(), core.Stone.White)
+        r = core.Reversi(NullController())
+        self.assertEqual(r.get_player_color(), core.Stone.Black)
         r.get_board().set_entire(board_string_to_matrix('''
+            xx......
+            oo......
+            ........
+            ........
             ........
             ........
-            .*****..
-            .*xxx*..
-            .*xox*..
-            .*xxx*..
-            .*****..
             ........
+            .......o
         '''))
+        self.assertTrue(r.put_stone(core.Coord(0, 2)))
         r.proceed_to_next()
-        # Black has no place to put stone, so they have to pass.
-        self.assertEqual(r.get_player_color(), core.Stone.White)
+        # White has no place to put stone, so they have to pass.
+        self.assertEqual(r.get_player_color(), core.Stone.Black)
 
     def test_get_puttable_coords(self):
-        r = core.Reversi()
+        r = core.Reversi(NullController())
         r.get_board().set_entire(board_string_to_matrix('''
             ........
             ........
@@ -477,9 +793,177 @@ class TestReversi(t.TestCase):
         ])
 
 
+class TestFrontier(t.TestCase):
+    def test_init_state(self):
+        r = core.Reversi(NullController())
+        self.assertEqual(
+                set(r.get_frontier_coords()),
+                {core.Coord(x, y)
+                    for x in range(2, 6) for y in range(2, 6)} -
+                {core.Coord(x, y) for x in (3, 4) for y in (3, 4)})
+        self.assertNotIn('*', str(r.get_board()))
+
+    def test_put_stone_color(self):
+        r = core.Reversi(NullController())
+        r.put_stone_color(core.Coord(3, 2), core.Stone.Black)
+        frontier = r.get_frontier_coords()
+        self.assertNotIn(core.Coord(3, 2), frontier)
+        for c in [core.Coord(2, 1), core.Coord(3, 1), core.Coord(4, 1)]:
+            self.assertIn(c, frontier)
+        self.assertEqual(len(frontier), 14)
+
+    def test_set_entire(self):
+        r = core.Reversi(NullController())
+        r.get_board().set_entire(board_string_to_matrix('''
+            ........
+            ........
+            ........
+            ........
+            ........
+            ........
+            ......ox
+            ........
+        '''))
+        self.assertEqual(len(r.get_frontier_coords()), 7)
+        self.assertEqual(
+                r.get_puttable_coords(core.Stone.Black), [core.Coord(5, 6)])
+
+
+class TestBoardDiff(t.TestCase):
+    class DiffController(NullController):
+        def __init__(self):
+            self.diffs = []
+
+        def request_apply_diff(self, diff):
+            self.diffs.append(diff)
+
+    def put(self, board_string, coord, color):
+        controller = TestBoardDiff.DiffController()
+        r = core.Reversi(controller)
+        if board_string is not None:
+            r.get_board().set_entire(board_string_to_matrix(board_string))
+        self.assertTrue(r.put_stone_color(coord, color))
+        self.assertEqual(len(controller.diffs), 1)
+        return controller.diffs[0]
+
+    def test_move(self):
+        diff = self.put(None, core.Coord(3, 2), core.Stone.Black)
+        self.assertEqual(diff.get_coord(), core.Coord(3, 2))
+        self.assertEqual(diff.get_color(), core.Stone.Black)
+        self.assertEqual(diff.get_flipped(), (core.Coord(3, 3),))
+        self.assertEqual(diff.get_counts(), (1, 4))
+        self.assertEqual(diff.get_next_color(), core.Stone.White)
+        self.assertIsNone(diff.get_passed())
+        self.assertFalse(diff.is_game_over())
+        with self.assertRaises(AttributeError):
+            diff.color = core.Stone.White
+
+    def test_pass(self):
+        diff = self.put('''
+            xo......
+            xo......
+            ........
+            ........
+            ........
+            ........
+            ........
+            .......o
+        ''', core.Coord(2, 0), core.Stone.Black)
+        # White cannot put anywhere, so black moves again.
+        self.assertEqual(diff.get_passed(), core.Stone.White)
+        self.assertEqual(diff.get_next_color(), core.Stone.Black)
+        self.assertIsNone(diff.get_result())
+
+    def test_proceed_to_next_by_diff(self):
+        # The pass comes only in the diff, and the turn stays with black.
+        class Controller(TestBoardDiff.DiffController):
+            def request_notify_need_pass(self, color):
+                raise AssertionError('The pass is notified twice')
+
+        controller = Controller()
+        r = core.Reversi(controller)
+        r.get_board().set_entire(board_string_to_matrix('''
+            xo......
+            xo......
+            ........
+            ........
+            ........
+            ........
+            ........
+            .......o
+        '''))
+        self.assertTrue(r.put_stone(core.Coord(2, 0)))
+        r.proceed_to_next()
+        self.assertEqual(r.get_player_color(), core.Stone.Black)
+        self.assertIs(r.get_last_diff(), controller.diffs[-1])
+        r.undo_move()
+        self.assertIsNone(r.get_last_diff())
+
+    def test_game_over(self):
+        diff = self.put('''
+            xo......
+            ........
+            ........
+            ........
+            ........
+            ........
+            ........
+            ........
+        ''', core.Coord(2, 0), core.Stone.Black)
+        self.assertIsNone(diff.get_next_color())
+        self.assertEqual(diff.get_result(), core.Stone.Black)
+        self.assertTrue(diff.is_game_over())
+        self.assertEqual(diff.to_dict(), {
+            'coord': [2, 0], 'color': core.Stone.Black, 'flipped': [[1, 0]],
+            'counts': [0, 3], 'next': None, 'passed': None,
+            'result': core.Stone.Black})
+
+
+class TestMoveStack(t.TestCase):
+    class FailingController:
+        def __getattr__(self, name):
+            raise AssertionError(f'{name} must not be called')
+
+    def check_do_and_undo(self, board_class):
+        r = core.Reversi(TestMoveStack.FailingController(), board_class)
+        snapshots = []
+        color = core.Stone.Black
+        for _ in range(20):
+            coords = r.get_puttable_coords(color)
+            if len(coords) == 0:
+                break
+            snapshots.append((
+                str(r.get_board()),
+                r.get_board().get_stones_counts(),
+                r.get_frontier_mask()))
+            self.assertTrue(r.do_move(coords[len(coords) // 2], color))
+            color = core.Stone.get_rival_stone_color(color)
+
+        while len(snapshots) > 0:
+            self.assertTrue(r.undo_move())
+            self.assertEqual(
+                    (
+                        str(r.get_board()),
+                        r.get_board().get_stones_counts(),
+                        r.get_frontier_mask()),
+                    snapshots.pop())
+        self.assertFalse(r.undo_move())
+
+    def test_do_and_undo_move(self):
+        self.check_do_and_undo(core.BitBoard)
+        self.check_do_and_undo(core.Board)
+
+    def test_do_move_fails(self):
+        r = core.Reversi(TestMoveStack.FailingController())
+        self.assertFalse(r.do_move(core.Coord(0, 0), core.Stone.Black))
+        self.assertFalse(r.do_move(core.Coord(3, 3), core.Stone.Black))
+        self.assertFalse(r.do_move(core.Coord(8, 8), core.Stone.Black))
+        self.assertFalse(r.undo_move())
+
+
 class TestCPU(t.TestCase):
     def test_get_base_score_of_coord_1(self):
-        r = core.Reversi()
+        r = core.Reversi(NullController())
         for c in [
                 core.Coord(0, 0),
                 core.Coord(7, 0),
@@ -492,7 +976,7 @@ class TestCPU(t.TestCase):
                     'Coord: ' + str(c))
 
     def test_get_base_score_of_coord_2(self):
-        r = core.Reversi()
+        r = core.Reversi(NullController())
         r.get_board().set_entire(board_string_to_matrix('''
             oxx**xxo
             x*******
@@ -516,7 +1000,7 @@ class TestCPU(t.TestCase):
                     'Coord: ' + str(c))
 
     def test_get_base_score_of_coord_3(self):
-        r = core.Reversi()
+        r = core.Reversi(NullController())
         r.get_board().set_entire(board_string_to_matrix('''
             o*....*o
             **....**
@@ -540,7 +1024,7 @@ class TestCPU(t.TestCase):
                     'Coord: ' + str(c))
 
     def test_get_base_score_of_coord_4(self):
-        r = core.Reversi()
+        r = core.Reversi(NullController())
         r.get_board().set_entire(board_string_to_matrix('''
             .*....*.
             **....**
@@ -574,7 +1058,7 @@ class TestCPU(t.TestCase):
                     'Coord: ' + str(c))
 
     def test_get_base_score_of_coord_5(self):
-        r = core.Reversi()
+        r = core.Reversi(NullController())
         r.get_board().set_entire(board_string_to_matrix('''
             ........
             ........
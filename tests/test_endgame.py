@@ -0,0 +1,99 @@
+import itertools
+import unittest as t
+import core
+import endgame
+import search
+from test_core import NullController, board_string_to_matrix
+
+
+def brute_force(player, rival, passed=False):
+    moves = core.BitBoard.get_moves_mask(player, rival)
+    if moves == 0:
+        if passed:
+            return core.BitBoard.popcount(player) - \
+                core.BitBoard.popcount(rival)
+        return -brute_force(rival, player, True)
+    best = -64
+    for c in core.BitBoard.bits_to_coords(moves):
+        bit = core.BitBoard.coord_to_bit(c)
+        flips = core.BitBoard.get_flips_mask(player, rival, bit)
+        best = max(best, -brute_force(rival ^ flips, player | bit | flips))
+    return best
+
+
+class TestEndgameSolver(t.TestCase):
+    board_string = '''
+        xxxxxxxx
+        xooooxxx
+        xoxxoxox
+        xoxoxo.x
+        xooxxxo.
+        xoxoxxo.
+        xxooo...
+        xxxxx.o.
+    '''
+
+    def get_bits(self):
+        board = core.BitBoard()
+        board.set_entire(board_string_to_matrix(self.board_string))
+        return (
+            board.get_bits(core.Stone.Black),
+            board.get_bits(core.Stone.White))
+
+    def test_exact(self):
+        (black, white) = self.get_bits()
+        solver = endgame.EndgameSolver()
+        self.assertEqual(solver.solve(black, white), brute_force(black, white))
+        self.assertEqual(solver.solve(white, black), brute_force(white, black))
+
+    def test_win_loss_draw(self):
+        (black, white) = self.get_bits()
+        exact = brute_force(black, white)
+        result = endgame.EndgameSolver().solve(
+                black, white, endgame.EndgameSolver.Mode.WinLossDraw)
+        self.assertEqual((result > 0) - (result < 0), (exact > 0) - (exact < 0))
+
+    def test_few_empties(self):
+        # Fill all but 2 or 3 of the empty cells, and compare the solver
+        # with the brute force, passes included.
+        (black, white) = self.get_bits()
+        solver = endgame.EndgameSolver()
+        empty = core.BitBoard.FullMask ^ (black | white)
+        cells = [1 << i for i in range(64) if empty >> i & 1]
+        for n in (2, 3):
+            for kept in itertools.combinations(cells, n):
+                filled = [c for c in cells if c not in kept]
+                player = black | sum(filled[0::2])
+                rival = white | sum(filled[1::2])
+                for (p, r) in [(player, rival), (rival, player)]:
+                    self.assertEqual(solver.solve(p, r), brute_force(p, r))
+
+        # Neither player can put stone on the two corners.
+        corners = (1 << 0) | (1 << 63)
+        full = core.BitBoard.FullMask ^ corners
+        self.assertEqual(solver.solve(full, 0), 62)
+        # The player passes, and the rival takes a corner by the diagonal.
+        (player, rival) = (full ^ (1 << 27), 1 << 27)
+        self.assertEqual(solver.solve(player, rival),
+                         brute_force(player, rival))
+        self.assertEqual(solver.solve(player | 1 << 62, rival),
+                         brute_force(player | 1 << 62, rival))
+
+    def test_game_over(self):
+        solver = endgame.EndgameSolver()
+        self.assertEqual(solver.get_best_move(0b111, 0b1 << 63), (None, 2))
+
+    def test_search_cpu(self):
+        r = core.Reversi(NullController())
+        r.get_board().set_entire(board_string_to_matrix(self.board_string))
+        (black, white) = self.get_bits()
+        cpu = search.SearchCPU(time_limit=None)
+        coord = cpu.get_put_coord(r, core.Stone.Black)
+        stats = cpu.get_last_stats()
+        self.assertTrue(stats['endgame'])
+
+        bit = core.BitBoard.coord_to_bit(coord)
+        flips = core.BitBoard.get_flips_mask(black, white, bit)
+        self.assertEqual(
+                -brute_force(white ^ flips, black | bit | flips),
+                brute_force(black, white))
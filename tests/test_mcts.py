@@ -0,0 +1,53 @@
+import unittest as t
+import core
+import mcts
+from test_core import NullController, board_string_to_matrix
+
+
+class TestMCTSCPU(t.TestCase):
+    def test_get_put_coord(self):
+        r = core.Reversi(NullController())
+        cpu = mcts.MCTSCPU(time_limit=None, iterations=200, seed=0)
+        coord = cpu.get_put_coord(r, core.Stone.Black)
+        self.assertIn(coord, r.get_puttable_coords(core.Stone.Black))
+        stats = cpu.get_last_stats()
+        self.assertEqual(stats['playouts'], 200)
+        self.assertEqual(stats['reused'], 0)
+        self.assertGreater(stats['playouts_per_sec'], 0)
+
+    def test_reuse_subtree(self):
+        r = core.Reversi(NullController())
+        cpu = mcts.MCTSCPU(time_limit=None, iterations=300, seed=0)
+        r.put_stone_color(
+                cpu.get_put_coord(r, core.Stone.Black), core.Stone.Black)
+        r.put_stone_color(
+                r.get_puttable_coords(core.Stone.White)[0], core.Stone.White)
+        cpu.get_put_coord(r, core.Stone.Black)
+        self.assertGreater(cpu.get_last_stats()['reused'], 0)
+
+    def test_takes_winning_move(self):
+        r = core.Reversi(NullController())
+        r.get_board().set_entire(board_string_to_matrix('''
+            xxxxxxxx
+            xxxxxxxx
+            xxxxxxxx
+            xxxxxxxx
+            xxxxxxxx
+            xxxxxxxx
+            xxxxxxxx
+            xxxxxxo.
+        '''))
+        cpu = mcts.MCTSCPU(time_limit=None, iterations=10, seed=0)
+        self.assertEqual(
+                cpu.get_put_coord(r, core.Stone.Black), core.Coord(7, 7))
+
+    def test_playout(self):
+        cpu = mcts.MCTSCPU(time_limit=None, iterations=1, seed=0)
+        black, white = 0x0000000810000000, 0x0000001008000000
+        for _ in range(20):
+            diff = cpu.playout(black, white)
+            self.assertLessEqual(abs(diff), 64)
+
+    def test_budget_required(self):
+        with self.assertRaises(BaseException):
+            mcts.MCTSCPU(time_limit=None, iterations=None)
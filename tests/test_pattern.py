@@ -0,0 +1,101 @@
+import os
+import random
+import tempfile
+import unittest as t
+import core
+import search
+from pattern import PatternEvaluator, np
+
+
+def play_random_moves(count, seed):
+    # Return the list of (player, rival, color, bit, flips) of random moves.
+    rand = random.Random(seed)
+    player, rival = 0x0000000810000000, 0x0000001008000000
+    color = core.Stone.Black
+    moves = []
+    for _ in range(count):
+        mask = core.BitBoard.get_moves_mask(player, rival)
+        if mask == 0:
+            break
+        bits = [1 << i for i in range(64) if mask >> i & 1]
+        bit = rand.choice(bits)
+        flips = core.BitBoard.get_flips_mask(player, rival, bit)
+        moves.append((player, rival, color, bit, flips))
+        player, rival = rival ^ flips, player | bit | flips
+        color = core.Stone.get_rival_stone_color(color)
+    return moves
+
+
+@t.skipIf(np is None, 'numpy is not installed')
+class TestPatternEvaluator(t.TestCase):
+    def test_instances(self):
+        instances = PatternEvaluator.build_instances()
+        self.assertEqual(len(instances), 38)
+        counts = {}
+        for (name, _) in instances:
+            counts[name] = counts.get(name, 0) + 1
+        self.assertEqual(counts['diag8'], 2)
+        self.assertEqual(counts['corner3x3'], 4)
+
+    def test_default_weights(self):
+        # The default weights sum up to the square classes.
+        evaluator = PatternEvaluator()
+        corner, around = 1 << 0, 1 << 9
+        self.assertEqual(evaluator(corner, around), 300)
+        self.assertEqual(evaluator(around, corner), -300)
+        self.assertEqual(evaluator(0x0000000810000000, 0x0000001008000000), 0)
+
+    def test_incremental(self):
+        evaluator = PatternEvaluator()
+        weights = evaluator.get_weights()
+        rand = np.random.default_rng(0)
+        for name in weights:
+            weights[name] = rand.normal(size=weights[name].shape)
+        evaluator.set_weights(weights)
+
+        moves = play_random_moves(40, 1)
+        (player, rival, color, _, _) = moves[0]
+        evaluator.set_position(player, rival, color)
+        for (player, rival, color, bit, flips) in moves:
+            evaluator.apply_move(color, bit, flips)
+            after = (player | bit | flips, rival ^ flips)
+            self.assertTrue(np.array_equal(
+                    evaluator._PatternEvaluator__indexes[color],
+                    evaluator.get_indexes(*after)))
+            self.assertEqual(
+                    evaluator(*after), PatternEvaluator(weights)(*after))
+
+        for _ in moves:
+            evaluator.undo_move()
+        (player, rival, _, _, _) = moves[0]
+        self.assertTrue(np.array_equal(
+                evaluator._PatternEvaluator__indexes[moves[0][2]],
+                evaluator.get_indexes(player, rival)))
+
+    def test_save_and_load(self):
+        evaluator = PatternEvaluator()
+        weights = evaluator.get_weights()
+        weights['edge_x'][5] = 42.0
+        evaluator.set_weights(weights)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'weights.npz')
+            evaluator.save_weights(path)
+            loaded = PatternEvaluator(path)
+        self.assertEqual(loaded.get_weights()['edge_x'][5], 42.0)
+
+        del weights['row1']
+        with self.assertRaises(BaseException):
+            evaluator.set_weights(weights)
+
+    def test_search(self):
+        cpu = search.SearchCPU(
+                max_depth=3, time_limit=None, evaluator=PatternEvaluator())
+        player, rival = 0x0000000810000000, 0x0000001008000000
+        index = cpu.search(player, rival, core.Stone.Black)
+        self.assertTrue(
+                core.BitBoard.get_moves_mask(player, rival) >> index & 1)
+        self.assertEqual(cpu.get_last_stats()['depth'], 3)
+
+
+if __name__ == '__main__':
+    t.main()
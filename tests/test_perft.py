@@ -0,0 +1,53 @@
+import unittest as t
+import core
+from perft import Perft
+from test_core import NullController, board_string_to_matrix
+
+
+class TestPerft(t.TestCase):
+    # Known counts from the initial position.
+    Counts = [1, 4, 12, 56, 244, 1396, 8200]
+
+    def test_count(self):
+        black, white = 0x0000000810000000, 0x0000001008000000
+        for depth, n in enumerate(self.Counts):
+            self.assertEqual(Perft.count(black, white, depth), n)
+
+    def test_same_as_reversi(self):
+        r = core.Reversi(NullController())
+        self.assertEqual(
+                Perft.count_reversi(r, core.Stone.Black, 4), self.Counts[4])
+
+        # A position with passes and the end of the game in the tree.
+        r.get_board().set_entire(board_string_to_matrix('''
+            ..xxxxx.
+            o.ooxox.
+            xxxxoxxx
+            xxxoooxx
+            xxxxoxox
+            xxxxxoxx
+            xxxxxxox
+            xxxxxxxo
+        '''))
+        board = r.get_board()
+        white = board.get_bits(core.Stone.White)
+        black = board.get_bits(core.Stone.Black)
+        for depth in range(1, 7):
+            self.assertEqual(
+                    Perft.count(white, black, depth),
+                    Perft.count_reversi(r, core.Stone.White, depth))
+
+    def test_divide(self):
+        black, white = 0x0000000810000000, 0x0000001008000000
+        divided = Perft.divide(black, white, 5)
+        self.assertEqual(len(divided), 4)
+        self.assertEqual(sum(n for (_, n) in divided), self.Counts[5])
+        self.assertEqual(Perft.divide(black, white, 5, workers=2), divided)
+
+        # Only a pass at the root.
+        divided = Perft.divide((1 << 1) | (1 << 9), 1 << 0, 2)
+        self.assertEqual(divided, [(None, 2)])
+
+
+if __name__ == '__main__':
+    t.main()
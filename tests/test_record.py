@@ -0,0 +1,116 @@
+import os
+import tempfile
+import unittest as t
+import core
+from record import GameRecord, RecordWriter, RecordReader, RecordError
+from simulator import Simulator
+from test_core import NullController
+
+
+class TestGameRecord(t.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'games.rec')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_illegal_moves(self):
+        with self.assertRaises(RecordError):
+            GameRecord([0])
+        with self.assertRaises(RecordError):
+            GameRecord([GameRecord.Pass])
+        self.assertEqual(GameRecord([37]).get_disc_diff(), 3)
+
+    def test_write_and_read(self):
+        results = list(Simulator('cpu', 'random', seed=3).run(5))
+        records = [
+            GameRecord.from_colored_moves(r['moves'], r['colors'])
+            for r in results
+        ]
+        with RecordWriter(self.path) as writer:
+            for record in records[:3]:
+                writer.write(record)
+        # Records are appended to the existing file.
+        with RecordWriter(self.path) as writer:
+            for record in records[3:]:
+                writer.write(record.get_moves())
+
+        read = list(RecordReader(self.path))
+        self.assertEqual(read, records)
+        self.assertEqual(
+                os.path.getsize(self.path),
+                RecordWriter.FileHeader.size + sum(
+                    RecordWriter.RecordHeader.size + len(r) for r in records))
+        for record, result in zip(read, results):
+            counts = result['counts']
+            self.assertEqual(
+                    record.get_disc_diff(),
+                    counts[core.Stone.Black] - counts[core.Stone.White])
+
+    def test_replay(self):
+        result = Simulator.play_game(
+                {core.Stone.Black: 'cpu', core.Stone.White: 'cpu'}, 0)
+        record = GameRecord.from_colored_moves(
+                result['moves'], result['colors'])
+        positions = record.replay()
+        (reversi, coord, color) = next(positions)
+        self.assertEqual(coord.get(), tuple(result['moves'][0]))
+        self.assertEqual(color, core.Stone.Black)
+        self.assertEqual(
+                sum(reversi.get_board().get_stones_counts()), 5)
+        for (reversi, coord, color) in positions:
+            pass
+        self.assertEqual(
+                reversi.get_board().get_stones_counts(), result['counts'])
+
+    def test_replay_passes(self):
+        class Controller(NullController):
+            def __init__(self):
+                self.passes = []
+
+            def request_apply_diff(self, diff):
+                if diff.get_passed() is not None:
+                    self.passes.append(diff.get_passed())
+
+            def request_notify_need_pass(self, color):
+                raise AssertionError('The pass is notified twice')
+
+        result = Simulator.play_game(
+                {core.Stone.Black: 'cpu', core.Stone.White: 'random'}, 2)
+        record = GameRecord.from_colored_moves(
+                result['moves'], result['colors'])
+        self.assertEqual(record.get_moves().count(GameRecord.Pass), 2)
+        controller = Controller()
+        passes = [
+            color for (_, coord, color) in record.replay(controller)
+            if coord is None
+        ]
+        self.assertEqual(controller.passes, passes)
+
+    def test_replay_illegal_moves(self):
+        # Records with their disc differential are checked on replay.
+        with self.assertRaises(RecordError):
+            list(GameRecord([0], 0).replay())
+        with self.assertRaises(RecordError):
+            list(GameRecord([37, GameRecord.Pass], 3).replay())
+
+    def test_broken_file(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a record')
+        with self.assertRaises(RecordError):
+            list(RecordReader(self.path))
+        with self.assertRaises(RecordError):
+            RecordWriter(self.path)
+
+        os.remove(self.path)
+        with RecordWriter(self.path) as writer:
+            writer.write([37, 43])
+        with open(self.path, 'ab') as f:
+            f.write(RecordWriter.RecordHeader.pack(2, 0) + b'\x25')
+        with self.assertRaises(RecordError):
+            list(RecordReader(self.path))
+
+
+if __name__ == '__main__':
+    t.main()
@@ -0,0 +1,162 @@
+import time
+import unittest as t
+import core
+import search
+from test_core import NullController, board_string_to_matrix
+
+
+class TestMoveOrderer(t.TestCase):
+    def test_order(self):
+        orderer = search.MoveOrderer()
+        corner, around, normal, edge = 0, 9, 19, 3
+        moves = (1 << corner) | (1 << around) | (1 << normal) | (1 << edge)
+        Black = core.Stone.Black
+
+        # Square classes only
+        self.assertEqual(
+                orderer.order(moves, 0, Black), [corner, edge, normal, around])
+
+        # History beats square classes, and killers beat history.
+        orderer.record_cutoff(around, 5, Black, 3)
+        self.assertEqual(
+                orderer.order(moves, 0, Black), [around, corner, edge, normal])
+        orderer.record_cutoff(normal, 0, Black, 1)
+        orderer.record_cutoff(edge, 0, Black, 1)
+        self.assertEqual(
+                orderer.order(moves, 0, Black), [edge, normal, around, corner])
+
+        # The move of the transposition table comes first.
+        self.assertEqual(
+                orderer.order(moves, 0, Black, corner)[0], corner)
+
+        # Statistics are kept per color.
+        self.assertEqual(
+                orderer.order(moves, 1, core.Stone.White),
+                [corner, edge, normal, around])
+
+        orderer.age()
+        self.assertEqual(
+                orderer.order(moves, 0, Black), [around, corner, edge, normal])
+
+
+class TestSearchCPU(t.TestCase):
+    def test_get_put_coord(self):
+        r = core.Reversi(NullController())
+        cpu = search.SearchCPU(max_depth=4, time_limit=None)
+        coord = cpu.get_put_coord(r, core.Stone.Black)
+        self.assertIn(coord, r.get_puttable_coords(core.Stone.Black))
+        self.assertEqual(cpu.get_last_stats()['depth'], 4)
+
+    def test_takes_corner(self):
+        r = core.Reversi(NullController())
+        r.get_board().set_entire(board_string_to_matrix('''
+            ........
+            .x......
+            ..x.....
+            ...xo...
+            ...ox...
+            .....o..
+            ........
+            ........
+        '''))
+        cpu = search.SearchCPU(max_depth=3, time_limit=None)
+        self.assertEqual(
+                cpu.get_put_coord(r, core.Stone.White), core.Coord(0, 0))
+
+    def test_solves_endgame(self):
+        r = core.Reversi(NullController())
+        r.get_board().set_entire(board_string_to_matrix('''
+            xxxxxxxx
+            xxxxxxxx
+            xxxxxxxx
+            xxxxxxxx
+            xxxxxxxx
+            xxxxxxxx
+            xxxxxxoo
+            xxxxxo..
+        '''))
+        cpu = search.SearchCPU(time_limit=None)
+        self.assertIn(
+                cpu.get_put_coord(r, core.Stone.Black),
+                [core.Coord(6, 7), core.Coord(7, 7)])
+        # Black takes all the 64 cells whichever it chooses.
+        self.assertEqual(
+                cpu.get_last_stats()['score'], search.SearchCPU.WinScore + 64)
+
+    def test_node_limit(self):
+        r = core.Reversi(NullController())
+        cpu = search.SearchCPU(time_limit=None, node_limit=2048)
+        coord = cpu.get_put_coord(r, core.Stone.Black)
+        self.assertIn(coord, r.get_puttable_coords(core.Stone.Black))
+        self.assertLess(cpu.get_last_stats()['depth'], 60)
+
+    def test_time_limit(self):
+        # The solver of endgame_empties=60 cannot finish in time, and the
+        # search after it has no time left.
+        r = core.Reversi(NullController())
+        for endgame_empties in [None, 60]:
+            cpu = search.SearchCPU(
+                    time_limit=0.05, endgame_empties=endgame_empties)
+            start = time.perf_counter()
+            coord = cpu.get_put_coord(r, core.Stone.Black)
+            self.assertIn(coord, r.get_puttable_coords(core.Stone.Black))
+            self.assertLess(time.perf_counter() - start, 0.075)
+
+    def test_restricted_root(self):
+        # A search of only some root moves stores a lower bound, which is
+        # not above the exact score of the search of all the moves.
+        Black, White = core.Stone.Black, core.Stone.White
+        black, white = 0x0000000810000000, 0x0000001008000000
+        bit = 1 << 19
+        flips = core.BitBoard.get_flips_mask(black, white, bit)
+        (player, rival) = (white ^ flips, black | bit | flips)
+        key = core.Zobrist.hash_bits(player, rival, White)
+        moves = core.BitBoard.get_moves_mask(player, rival)
+        cpu = search.SearchCPU(max_depth=3, time_limit=None)
+        cpu.search(player, rival, White, moves)
+        (_, bound, exact, _) = cpu.get_table().probe(key)
+        self.assertEqual(bound, search.TranspositionTable.Bound.Exact)
+        for index in core.BitBoard.bits_to_coords(moves):
+            cpu = search.SearchCPU(max_depth=3, time_limit=None)
+            cpu.search(player, rival, White,
+                       core.BitBoard.coord_to_bit(index))
+            (_, bound, score, _) = cpu.get_table().probe(key)
+            self.assertEqual(bound, search.TranspositionTable.Bound.Lower)
+            self.assertLessEqual(score, exact)
+
+    def test_set_cpu(self):
+        r = core.Reversi(NullController())
+        r.set_play_mode(core.Reversi.PlayMode.VsCPU)
+        r.set_cpu(search.SearchCPU(max_depth=2, time_limit=None))
+        self.assertTrue(r.put_stone(core.Coord(3, 2)))
+        r.proceed_to_next()
+        self.assertEqual(r.get_board().get_stones_counts(), [3, 3])
+
+
+class TestParallelSearchCPU(t.TestCase):
+    def test_same_score_as_serial(self):
+        r = core.Reversi(NullController())
+        r.get_board().set_entire(board_string_to_matrix('''
+            ........
+            ........
+            ..xo....
+            ..xxxo..
+            ..oxox..
+            ...o.x..
+            ........
+            ........
+        '''))
+        options = {
+            'max_depth': 4,
+            'time_limit': None,
+            'endgame_empties': None,
+        }
+        serial = search.SearchCPU(**options)
+        serial.get_put_coord(r, core.Stone.White)
+        with search.ParallelSearchCPU(workers=2, **options) as parallel:
+            coord = parallel.get_put_coord(r, core.Stone.White)
+            stats = parallel.get_last_stats()
+        self.assertIn(coord, r.get_puttable_coords(core.Stone.White))
+        self.assertEqual(stats['workers'], 2)
+        self.assertEqual(stats['depth'], 4)
+        self.assertEqual(stats['score'], serial.get_last_stats()['score'])
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import unittest as t
+from concurrent.futures import ThreadPoolExecutor
+import core
+from server import ReversiServer
+
+
+def request(**kwargs):
+    return json.dumps(kwargs)
+
+
+class TestReversiServer(t.TestCase):
+    def setUp(self):
+        self.server = ReversiServer(ThreadPoolExecutor(max_workers=2))
+
+    def tearDown(self):
+        self.server.close()
+
+    def run_requests(self, *lines):
+        owned = set()
+
+        async def run():
+            return [await self.server.handle_request(line, owned)
+                    for line in lines]
+        return asyncio.run(run())
+
+    def test_two_players(self):
+        (new, move, fails) = self.run_requests(
+                request(id=1, cmd='new'),
+                request(id=2, cmd='move', session=1, x=3, y=2),
+                request(id=3, cmd='move', session=1, x=0, y=0))
+        self.assertTrue(new['ok'])
+        self.assertEqual(new['state']['color'], core.Stone.Black)
+        self.assertEqual(len(new['state']['puttable']), 4)
+
+        self.assertEqual(move['id'], 2)
+        self.assertEqual(move['state']['counts'], [1, 4])
+        self.assertEqual(move['state']['color'], core.Stone.White)
+        self.assertEqual(move['state']['board'][2], '...x....')
+        self.assertEqual(move['events'][0], {'event': 'apply_diff', 'args': [{
+            'coord': [3, 2], 'color': core.Stone.Black, 'flipped': [[3, 3]],
+            'counts': [1, 4], 'next': core.Stone.White, 'passed': None,
+            'result': None}]})
+        self.assertEqual(move['events'][-1],
+                         {'event': 'player_change', 'args': [core.Stone.White]})
+
+        self.assertTrue(fails['ok'])
+        self.assertEqual(fails['events'],
+                         [{'event': 'put_fails', 'args': [[0, 0]]}])
+        self.assertEqual(fails['state']['color'], core.Stone.White)
+
+    def test_game_against_cpu(self):
+        (new,) = self.run_requests(
+                request(id=1, cmd='new', cpu='random', cpu_color='black'))
+        # The CPU has played first.
+        self.assertEqual(new['state']['color'], core.Stone.White)
+        self.assertEqual(sum(new['state']['counts']), 5)
+
+        async def play():
+            owned = set()
+            response = await self.server.handle_request(
+                    request(cmd='new', cpu='cpu'), owned)
+            session = response['state']['session']
+            while response['state']['result'] is None:
+                (x, y) = response['state']['puttable'][0]
+                response = await self.server.handle_request(
+                        request(cmd='move', session=session, x=x, y=y), owned)
+                self.assertTrue(response['ok'])
+                # Passes and the end of the game come only in the diffs.
+                for event in response['events']:
+                    self.assertIn(event['event'],
+                                  ['apply_diff', 'player_change'])
+            return response
+        state = asyncio.run(play())['state']
+        self.assertIn(state['result'], [
+            core.Stone.White, core.Stone.Black, core.Stone.Unset])
+        self.assertEqual(state['puttable'], [])
+
+    def test_errors(self):
+        responses = self.run_requests(
+                'not json',
+                request(id=1, cmd='fly'),
+                request(id=2, cmd='move', session=9, x=0, y=0),
+                request(id=3, cmd='new', cpu='nothing'),
+                request(id=4, cmd='new', cpu='cpu', cpu_color='black'),
+                request(id=5, cmd='move', session=1, x=3, y=2),
+                request(id=6, cmd='move', session=1, x='a', y=2))
+        self.assertEqual([r['ok'] for r in responses],
+                         [False, False, False, False, True, True, False])
+        self.assertEqual(responses[2]['error'], 'No such session: 9')
+        self.assertEqual(responses[5]['events'][0]['event'], 'put_fails')
+
+    def test_strategy_options(self):
+        responses = self.run_requests(
+                request(id=1, cmd='new', cpu='search:bogus=1',
+                        cpu_color='black'),
+                request(id=2, cmd='new', cpu='mcts:time_limit=None'),
+                request(id=3, cmd='new', cpu='search:time_limit=100'),
+                request(id=4, cmd='new', cpu='search:table_size_mb=100000'),
+                request(id=5, cmd='new', cpu='search:max_depth=2.5'),
+                request(id=6, cmd='new', cpu='random:seed=1'),
+                request(id=7, cmd='new', cpu=1),
+                request(id=8, cmd='new', cpu='search:max_depth=2,'
+                        'time_limit=0.5', cpu_color='black'))
+        self.assertEqual([r['ok'] for r in responses], [False] * 7 + [True])
+        self.assertEqual(self.server.get_session_count(), 1)
+
+    def test_cpu_failure(self):
+        class FailingExecutor(ThreadPoolExecutor):
+            def submit(self, fn, *args):
+                def fail():
+                    raise BaseException('engine failure')
+                return super().submit(fail)
+
+        server = ReversiServer(FailingExecutor(max_workers=1))
+        try:
+            response = asyncio.run(server.handle_request(
+                    request(id=1, cmd='new', cpu='cpu', cpu_color='black')))
+        finally:
+            server.close()
+        self.assertFalse(response['ok'])
+        self.assertEqual(response['error'], 'The CPU failed: engine failure')
+        # The failed session is not left behind.
+        self.assertEqual(server.get_session_count(), 0)
+
+    def test_sessions_of_other_clients(self):
+        async def run():
+            await self.server.handle_request(request(cmd='new'), set())
+            return await self.server.handle_request(
+                    request(cmd='state', session=1), set())
+        self.assertFalse(asyncio.run(run())['ok'])
+
+    def test_tcp(self):
+        async def run():
+            listener = await self.server.start_tcp('127.0.0.1', 0)
+            port = listener.sockets[0].getsockname()[1]
+            async with listener:
+                (reader, writer) = await asyncio.open_connection(
+                        '127.0.0.1', port)
+                writer.write((request(id=1, cmd='new') + '\n').encode())
+                writer.write((request(id=2, cmd='state', session=1) + '\n')
+                             .encode())
+                await writer.drain()
+                responses = [json.loads(await reader.readline())
+                             for _ in range(2)]
+                self.assertEqual(self.server.get_session_count(), 1)
+                writer.close()
+                await writer.wait_closed()
+                for _ in range(100):
+                    if self.server.get_session_count() == 0:
+                        break
+                    await asyncio.sleep(0.01)
+            return responses
+        responses = sorted(asyncio.run(run()), key=lambda r: r['id'])
+        self.assertEqual([r['ok'] for r in responses], [True, True])
+        self.assertEqual(responses[1]['state']['session'], 1)
+        self.assertEqual(self.server.get_session_count(), 0)
+
+
+if __name__ == '__main__':
+    t.main()
@@ -0,0 +1,58 @@
+import unittest as t
+import core
+from controller import HeadlessController
+from simulator import Simulator
+
+
+def without_times(result):
+    return dict(result, times=None)
+
+
+class TestSimulator(t.TestCase):
+    def test_play_game(self):
+        strategies = {core.Stone.Black: 'cpu', core.Stone.White: 'random'}
+        result = Simulator.play_game(strategies, 0)
+        self.assertEqual(
+                without_times(result),
+                without_times(Simulator.play_game(strategies, 0)))
+        self.assertEqual(len(result['moves']), len(result['times']))
+        self.assertEqual(len(result['moves']), len(result['colors']))
+
+        # Replaying the moves reaches the same result.
+        controller = HeadlessController()
+        reversi = controller.get_reversi()
+        for (x, y), color in zip(result['moves'], result['colors']):
+            self.assertTrue(reversi.put_stone_color(core.Coord(x, y), color))
+        self.assertEqual(
+                reversi.get_board().get_stones_counts(), result['counts'])
+        self.assertTrue(reversi.pass_if_necessary(core.Stone.Black))
+        self.assertEqual(controller.get_result(), result['winner'])
+
+    def test_run(self):
+        simulator = Simulator('random', 'search:max_depth=1,time_limit=None')
+        results = list(simulator.run(3))
+        self.assertEqual([r['seed'] for r in results], [0, 1, 2])
+
+        summary = Simulator.summarize(results)
+        self.assertEqual(summary['games'], 3)
+        self.assertEqual(
+                summary['black'] + summary['white'] + summary['draw'], 3)
+
+    def test_workers(self):
+        # The games do not depend on the number of workers.
+        serial = list(Simulator('cpu', 'random', seed=5).run(4))
+        parallel = list(Simulator('cpu', 'random', seed=5, workers=2).run(4))
+        self.assertEqual(
+                [without_times(r) for r in serial],
+                [without_times(r) for r in parallel])
+
+    def test_parse_strategy(self):
+        self.assertEqual(
+                Simulator.parse_strategy('search:max_depth=3,time_limit=None'),
+                ('search', {'max_depth': 3, 'time_limit': None}))
+        with self.assertRaises(BaseException):
+            Simulator('unknown', 'cpu')
+
+
+if __name__ == '__main__':
+    t.main()
@@ -0,0 +1,56 @@
+import unittest as t
+import transposition
+
+
+class TestTranspositionTable(t.TestCase):
+    def test_size(self):
+        table = transposition.TranspositionTable(size_mb=1)
+        self.assertLessEqual(
+                len(table) * transposition.TranspositionTable.EntrySize,
+                1024 * 1024)
+        self.assertEqual(len(table) & (len(table) - 1), 0)
+
+    def test_store_and_probe(self):
+        Bound = transposition.TranspositionTable.Bound
+        table = transposition.TranspositionTable(size_mb=1)
+        self.assertIsNone(table.probe(0))
+        table.store(0, 3, Bound.Exact, -12, 19)
+        self.assertEqual(table.probe(0), (3, Bound.Exact, -12, 19))
+
+        table.store(0, 1, Bound.Lower, 5)
+        self.assertEqual(
+                table.probe(0),
+                (1, Bound.Lower, 5, transposition.TranspositionTable.NoMove))
+        self.assertEqual(table.get_stats(), {
+            'hits': 2,
+            'misses': 1,
+            'stores': 2,
+            'overwrites': 0,
+        })
+
+    def test_replacement(self):
+        Bound = transposition.TranspositionTable.Bound
+        table = transposition.TranspositionTable(size_mb=1)
+        n = len(table) // 2
+        # All of these keys fall into the same bucket.
+        deep, shallow, newer = 1, 1 + n, 1 + 2 * n
+        table.store(deep, 5, Bound.Exact, 1)
+        table.store(shallow, 2, Bound.Exact, 2)
+        self.assertIsNotNone(table.probe(deep))
+        self.assertIsNotNone(table.probe(shallow))
+
+        # The shallow entry is replaced, and the deep one survives.
+        table.store(newer, 1, Bound.Exact, 3)
+        self.assertIsNotNone(table.probe(deep))
+        self.assertIsNone(table.probe(shallow))
+        self.assertEqual(table.probe(newer), (1, Bound.Exact, 3, -1))
+
+        # A deeper entry takes the first slot and demotes the deep one.
+        table.store(shallow, 6, Bound.Upper, 4)
+        self.assertIsNotNone(table.probe(shallow))
+        self.assertIsNotNone(table.probe(deep))
+        self.assertIsNone(table.probe(newer))
+        self.assertEqual(table.get_stats()['overwrites'], 2)
+
+        table.clear()
+        self.assertIsNone(table.probe(deep))
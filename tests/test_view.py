@@ -1,5 +1,7 @@
 import unittest as t
+import core
 import view
+from test_core import NullController
 
 
 class TestCanvasCoord(t.TestCase):
@@ -18,3 +20,136 @@ class TestCanvasCoord(t.TestCase):
 
         c2.y = 4
         self.assertEqual(c2.y, 4)
+
+
+class FakeWidget:
+    '''
+    FakeWidget stands for the tkinter widgets, and ignores every call.
+    '''
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class FakeCanvas(FakeWidget):
+    '''
+    FakeCanvas keeps the options of its items, and records the items
+    created and reconfigured.
+    '''
+    def __init__(self, *args, **kwargs):
+        self.items = {}
+        self.created = []
+        self.configured = []
+
+    def __getattr__(self, name):
+        if not name.startswith('create_'):
+            return super().__getattr__(name)
+
+        def create(*args, **kwargs):
+            item = len(self.items) + 1
+            self.items[item] = dict(kwargs)
+            self.created.append(item)
+            return item
+        return create
+
+    def itemconfig(self, item, **kwargs):
+        self.items[item].update(kwargs)
+        self.configured.append(item)
+
+
+class FakeTk:
+    Tk = Menu = Label = StringVar = FakeWidget
+    Canvas = FakeCanvas
+
+
+class TestView(t.TestCase):
+    class Controller(NullController):
+        def __init__(self):
+            self.reversi = core.Reversi(self)
+            self.view = view.View(self)
+
+        def request_apply_diff(self, diff):
+            self.view.apply_diff(diff)
+
+        def request_puttable_cells_for_current_player(self):
+            return self.reversi.get_puttable_coords(
+                    self.reversi.get_player_color())
+
+        def request_get_play_color(self):
+            return self.reversi.get_player_color()
+
+    def setUp(self):
+        self.tk = view.tk
+        view.tk = FakeTk
+        self.controller = TestView.Controller()
+        self.reversi = self.controller.reversi
+        self.view = self.controller.view
+        self.view.create_window(
+                self.reversi.get_board(), core.Reversi.PlayMode.VsPlayer)
+        self.canvas = self.view._View__canvas
+
+    def tearDown(self):
+        view.tk = self.tk
+
+    def put(self, coord):
+        self.assertTrue(self.reversi.put_stone(coord))
+        self.reversi.proceed_to_next()
+        self.view.update_highlight()
+
+    def cells(self):
+        # The stone and the highlight of each cell.
+        board = self.reversi.get_board()
+        puttable = self.controller.request_puttable_cells_for_current_player()
+        return {
+            core.Coord(x, y): (
+                board.get_stone(core.Coord(x, y)),
+                core.Coord(x, y) in puttable)
+            for x in range(core.Board.Size)
+            for y in range(core.Board.Size)
+        }
+
+    def reinitialize(self):
+        self.reversi.init_state()
+        self.view.set_board(self.reversi.get_board())
+        self.view.update_highlight()
+
+    def test_create_window(self):
+        # The title, the board, 18 lines and the 2 items of each cell.
+        self.assertEqual(len(self.canvas.items), 148)
+        self.canvas.created.clear()
+
+        self.put(core.Coord(3, 2))
+        self.put(core.Coord(2, 2))
+        self.reinitialize()
+        self.put(core.Coord(2, 3))
+        self.assertEqual(self.canvas.created, [])
+        self.assertEqual(len(self.canvas.items), 148)
+
+    def test_itemconfig(self):
+        rectangles = self.view._View__cell_rectangles
+        ovals = self.view._View__cell_ovals
+        actions = [
+            lambda: self.put(core.Coord(3, 2)),
+            lambda: self.put(core.Coord(2, 2)),
+            lambda: self.put(core.Coord(2, 3)),
+            self.reinitialize,
+            self.reinitialize,
+        ]
+        for action in actions:
+            before = self.cells()
+            self.canvas.configured.clear()
+            action()
+            after = self.cells()
+            stones = {c for c in after if before[c][0] != after[c][0]}
+            highlights = {c for c in after if before[c][1] != after[c][1]}
+            self.assertEqual(
+                    sorted(self.canvas.configured),
+                    sorted([ovals[c] for c in stones] +
+                           [rectangles[c] for c in highlights]))
+            for c in stones:
+                self.assertEqual(
+                        self.canvas.items[ovals[c]].get('state'),
+                        'hidden' if after[c][0] == core.Stone.Unset
+                        else 'normal')
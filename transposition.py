@@ -0,0 +1,139 @@
+from array import array
+
+
+class TranspositionTable:
+    '''
+    TranspositionTable class remembers the results of searches keyed by the
+    Zobrist key of positions (see Board.get_hash()).
+
+    The table is backed by preallocated arrays, one per field, whose total
+    size fits in the given memory limit. The entries are grouped into
+    buckets of two slots: the first slot keeps the entry searched most
+    deeply, and the second one keeps the entry stored most recently.
+    '''
+
+    class Bound:
+        Exact = 0
+        Lower = 1   # The score is a lower bound (fail high)
+        Upper = 2   # The score is an upper bound (fail low)
+
+    NoMove = -1
+    _EmptyDepth = -1
+    _SlotsPerBucket = 2
+
+    # Bytes of one entry: key (8), depth (1), bound (1), score (4), move (1)
+    EntrySize = 15
+
+    def __init__(self, size_mb=16):
+        '''
+        TranspositionTable(size_mb=16)
+            Allocate a table using at most 'size_mb' megabytes.
+        '''
+        entries = max(
+                size_mb * 1024 * 1024 // TranspositionTable.EntrySize,
+                TranspositionTable._SlotsPerBucket)
+        buckets = entries // TranspositionTable._SlotsPerBucket
+        # Round down to a power of 2 to find a bucket by masking the key.
+        self.__bucket_mask = (1 << (buckets.bit_length() - 1)) - 1
+        size = (self.__bucket_mask + 1) * TranspositionTable._SlotsPerBucket
+
+        self.__keys = array('Q', bytes(8 * size))
+        self.__depths = array('b', [TranspositionTable._EmptyDepth]) * size
+        self.__bounds = array('b', bytes(size))
+        self.__scores = array('i', bytes(4 * size))
+        self.__moves = array('b', bytes(size))
+        self.reset_stats()
+
+    def __len__(self):
+        return len(self.__keys)
+
+    def clear(self):
+        self.__depths = \
+            array('b', [TranspositionTable._EmptyDepth]) * len(self)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.__hits = 0
+        self.__misses = 0
+        self.__stores = 0
+        self.__overwrites = 0
+
+    def get_stats(self):
+        '''
+        get_stats()
+            Return the counters of the table as a dict.
+            'overwrites' is the number of the entries of other positions
+            replaced by store().
+        '''
+        return {
+            'hits': self.__hits,
+            'misses': self.__misses,
+            'stores': self.__stores,
+            'overwrites': self.__overwrites,
+        }
+
+    def __find(self, key):
+        # Return the slot holding 'key', or -1.
+        slot = (key & self.__bucket_mask) * TranspositionTable._SlotsPerBucket
+        for i in range(slot, slot + TranspositionTable._SlotsPerBucket):
+            if self.__keys[i] == key and \
+                    self.__depths[i] != TranspositionTable._EmptyDepth:
+                return i
+        return -1
+
+    def probe(self, key):
+        '''
+        probe(key)
+            Return a tuple of (depth, bound, score, best move) stored for
+            'key', or None if the table does not have it.
+            The best move is a bit index of the cell, or NoMove.
+        '''
+        i = self.__find(key)
+        if i < 0:
+            self.__misses += 1
+            return None
+        self.__hits += 1
+        return (
+            self.__depths[i],
+            self.__bounds[i],
+            self.__scores[i],
+            self.__moves[i],
+        )
+
+    def store(self, key, depth, bound, score, best_move=NoMove):
+        '''
+        store(key, depth, bound, score, best_move=NoMove)
+            Store the result of a search of 'depth' plies.
+            An entry of the same position is updated in place. Otherwise the
+            entry goes to the depth-preferred slot if it is searched at least
+            as deep as the one there, or to the always-replace slot.
+        '''
+        self.__stores += 1
+        i = self.__find(key)
+        if i < 0:
+            slot = (key & self.__bucket_mask) * \
+                TranspositionTable._SlotsPerBucket
+            if depth >= self.__depths[slot]:
+                if self.__depths[slot] != TranspositionTable._EmptyDepth:
+                    # Demote the previous entry to the always-replace slot.
+                    self.__move_entry(slot, slot + 1)
+                i = slot
+            else:
+                i = slot + 1
+                if self.__depths[i] != TranspositionTable._EmptyDepth:
+                    self.__overwrites += 1
+
+        self.__keys[i] = key
+        self.__depths[i] = depth
+        self.__bounds[i] = bound
+        self.__scores[i] = score
+        self.__moves[i] = best_move
+
+    def __move_entry(self, src, dst):
+        if self.__depths[dst] != TranspositionTable._EmptyDepth:
+            self.__overwrites += 1
+        self.__keys[dst] = self.__keys[src]
+        self.__depths[dst] = self.__depths[src]
+        self.__bounds[dst] = self.__bounds[src]
+        self.__scores[dst] = self.__scores[src]
+        self.__moves[dst] = self.__moves[src]
@@ -4,19 +4,34 @@ from core import Stone, Coord, Board, Reversi
 import time
 
 
-class CanvasCoord(Coord):
+class CanvasCoord:
     '''
     CanvasCoord class is 2 dimention vector to express positions in the canvas.
+    Unlike Coord, CanvasCoord is mutable.
     '''
+    def __init__(self, x, y):
+        self.x, self.y = x, y
+
     def __add__(self, other):
-        value = super().__add__(other)
-        value.__class__ = CanvasCoord
-        return value
+        return CanvasCoord(self.x + other.x, self.y + other.y)
 
     def __sub__(self, other):
-        value = super().__sub__(other)
-        value.__class__ = CanvasCoord
-        return value
+        return CanvasCoord(self.x - other.x, self.y - other.y)
+
+    def __eq__(self, other):
+        return self.x == other.x and self.y == other.y
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __str__(self):
+        return f'({self.x}, {self.y})'
+
+    def set(self, newCoord):
+        self.x, self.y = newCoord.x, newCoord.y
+
+    def get(self):
+        return (self.x, self.y)
 
 class View:
     def __init__(self, controller):
@@ -34,6 +49,13 @@ class View:
         self.__CellSize = 50
         self.__board = Board()
 
+        # Canvas items of each cell, created once in create_window(), and
+        # the (stone, highlighted) drawn on them.
+        self.__cell_rectangles = {}
+        self.__cell_ovals = {}
+        self.__drawn_cells = {}
+        self.__highlighted_cells = set()
+
         # Stone
         self.__StoneRadius = 20
         self.__BlackStoneColor = 'Black'
@@ -108,37 +130,63 @@ class View:
         y = (canvas_coord.y - self.__BoardCoord.y) // self.__CellSize
         return Coord(x, y)
 
-    def show_stone(self, pos, color):
-        str_color = ''
-        if color == Stone.White:
-            str_color = self.__WhiteStoneColor
-        elif color == Stone.Black:
-            str_color = self.__BlackStoneColor
-        else:
-            return
-        
-        self.__canvas.create_oval(
-                pos.x - self.__StoneRadius,
-                pos.y - self.__StoneRadius,
-                pos.x + self.__StoneRadius,
-                pos.y + self.__StoneRadius,
-                fill = str_color)
+    def create_cells(self):
+        '''
+        Create a rectangle and an oval for every cell. They are kept for the
+        whole session, and draw_cell() only reconfigures them.
+        '''
+        half = self.__CellSize / 2
+        for x in range(Board.Size):
+            for y in range(Board.Size):
+                coord = Coord(x, y)
+                pos = self.coord_to_canvas_coord(coord)
+                rectangle = self.__canvas.create_rectangle(
+                        pos.x - half, pos.y - half,
+                        pos.x + half, pos.y + half,
+                        fill=self.__BoardColor,
+                        outline=self.__CellOutlineColor)
+                self.__cell_rectangles[coord] = rectangle
+                self.__cell_ovals[coord] = self.__canvas.create_oval(
+                        pos.x - self.__StoneRadius,
+                        pos.y - self.__StoneRadius,
+                        pos.x + self.__StoneRadius,
+                        pos.y + self.__StoneRadius,
+                        state='hidden')
+                self.__drawn_cells[coord] = (Stone.Unset, False)
+
+    def draw_cell(self, coord):
+        '''
+        Reconfigure the items of the cell of 'coord' to its stone and
+        highlight. Nothing is done if they have not changed.
+        '''
+        stone = self.__board.get_stone(coord)
+        if stone != Stone.White and stone != Stone.Black:
+            stone = Stone.Unset
+        highlighted = coord in self.__highlighted_cells
+        (drawn_stone, drawn_highlighted) = self.__drawn_cells[coord]
+        if highlighted != drawn_highlighted:
+            self.__canvas.itemconfig(
+                    self.__cell_rectangles[coord],
+                    fill=self.__HighlightedCellColor if highlighted
+                    else self.__BoardColor)
+        if stone != drawn_stone:
+            if stone == Stone.White:
+                self.__canvas.itemconfig(
+                        self.__cell_ovals[coord], state='normal',
+                        fill=self.__WhiteStoneColor)
+            elif stone == Stone.Black:
+                self.__canvas.itemconfig(
+                        self.__cell_ovals[coord], state='normal',
+                        fill=self.__BlackStoneColor)
+            else:
+                self.__canvas.itemconfig(
+                        self.__cell_ovals[coord], state='hidden')
+        self.__drawn_cells[coord] = (stone, highlighted)
 
     def update_stones(self, coords, color):
         for coord in coords:
-            pos = self.coord_to_canvas_coord(coord)
             self.__board.set_stone(coord, color)
-            if color == Stone.White or color == Stone.Black:
-                self.show_stone(pos, color)
-            else:
-                self.__canvas.create_rectangle(
-                    pos.x - self.__CellSize / 2, pos.y - self.__CellSize / 2,
-                    pos.x + self.__CellSize / 2, pos.y + self.__CellSize / 2,
-                    fill=self.__BoardColor,
-                    outline=self.__CellOutlineColor
-                )
-        stones_counts = self.__board.get_stones_counts()
-        self.update_stones_counts(stones_counts)
+            self.draw_cell(coord)
 
     def set_board(self, board):
         '''
@@ -148,12 +196,15 @@ class View:
             for y in range(Board.Size):
                 coord = Coord(x, y)
                 self.update_stones([coord], board.get_stone(coord))
+        self.update_stones_counts(self.__board.get_stones_counts())
 
-    def reverse_stones(self, coords):
-        for coord in coords:
-            color = Stone.get_rival_stone_color(self.__board.get_stone(coord))
-            # You may add some animation here.
-            self.update_stones([coord], color)
+    def apply_diff(self, diff):
+        '''
+        Apply the BoardDiff of a move: the new stone and the reversed ones
+        are drawn, and the stone counts are updated once.
+        '''
+        self.update_stones(diff.get_changed_coords(), diff.get_color())
+        self.update_stones_counts(diff.get_counts())
 
     def is_coord_on_board(self, canvas_coord):
         board_size = self.__CellSize * Board.Size
@@ -237,27 +288,12 @@ class View:
         self.__current_turn_text.set(f"{str_current_turn}'s turn")
 
     def update_highlight(self):
-        cells_to_highlight = self.__controller.request_puttable_cells_for_current_player()
-        for x in range(Board.Size):
-            for y in range(Board.Size):
-                coord = Coord(x, y)
-                pos = self.coord_to_canvas_coord(coord)
-                stone = self.__board.get_stone(coord)
-                if coord in cells_to_highlight:
-                    self.__canvas.create_rectangle(
-                            pos.x - self.__CellSize / 2, pos.y - self.__CellSize / 2,
-                            pos.x + self.__CellSize / 2, pos.y + self.__CellSize / 2,
-                            fill=self.__HighlightedCellColor,
-                            outline=self.__CellOutlineColor
-                        )
-                else:
-                    self.__canvas.create_rectangle(
-                            pos.x - self.__CellSize / 2, pos.y - self.__CellSize / 2,
-                            pos.x + self.__CellSize / 2, pos.y + self.__CellSize / 2,
-                            fill=self.__BoardColor,
-                            outline=self.__CellOutlineColor
-                        )
-                self.show_stone(pos, stone)
+        cells_to_highlight = set(
+                self.__controller.request_puttable_cells_for_current_player())
+        changed = cells_to_highlight ^ self.__highlighted_cells
+        self.__highlighted_cells = cells_to_highlight
+        for coord in changed:
+            self.draw_cell(coord)
 
     def notify_need_pass(self, color):
         str_color = ''
@@ -362,7 +398,8 @@ class View:
                 self.__BoardCoord.y + i * self.__CellSize,
                 fill = self.__CellOutlineColor)
         
-        # ----- Stones -----
+        # ----- Cells & Stones -----
+        self.create_cells()
         self.set_board(board)
         
         # ---- Highlight -----